@@ -1,17 +1,29 @@
 from __future__ import annotations
 from abc import ABCMeta
-from typing import Union, Iterable, Mapping, Type, MutableMapping, List, Callable, TypeVar, Generic, Set, Optional, \
-    Generator
+from typing import Union, Iterable, Mapping, Type, MutableMapping, List, Callable, TypeVar, Generic, Optional, \
+    Generator, Dict, Sequence, Iterator
+import collections.abc
 import json
+from copy import deepcopy
 import logging
+from types import MappingProxyType
 
 from .Errors import InvalidStyleCollectionError, InvalidClassCollectionError, InvalidIdentityError
 
+_EMPTY_MAPPING: Mapping = MappingProxyType({})
+# property values of these types can be shared between clones
+_IMMUTABLE_TYPES = frozenset((str, int, float, bool, bytes, type(None)))
+
 
 class Comparable(metaclass=ABCMeta):
     """
     Comparable interface allows you compare objects with their identity.
     """
+    # the interfaces declare empty `__slots__` so that they can be mixed together,
+    # and the concrete classes add the attributes listed in `_SLOTS`
+    __slots__ = ()
+    _SLOTS = ('identity', '_name', 'cy_id', '_hash_cache')
+
     _PREFIX = ''
     _comparable_counter = 0
 
@@ -35,10 +47,29 @@ class Comparable(metaclass=ABCMeta):
         if not self.identity_validator(identity):
             raise InvalidIdentityError
         self.identity: str = identity
-        self.name: str = name if name else self._PREFIX + str(identity)
+        self._name: Optional[str] = name if name else None
         self.cy_id: str = self._get_id_string()
         self._hash_cache = None
 
+    def _clone_identity_from(self, source: Comparable) -> None:
+        """
+        copy the identity, the name and the cy_id of another element
+        @param source:
+        """
+        self.identity = source.identity
+        self._name = source._name
+        self.cy_id = source.cy_id
+        self._hash_cache = source._hash_cache
+
+    @property
+    def name(self) -> str:
+        # the default name is derived from the identity when it is read
+        return self._name if self._name else self._PREFIX + str(self.identity)
+
+    @name.setter
+    def name(self, name: str) -> None:
+        self._name = name
+
     def __eq__(self, other):
         if isinstance(other, type(self)):
             return self.identity == other.identity
@@ -70,16 +101,64 @@ class Comparable(metaclass=ABCMeta):
 class HasProperty(metaclass=ABCMeta):
     """
     Property interface allows you to manage defined property and access them through subscript;
+    The property dict is only created when it is first requested or written.
+    Clones share their property dict, and each of them copies it the first time a writable
+    dict is requested.
     """
+    __slots__ = ()
+    _SLOTS = ('_properties', '_properties_shared')
 
     def __init__(self):
         """
         create a property interface
         """
-        self.properties: MutableMapping = {}
+        self._properties: Optional[MutableMapping] = None
+        # whether the property dict is shared with other elements, and must be copied before it is written
+        self._properties_shared = False
+
+    @property
+    def properties(self) -> MutableMapping:
+        properties = self._properties
+        if properties is None:
+            self._properties = properties = {}
+        elif self._properties_shared:
+            self._properties = properties = dict(properties)
+            self._properties_shared = False
+        return properties
+
+    @properties.setter
+    def properties(self, properties: MutableMapping) -> None:
+        self._properties = properties
+        self._properties_shared = False
+
+    def _clone_properties_from(self, source: HasProperty) -> None:
+        """
+        share the properties of another element until one of them writes to its properties.
+        Properties holding mutable values are deep copied instead.
+        @param source:
+        """
+        properties = source._properties
+        if not properties:
+            self._properties = None
+            self._properties_shared = False
+        elif source._properties_shared or all(type(value) in _IMMUTABLE_TYPES for value in properties.values()):
+            # the values are checked when the properties are shared for the first time
+            self._properties = properties
+            self._properties_shared = source._properties_shared = True
+        else:
+            self._properties = deepcopy(dict(properties))
+            self._properties_shared = False
+
+    def get_properties(self) -> Mapping:
+        """
+        read the properties without creating the property dict
+        @return: the properties, which should not be modified
+        """
+        return self._properties if self._properties is not None else _EMPTY_MAPPING
 
     def update_properties(self, properties: Mapping):
-        self.properties.update(properties)
+        if properties:
+            self.properties.update(properties)
 
     def __getitem__(self, item):
         """
@@ -87,7 +166,7 @@ class HasProperty(metaclass=ABCMeta):
         @param item:
         @return:
         """
-        return self.properties[item]
+        return self.get_properties()[item]
 
     def __setitem__(self, key, value):
         """
@@ -103,39 +182,47 @@ class HasProperty(metaclass=ABCMeta):
         @param item:
         @return boolean value indicating whether the property is in this object
         """
-        return item in self.properties
+        return item in self.get_properties()
 
     def __iter__(self):
         """
         loop through all the properties
         @return:
         """
-        for key, value in self.properties:
+        for key, value in self.get_properties():
             yield key, value
 
     def __len__(self):
         """
         @return: the number of properties of this object
         """
-        return len(self.properties)
+        return len(self.get_properties())
 
 
 class Stylable(metaclass=ABCMeta):
+    """
+    Style interface. The style and class lists are only created when they are
+    first requested or when there is something to store.
+    """
+    __slots__ = ()
+    _SLOTS = ('_styles', '_classes')
+
     default_styles = []
     default_classes = []
 
     @staticmethod
     def is_valid_graph_styles(styles: Iterable[Mapping]) -> bool:
-        if isinstance(styles, Iterable):
+        # the runtime checks use `collections.abc`, checking against the `typing` aliases is much slower
+        if isinstance(styles, collections.abc.Iterable):
             for element in styles:
-                if not isinstance(element, Mapping) or 'selector' not in element or 'style' not in element:
+                if not (isinstance(element, collections.abc.Mapping) and 'selector' in element and 'style' in element):
                     return False
             return True
         return False
 
     @staticmethod
     def is_valid_graph_classes(classes: Iterable[str]) -> bool:
-        return isinstance(classes, Iterable) and all(isinstance(element, str) for element in classes)
+        return isinstance(classes, collections.abc.Iterable) and all(isinstance(element, str) for element in classes)
 
     def __init__(self, styles: Union[str, Iterable[Mapping]], classes: Union[str, Iterable[str]],
                  add_default_styles: bool = False,
@@ -148,8 +235,8 @@ class Stylable(metaclass=ABCMeta):
         @param classes:
         """
 
-        self.styles: List[MutableMapping[str, str]] = []
-        self.classes = []
+        self._styles: Optional[List[MutableMapping[str, str]]] = None
+        self._classes: Optional[List[str]] = None
 
         if isinstance(styles, str):
             try:
@@ -173,39 +260,164 @@ class Stylable(metaclass=ABCMeta):
             class_validator = self.is_valid_graph_classes
 
         if style_validator(styles):
-            self.styles.extend(styles)
-            if add_default_styles:
-                self.styles.extend(self.default_styles)
+            styles = [*styles, *(self.default_styles if add_default_styles else ())]
+            if styles:
+                self._styles = styles
         else:
             raise InvalidStyleCollectionError(f'Cannot init {type(self)} due to graph style format error '
                                               f'(styles: {styles}).')
 
         if class_validator(classes):
-            self.classes.extend(classes)
-            if add_default_classes:
-                self.classes.extend(self.default_classes)
+            classes = [*classes, *(self.default_classes if add_default_classes else ())]
+            if classes:
+                self._classes = classes
         else:
             raise InvalidClassCollectionError(f'Cannot init {type(self)} due to graph class format error '
                                               f'(classes: {classes}).')
 
+    @property
+    def styles(self) -> List[MutableMapping[str, str]]:
+        if self._styles is None:
+            self._styles = []
+        return self._styles
+
+    @styles.setter
+    def styles(self, styles: List[MutableMapping[str, str]]) -> None:
+        self._styles = styles
+
+    @property
+    def classes(self) -> List[str]:
+        if self._classes is None:
+            self._classes = []
+        return self._classes
+
+    @classes.setter
+    def classes(self, classes: List[str]) -> None:
+        self._classes = classes
+
+    def _clone_styles_from(self, source: Stylable) -> None:
+        """
+        copy the styles and the classes of another element
+        @param source:
+        """
+        self._styles = deepcopy(source._styles) if source._styles else None
+        self._classes = list(source._classes) if source._classes else None
+
+    def get_styles(self) -> Sequence[Mapping[str, str]]:
+        """
+        read the styles without creating the style list
+        @return: the styles, which should not be modified
+        """
+        return self._styles if self._styles is not None else ()
+
+    def get_classes(self) -> Sequence[str]:
+        """
+        read the classes without creating the class list
+        @return: the classes, which should not be modified
+        """
+        return self._classes if self._classes is not None else ()
+
 
 _T = TypeVar('_T', bound=Comparable)
 
 
+class InsertionOrderedSet(collections.abc.MutableSet, Generic[_T]):
+    """
+    A set that iterates in insertion order, backed by the keys of a dict.
+    The `str` and `repr` are the same as the ones of `set`.
+    """
+    __slots__ = ('_items',)
+
+    def __init__(self, items: Iterable[_T] = ()):
+        self._items: Dict[_T, None] = dict.fromkeys(items)
+
+    def __contains__(self, item: object) -> bool:
+        return item in self._items
+
+    def __iter__(self) -> Iterator[_T]:
+        return iter(self._items)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: _T) -> None:
+        self._items[item] = None
+
+    def discard(self, item: _T) -> None:
+        self._items.pop(item, None)
+
+    def remove(self, item: _T) -> None:
+        del self._items[item]
+
+    def pop(self) -> _T:
+        """
+        @return: the last added item
+        @raise KeyError: if the set is empty
+        """
+        try:
+            return self._items.popitem()[0]
+        except KeyError:
+            raise KeyError('pop from an empty set') from None
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def __str__(self) -> str:
+        return '{%s}' % ', '.join(map(repr, self._items)) if self._items else 'set()'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    def _repr_parts(self) -> Iterable[_T]:
+        """
+        @return: the objects shown in the repr, which the tracer uses to tell whether the repr changes
+        """
+        return self._items
+
+
 class ElementSet(Generic[_T]):
     def __init__(self, elements: Iterable[_T], element_type: Type[_T]):
         """
-        Element set base class
+        Element set base class. Besides the element set itself, two hash indexes
+        keyed by `identity` and by `cy_id` are kept so that lookups are O(1).
+        The elements are iterated in the order they are added, so that the same
+        cyjs gives the same iteration order, and the same traces, in every process.
         @param elements:
         @param element_type:
         """
-        self.elements: Set[_T] = set()
+        self.elements: InsertionOrderedSet[_T] = InsertionOrderedSet()
         self.element_type: Type[_T] = element_type
+        self._identity_index: Dict[Union[str, int], _T] = {}
+        self._cy_id_index: Dict[str, _T] = {}
         if isinstance(elements, Iterable) and all(isinstance(element, self.element_type) for element in elements):
-            self.elements.update(elements)
+            self._add_elements(elements)
         else:
             raise KeyError('elements are not all %s type' % self.element_type)
 
+    def _add_elements(self, elements: Iterable[_T]) -> None:
+        """
+        add elements to the set and the indexes. Elements that are equal to
+        a stored element are ignored, the same as `set.update`
+        @param elements:
+        """
+        for element in elements:
+            if element not in self.elements:
+                self.elements.add(element)
+                self._identity_index[element.identity] = element
+                self._cy_id_index[element.cy_id] = element
+
+    def _remove_elements(self, elements: Iterable[_T]) -> None:
+        """
+        remove elements from the set and the indexes
+        @param elements:
+        @raise KeyError: if an element is not in the set
+        """
+        for element in elements:
+            self.elements.remove(element)
+            # the stored element can be a different (but equal) instance with another cy_id
+            stored_element = self._identity_index.pop(element.identity)
+            self._cy_id_index.pop(stored_element.cy_id, None)
+
     def is_empty(self) -> bool:
         """returns a boolean value indicating if the set is empty"""
         return len(self.elements) == 0
@@ -223,19 +435,22 @@ class ElementSet(Generic[_T]):
         @param identity:
         @return:
         """
-        for element in self.elements:
-            if element.identity == identity:
-                return element
+        return self._identity_index.get(identity, None)
 
-        return None
+    def get_by_cy_id(self, cy_id: str) -> Optional[_T]:
+        """
+        get an element by its cy_id, which is the id used in the cyjs json
+        @param cy_id:
+        @return: the element or None
+        """
+        return self._cy_id_index.get(cy_id, None)
 
     def __iter__(self) -> Generator[_T, None, None]:
         """
         iterator that goes through the elements in the set
         @return:
         """
-        for element in self.elements:
-            yield element
+        yield from self.elements
 
     def __contains__(self, item: Union[str, _T]) -> bool:
         """
@@ -243,11 +458,11 @@ class ElementSet(Generic[_T]):
         @param item:
         @return:
         """
-        if isinstance(item, self.element_type):
-            return item in self.elements
         if isinstance(item, str):
             # TODO what about searches for names?
-            return any(element.identity == item for element in self.elements)
+            return item in self._identity_index
+        if isinstance(item, self.element_type):
+            return item in self.elements
         return False
 
     def __str__(self) -> str:
@@ -255,3 +470,9 @@ class ElementSet(Generic[_T]):
 
     def __repr__(self) -> str:
         return self.__str__()
+
+    def _repr_parts(self) -> Sequence[InsertionOrderedSet[_T]]:
+        """
+        @return: the objects shown in the repr, which the tracer uses to tell whether the repr changes
+        """
+        return self.elements,
@@ -1,16 +1,19 @@
 from __future__ import annotations
-from typing import Iterable, Tuple, Mapping, Union
+from typing import Iterable, Tuple, Mapping, Union, Dict, Optional, List
+import collections.abc
 from collections import namedtuple
 
 from .Base import Comparable, HasProperty, Stylable, ElementSet
-from .Errors import GraphJsonFormatError
+from .Errors import GraphJsonPositionError, InvalidIdentityError
 from .Node import Node
 
-NodeTuple = namedtuple('Edge', ('u', 'v'))
+NodeTuple = namedtuple('NodeTuple', ('u', 'v'))
 EdgeIDTuple = namedtuple('edge_identities', ('incident_edge_identity', 'final_edge_identity'))
 
 
 class Edge(Comparable, HasProperty, Stylable):
+    __slots__ = Comparable._SLOTS + HasProperty._SLOTS + Stylable._SLOTS + ('node_pair', 'directed')
+
     _PREFIX = 'e'
 
     default_directed_styles = []
@@ -34,14 +37,27 @@ class Edge(Comparable, HasProperty, Stylable):
             self, [*styles, *(self.default_directed_styles if directed else ())], classes,
             add_default_styles=add_default_styles, add_default_classes=add_default_classes
         )
-        if isinstance(node_pair, NodeTuple):
-            self.node_pair: NodeTuple = node_pair
-        if isinstance(node_pair, Tuple) and all(isinstance(node, Node) for node in node_pair):
-            self.node_pair: NodeTuple = NodeTuple(*node_pair)
+        if isinstance(node_pair, tuple) and all(isinstance(node, Node) for node in node_pair):
+            self.node_pair: NodeTuple = node_pair if isinstance(node_pair, NodeTuple) else NodeTuple(*node_pair)
         else:
             raise KeyError('%s is not a tuple or contains non-node element' % str(node_pair))
         self.directed: bool = directed
 
+    def clone(self, node_pair: Union[NodeTuple, Tuple[Node, Node]] = None) -> Edge:
+        """
+        make a copy-on-write clone which has the same identity and cy_id as this edge,
+        see `Node.clone`
+        @param node_pair: the nodes of the clone, which are the nodes of this edge by default
+        @return: the clone
+        """
+        edge = type(self).__new__(type(self))
+        edge._clone_identity_from(self)
+        edge._clone_properties_from(self)
+        edge._clone_styles_from(self)
+        edge.node_pair = self.node_pair if node_pair is None else NodeTuple(*node_pair)
+        edge.directed = self.directed
+        return edge
+
     def get_nodes(self) -> Tuple[Node, Node]:
         """
         get the node pairs in this edge
@@ -76,7 +92,7 @@ class Edge(Comparable, HasProperty, Stylable):
         @return:
         """
         if self.is_directed():
-            self.node_pair = self.node_pair[::-1]
+            self.node_pair = NodeTuple(self.node_pair[1], self.node_pair[0])
 
     def __contains__(self, item: Union[Node, str]):
         """
@@ -114,6 +130,12 @@ class Edge(Comparable, HasProperty, Stylable):
     def __repr__(self):
         return self.__str__()
 
+    def _repr_parts(self) -> NodeTuple:
+        """
+        @return: the objects shown in the repr, which the tracer uses to tell whether the repr changes
+        """
+        return self.node_pair
+
     @staticmethod
     def return_edge(identity: str = None, edge: Union[Edge, NodeTuple, Tuple[str, str]] = (),
                     styles: Iterable[Mapping] = (), classes: Iterable[str] = ()) -> Edge:
@@ -152,43 +174,78 @@ class EdgeSet(ElementSet[Edge]):
         @return: created edge set
         @raise ValueError: if the data is invalid
         """
-        stored_edges = {}
-
-        all_has_id = all('id' in edge['data'] for edge in edges)
-        all_has_name = all('name' in edge['data'] for edge in edges)
-
-        if not (all_has_id or all_has_name) or (all_has_name and not all_has_id):
-            raise GraphJsonFormatError('All Edge entry must contain `name` and `id` fields or only `id` fields.')
-
+        builder = EdgeSetBuilder(ids_node_instance_mapping)
         for edge in edges:
-            if not (isinstance(edge, Mapping) and 'data' in edge):
-                raise GraphJsonFormatError(f'invalid format for Edge {edge}')
+            builder.add(edge)
+        return builder.build()
 
-            data_field = edge['data']
-            id_str = data_field['id']
 
-            if all_has_name:
-                name = data_field['name']
-            else:
-                name = id_str
+class EdgeSetBuilder:
+    """
+    Build an edge set from cyjs edge entries in one pass, the same way as `NodeSetBuilder`.
+    """
+    def __init__(self, ids_node_instance_mapping: Mapping[str, Node]):
+        """
+        @param ids_node_instance_mapping: the nodes that the edges refer to by their cyjs ids
+        """
+        self.mapping: Dict[str, Edge] = {}
+        self._ids_node_instance_mapping = ids_node_instance_mapping
+        self._named_edges: Optional[List[Tuple[Edge, str]]] = []
+        self._position = 0
 
-            if not ('source' in data_field and 'target' in data_field):
-                raise GraphJsonFormatError(f'The edge {edge} entry must contain `source` and `target` fields')
+    def add(self, entry: Mapping) -> Edge:
+        """
+        check an edge entry and create its edge
+        @param entry:
+        @return: the created edge
+        @raise GraphJsonPositionError: if the entry is invalid or refers to an unknown node
+        """
+        path = f'edges[{self._position}]'
+        if not (isinstance(entry, collections.abc.Mapping) and isinstance(entry.get('data'), collections.abc.Mapping)):
+            raise GraphJsonPositionError(f'invalid format for Edge {entry}', path)
+
+        data_field = entry['data']
+        if 'id' not in data_field:
+            raise GraphJsonPositionError('All Edge entry must contain `name` and `id` fields or only `id` fields.',
+                                         path)
+        id_str = data_field['id']
+
+        if not ('source' in data_field and 'target' in data_field):
+            raise GraphJsonPositionError(f'The edge {entry} entry must contain `source` and `target` fields', path)
+
+        try:
+            source_node = self._ids_node_instance_mapping[data_field['source']]
+            target_node = self._ids_node_instance_mapping[data_field['target']]
+        except (KeyError, TypeError) as e:
+            raise GraphJsonPositionError(f'The edge {id_str} refers to an unknown node {e}', path)
+
+        stored_edge = Edge(id_str, NodeTuple(source_node, target_node))
+        stored_edge.cy_id = id_str
+
+        if self._named_edges is not None:
+            if 'name' in data_field:
+                self._named_edges.append((stored_edge, data_field['name']))
+            else:
+                self._named_edges = None
 
-            source_node = ids_node_instance_mapping[data_field['source']]
-            target_node = ids_node_instance_mapping[data_field['target']]
-            stored_edge = Edge(name,
-                               NodeTuple(
-                                   source_node,
-                                   target_node
-                               ))
-            stored_edge.cy_id = id_str
-            if 'displayed' in data_field:
-                stored_edge.update_properties(data_field['displayed'])
+        if 'displayed' in data_field:
+            stored_edge.update_properties(data_field['displayed'])
 
-            stored_edges[stored_edge.cy_id] = stored_edge
+        self.mapping[id_str] = stored_edge
+        self._position += 1
+        return stored_edge
 
-        return EdgeSet(stored_edges.values()), stored_edges
+    def build(self) -> Tuple[EdgeSet, Mapping]:
+        """
+        @return: the edge set and the mapping from the cyjs ids to the edges
+        @raise InvalidIdentityError: if a name cannot be used as an identity
+        """
+        if self._named_edges:
+            for edge, name in self._named_edges:
+                if not Edge.identity_validator(name):
+                    raise InvalidIdentityError
+                edge.identity = name
+        return EdgeSet(self.mapping.values()), self.mapping
 
 
 class MutableEdgeSet(EdgeSet):
@@ -199,11 +256,10 @@ class MutableEdgeSet(EdgeSet):
         if not all(isinstance(edge, self.element_type) for edge in edges):
             raise TypeError(f'Mutable Edge Set only accepts {self.element_type}')
 
-        self.elements.update(edges)
+        self._add_elements(edges)
 
     def remove_edge(self, *edges: Edge) -> None:
         if not all(isinstance(edge, self.element_type) for edge in edges):
             raise TypeError(f'Mutable Edge Set only accepts {self.element_type}')
 
-        for edge in edges:
-            self.elements.remove(edge)
+        self._remove_elements(edges)
@@ -12,3 +12,21 @@ class InvalidStyleCollectionError(ValueError):
 
 class InvalidClassCollectionError(ValueError):
     pass
+
+
+class GraphJsonPositionError(GraphJsonFormatError):
+    """
+    format error that points to where it is found in the graph json
+    """
+    def __init__(self, msg: str, path: str = None, offset: int = None):
+        """
+        @param msg: the error message
+        @param path: the path to the json value, like `elements.nodes[3]`
+        @param offset: the offset of the json value in the document, if it is known
+        """
+        position = ', '.join(part for part in (path and f'at {path}',
+                                               offset is not None and f'offset {offset}') if part)
+        super().__init__(f'{msg} ({position})' if position else msg)
+        self.msg = msg
+        self.path = path
+        self.offset = offset
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+from array import array
+from collections import deque
+from itertools import accumulate, chain
+from operator import attrgetter
+from typing import Iterable, Iterator, List, Sequence, Tuple, Union, TYPE_CHECKING
+
+from .Node import Node
+from .Edge import Edge, NodeTuple
+
+if TYPE_CHECKING:
+    from .Graph import Graph
+
+# signed 64 bit typecode, which is large enough for any index
+_INDEX_TYPECODE = 'q'
+
+# the attributes pickled for each element in the order `_restore_node` and `_restore_edge` read them,
+# `node_pair` is restored from the endpoint ids, and the properties are pickled as a dict of their own
+_NODE_FIELDS = ('identity', '_name', 'cy_id', '_styles', '_classes')
+_EDGE_FIELDS = _NODE_FIELDS + ('directed',)
+
+
+def _build_csr(rows: Sequence[List[int]]) -> Tuple[array, array]:
+    """
+    build compressed sparse rows from per row lists
+    @param rows: the column lists of each row
+    @return: offsets and columns
+    """
+    offsets = array(_INDEX_TYPECODE, accumulate(map(len, rows), initial=0))
+    columns = array(_INDEX_TYPECODE, chain.from_iterable(rows))
+    return offsets, columns
+
+
+def _restore_node(cls: type, fields: tuple, properties: dict) -> Node:
+    node = cls.__new__(cls)
+    node.identity, node._name, node.cy_id, node._styles, node._classes = fields
+    node._properties = properties or None
+    node._properties_shared = False
+    node._hash_cache = None
+    return node
+
+
+def _restore_edge(cls: type, fields: tuple, properties: dict, node_pair: NodeTuple) -> Edge:
+    edge = cls.__new__(cls)
+    edge.identity, edge._name, edge.cy_id, edge._styles, edge._classes, edge.directed = fields
+    edge._properties = properties or None
+    edge._properties_shared = False
+    edge.node_pair = node_pair
+    edge._hash_cache = None
+    return edge
+
+
+class FrozenGraph:
+    """
+    Immutable snapshot of a graph, made by `Graph.freeze`.
+
+    Nodes and edges are numbered by their positions in `nodes` and `edges`. The
+    adjacency is stored as compressed sparse rows in flat `array` buffers:
+    the incidence rows list every edge connected to a node regardless of its
+    direction, and the successor rows only follow directed edges forwards.
+    The `*_ids` methods work with the integer ids, the other ones map them back
+    to the original `Node` and `Edge` objects.
+    """
+    __slots__ = ('_nodes', '_edges', '_node_ids', '_endpoint_ids',
+                 '_offsets', '_neighbor_ids', '_incident_edge_ids',
+                 '_successor_offsets', '_successor_ids', '_successor_edge_ids')
+
+    def __init__(self, nodes: Iterable[Node], edges: Iterable[Edge]):
+        """
+        create a snapshot from nodes and edges
+        @param nodes:
+        @param edges:
+        @raise ValueError: if an edge is connected to a node that is not given
+        """
+        nodes = tuple(nodes)
+        edges = tuple(edges)
+        node_ids = {node.identity: node_id for node_id, node in enumerate(nodes)}
+
+        neighbor_rows = [[] for _ in nodes]
+        incident_edge_rows = [[] for _ in nodes]
+        successor_rows = [[] for _ in nodes]
+        successor_edge_rows = [[] for _ in nodes]
+        endpoint_ids = array(_INDEX_TYPECODE)
+        for edge_id, edge in enumerate(edges):
+            source, target = edge.node_pair
+            try:
+                source_id, target_id = node_ids[source.identity], node_ids[target.identity]
+            except KeyError:
+                raise ValueError(f'Cannot freeze the graph since {edge} has a node that is not in the graph')
+            endpoint_ids.append(source_id)
+            endpoint_ids.append(target_id)
+            neighbor_rows[source_id].append(target_id)
+            incident_edge_rows[source_id].append(edge_id)
+            successor_rows[source_id].append(target_id)
+            successor_edge_rows[source_id].append(edge_id)
+            if target_id != source_id:
+                neighbor_rows[target_id].append(source_id)
+                incident_edge_rows[target_id].append(edge_id)
+                if not edge.directed:
+                    successor_rows[target_id].append(source_id)
+                    successor_edge_rows[target_id].append(edge_id)
+
+        offsets, neighbor_ids = _build_csr(neighbor_rows)
+        _, incident_edge_ids = _build_csr(incident_edge_rows)
+        successor_offsets, successor_ids = _build_csr(successor_rows)
+        _, successor_edge_ids = _build_csr(successor_edge_rows)
+
+        set_attribute = super().__setattr__
+        set_attribute('_nodes', nodes)
+        set_attribute('_edges', edges)
+        set_attribute('_node_ids', node_ids)
+        set_attribute('_endpoint_ids', endpoint_ids)
+        set_attribute('_offsets', offsets)
+        set_attribute('_neighbor_ids', neighbor_ids)
+        set_attribute('_incident_edge_ids', incident_edge_ids)
+        set_attribute('_successor_offsets', successor_offsets)
+        set_attribute('_successor_ids', successor_ids)
+        set_attribute('_successor_edge_ids', successor_edge_ids)
+
+    @classmethod
+    def from_graph(cls, graph: Graph) -> FrozenGraph:
+        return cls(graph.nodes, graph.edges)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __delattr__(self, item):
+        raise AttributeError(f'{type(self).__name__} is immutable')
+
+    def __getstate__(self) -> tuple:
+        # slotted objects pickle slowly through `copyreg`, so the elements are
+        # flattened into tuples of their attributes and rebuilt when unpickling
+        get_node_fields, get_edge_fields = attrgetter(*_NODE_FIELDS), attrgetter(*_EDGE_FIELDS)
+        # the elements sharing their properties get a dict each, which they can write to
+        return (tuple((type(node), get_node_fields(node), dict(node.get_properties())) for node in self._nodes),
+                tuple((type(edge), get_edge_fields(edge), dict(edge.get_properties())) for edge in self._edges),
+                self._endpoint_ids,
+                self._offsets, self._neighbor_ids, self._incident_edge_ids,
+                self._successor_offsets, self._successor_ids, self._successor_edge_ids)
+
+    def __setstate__(self, state: tuple) -> None:
+        node_states, edge_states, endpoint_ids, *csr = state
+
+        nodes = tuple(_restore_node(cls, fields, properties) for cls, fields, properties in node_states)
+        edges = tuple(_restore_edge(cls, fields, properties, NodeTuple(nodes[endpoint_ids[2 * edge_id]],
+                                                                       nodes[endpoint_ids[2 * edge_id + 1]]))
+                      for edge_id, (cls, fields, properties) in enumerate(edge_states))
+
+        set_attribute = super().__setattr__
+        set_attribute('_nodes', nodes)
+        set_attribute('_edges', edges)
+        set_attribute('_node_ids', {node.identity: node_id for node_id, node in enumerate(nodes)})
+        set_attribute('_endpoint_ids', endpoint_ids)
+        for name, value in zip(('_offsets', '_neighbor_ids', '_incident_edge_ids',
+                                '_successor_offsets', '_successor_ids', '_successor_edge_ids'), csr):
+            set_attribute(name, value)
+
+    @property
+    def nodes(self) -> Tuple[Node, ...]:
+        return self._nodes
+
+    @property
+    def edges(self) -> Tuple[Edge, ...]:
+        return self._edges
+
+    @property
+    def V(self) -> Tuple[Node, ...]:
+        return self._nodes
+
+    @property
+    def E(self) -> Tuple[Edge, ...]:
+        return self._edges
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def __iter__(self) -> Iterator[Node]:
+        return iter(self._nodes)
+
+    def __contains__(self, item) -> bool:
+        if isinstance(item, Node):
+            return item.identity in self._node_ids
+        if isinstance(item, Edge):
+            return item in self._edges
+        return False
+
+    def __str__(self) -> str:
+        return f'FrozenGraph(nodes={len(self._nodes)}, edges={len(self._edges)})'
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+    # integer id interface
+
+    def node_id(self, node: Union[str, Node]) -> int:
+        """
+        get the integer id of a node
+        @param node: a Node instance or the identity of a node
+        @return: the id
+        @raise KeyError: if the node is not in the snapshot
+        """
+        return self._node_ids[node.identity if isinstance(node, Node) else node]
+
+    def node_of(self, node_id: int) -> Node:
+        return self._nodes[node_id]
+
+    def edge_of(self, edge_id: int) -> Edge:
+        return self._edges[edge_id]
+
+    def endpoint_ids_of(self, edge_id: int) -> Tuple[int, int]:
+        """
+        @param edge_id:
+        @return: the ids of the incident node and the final node of the edge
+        """
+        return self._endpoint_ids[2 * edge_id], self._endpoint_ids[2 * edge_id + 1]
+
+    def degree_of(self, node_id: int) -> int:
+        """
+        @param node_id:
+        @return: the number of edges connected to the node, a self loop is counted once
+        """
+        return self._offsets[node_id + 1] - self._offsets[node_id]
+
+    def neighbor_ids(self, node_id: int) -> memoryview:
+        """
+        get the ids of the nodes on the other end of each incident edge.
+        Parallel edges give the same id more than once.
+        @param node_id:
+        @return: a read-only view of the neighbor buffer
+        """
+        return memoryview(self._neighbor_ids)[self._offsets[node_id]:self._offsets[node_id + 1]].toreadonly()
+
+    def incident_edge_ids(self, node_id: int) -> memoryview:
+        """
+        @param node_id:
+        @return: a read-only view of the ids of the incident edges, in the same order as `neighbor_ids`
+        """
+        return memoryview(self._incident_edge_ids)[self._offsets[node_id]:self._offsets[node_id + 1]].toreadonly()
+
+    def successor_ids(self, node_id: int) -> memoryview:
+        """
+        get the ids of the nodes reachable through one edge, following directed edges forwards only
+        @param node_id:
+        @return: a read-only view of the successor buffer
+        """
+        start, end = self._successor_offsets[node_id], self._successor_offsets[node_id + 1]
+        return memoryview(self._successor_ids)[start:end].toreadonly()
+
+    def successor_edge_ids(self, node_id: int) -> memoryview:
+        """
+        @param node_id:
+        @return: a read-only view of the ids of the edges used by `successor_ids`, in the same order
+        """
+        start, end = self._successor_offsets[node_id], self._successor_offsets[node_id + 1]
+        return memoryview(self._successor_edge_ids)[start:end].toreadonly()
+
+    def bfs_ids(self, source_id: int) -> List[int]:
+        """
+        breadth first search that follows `successor_ids`
+        @param source_id:
+        @return: the visited node ids in visiting order
+        """
+        offsets, successors = self._successor_offsets, self._successor_ids
+        visited = bytearray(len(self._nodes))
+        visited[source_id] = 1
+        order = [source_id]
+        queue = deque(order)
+        while queue:
+            node_id = queue.popleft()
+            for successor_id in successors[offsets[node_id]:offsets[node_id + 1]]:
+                if not visited[successor_id]:
+                    visited[successor_id] = 1
+                    order.append(successor_id)
+                    queue.append(successor_id)
+        return order
+
+    def dfs_ids(self, source_id: int) -> List[int]:
+        """
+        depth first search that follows `successor_ids`
+        @param source_id:
+        @return: the visited node ids in preorder
+        """
+        offsets, successors = self._successor_offsets, self._successor_ids
+        visited = bytearray(len(self._nodes))
+        order = []
+        stack = [source_id]
+        while stack:
+            node_id = stack.pop()
+            if visited[node_id]:
+                continue
+            visited[node_id] = 1
+            order.append(node_id)
+            # push in reverse so that the successors are visited in their stored order
+            stack.extend(successor_id for successor_id in reversed(successors[offsets[node_id]:offsets[node_id + 1]])
+                         if not visited[successor_id])
+        return order
+
+    # object interface, which has the same meaning as the one on `Graph`
+
+    def degree(self, node: Union[str, Node]) -> int:
+        return self.degree_of(self.node_id(node))
+
+    def neighbors(self, node: Union[str, Node]) -> List[Node]:
+        nodes = self._nodes
+        return [nodes[neighbor_id] for neighbor_id in dict.fromkeys(self.neighbor_ids(self.node_id(node)))]
+
+    def incident_edges(self, node: Union[str, Node]) -> List[Edge]:
+        edges = self._edges
+        return [edges[edge_id] for edge_id in self.incident_edge_ids(self.node_id(node))]
+
+    def successors(self, node: Union[str, Node]) -> List[Node]:
+        nodes = self._nodes
+        return [nodes[successor_id] for successor_id in dict.fromkeys(self.successor_ids(self.node_id(node)))]
+
+    def bfs(self, source: Union[str, Node]) -> List[Node]:
+        nodes = self._nodes
+        return [nodes[node_id] for node_id in self.bfs_ids(self.node_id(source))]
+
+    def dfs(self, source: Union[str, Node]) -> List[Node]:
+        nodes = self._nodes
+        return [nodes[node_id] for node_id in self.dfs_ids(self.node_id(source))]
@@ -3,9 +3,12 @@ from .Base import Stylable
 from .Errors import GraphJsonFormatError
 from .Node import Node, NodeSet, MutableNodeSet
 from .Edge import Edge, EdgeSet, MutableEdgeSet, NodeTuple, EdgeIDTuple
+from .FrozenGraph import FrozenGraph
+from .stream_parser import CyjsSource, parse_cyjs
 
 import json
-from typing import Iterable, Union, Optional, Mapping, Type, TypeVar, Generic, Tuple
+from typing import Iterable, Union, Optional, Mapping, Type, TypeVar, Generic, Tuple, Dict, List, Iterator, TextIO, \
+    FrozenSet
 from enum import Enum
 
 
@@ -77,6 +80,59 @@ class Graph(Stylable, Generic[_Node_C, _Edge_C]):
 
         self.high_light_classes = []
 
+        # endpoints -> edges, built by the first endpoint query. The key ignores the direction,
+        # so reversing an edge does not move it, and the direction is checked by the queries
+        self._endpoint_index: Optional[Dict[FrozenSet[Node], Dict[Edge, None]]] = None
+
+        # node -> incident edges, the inner dict is used as an insertion ordered set
+        self._incidence: Dict[Node, Dict[Edge, None]] = {}
+        for edge in self.edges:
+            self._index_edge(edge)
+
+    def _index_edge(self, edge: Edge) -> None:
+        """
+        add an edge to the adjacency index
+        @param edge:
+        """
+        incident_node, final_node = edge.node_pair
+        self._incidence.setdefault(incident_node, {})[edge] = None
+        if final_node != incident_node:
+            self._incidence.setdefault(final_node, {})[edge] = None
+        if self._endpoint_index is not None:
+            self._endpoint_index.setdefault(frozenset(edge.node_pair), {})[edge] = None
+
+    def _unindex_edge(self, edge: Edge) -> None:
+        """
+        remove an edge from the adjacency index
+        @param edge:
+        """
+        for node in edge.node_pair:
+            incident_edges = self._incidence.get(node, None)
+            if incident_edges is not None:
+                incident_edges.pop(edge, None)
+                if not incident_edges:
+                    del self._incidence[node]
+        if self._endpoint_index is not None:
+            endpoints = frozenset(edge.node_pair)
+            parallel_edges = self._endpoint_index.get(endpoints, None)
+            if parallel_edges is not None:
+                parallel_edges.pop(edge, None)
+                if not parallel_edges:
+                    del self._endpoint_index[endpoints]
+
+    def _get_incidence(self, node: Union[str, Node]) -> Mapping[Edge, None]:
+        if isinstance(node, str):
+            node = self.nodes[node]
+        return self._incidence.get(node, {})
+
+    def _get_parallel_edges(self, node_1: Node, node_2: Node) -> Mapping[Edge, None]:
+        if self._endpoint_index is None:
+            endpoint_index = {}
+            for edge in self.edges:
+                endpoint_index.setdefault(frozenset(edge.node_pair), {})[edge] = None
+            self._endpoint_index = endpoint_index
+        return self._endpoint_index.get(frozenset((node_1, node_2)), {})
+
     def get_node(self, node_id: str) -> Optional[Node]:
         """
         get a node by the node id
@@ -109,6 +165,113 @@ class Graph(Stylable, Generic[_Node_C, _Edge_C]):
         """
         return edge in self.edges
 
+    def get_edges_between(self, incident_node: Union[str, Node], final_node: Union[str, Node]) -> List[Edge]:
+        """
+        get the edges from a node to another node, including the parallel edges. An undirected
+        edge matches both orders of its nodes and a directed edge only matches its direction.
+        @param incident_node: a Node instance or the id of a node
+        @param final_node: a Node instance or the id of a node
+        @return: the list of edges, which is empty if either node is not in the graph
+        """
+        if isinstance(incident_node, str):
+            incident_node = self.nodes[incident_node]
+        if isinstance(final_node, str):
+            final_node = self.nodes[final_node]
+        return [edge for edge in self._get_parallel_edges(incident_node, final_node)
+                if not edge.directed or edge.get_incident_node() == incident_node]
+
+    def has_edge_between(self, incident_node: Union[str, Node], final_node: Union[str, Node]) -> bool:
+        """
+        Check if there is an edge from a node to another node, see `get_edges_between`
+        @param incident_node: a Node instance or the id of a node
+        @param final_node: a Node instance or the id of a node
+        @return: boolean indicating the result
+        """
+        if isinstance(incident_node, str):
+            incident_node = self.nodes[incident_node]
+        if isinstance(final_node, str):
+            final_node = self.nodes[final_node]
+        return any(not edge.directed or edge.get_incident_node() == incident_node
+                   for edge in self._get_parallel_edges(incident_node, final_node))
+
+    def incident_edges(self, node: Union[str, Node]) -> List[Edge]:
+        """
+        get the edges that are connected to a node, regardless of their directions
+        @param node: a Node instance or the id of a node
+        @return: the list of incident edges, which is empty if the node is not in the graph
+        """
+        return list(self._get_incidence(node))
+
+    def neighbors(self, node: Union[str, Node]) -> List[Node]:
+        """
+        get the nodes that share an edge with a node, regardless of the edge directions
+        @param node: a Node instance or the id of a node
+        @return: the list of neighbors without duplicates
+        """
+        if isinstance(node, str):
+            node = self.nodes[node]
+        neighbors = {}
+        for edge in self._get_incidence(node):
+            incident_node, final_node = edge.node_pair
+            neighbors[final_node if incident_node == node else incident_node] = None
+        return list(neighbors)
+
+    def degree(self, node: Union[str, Node]) -> int:
+        """
+        get the number of edges connected to a node. A self loop is counted once,
+        which is the same as counting the edges for which `node in edge` holds.
+        @param node: a Node instance or the id of a node
+        @return: the degree of the node
+        """
+        return len(self._get_incidence(node))
+
+    def in_edges(self, node: Union[str, Node]) -> List[Edge]:
+        """
+        get the directed edges pointing to a node
+        @param node: a Node instance or the id of a node
+        @return: the list of directed edges whose final node is the given node
+        """
+        if isinstance(node, str):
+            node = self.nodes[node]
+        return [edge for edge in self._get_incidence(node) if edge.directed and edge.get_final_node() == node]
+
+    def out_edges(self, node: Union[str, Node]) -> List[Edge]:
+        """
+        get the directed edges starting from a node
+        @param node: a Node instance or the id of a node
+        @return: the list of directed edges whose incident node is the given node
+        """
+        if isinstance(node, str):
+            node = self.nodes[node]
+        return [edge for edge in self._get_incidence(node) if edge.directed and edge.get_incident_node() == node]
+
+    def clone(self) -> Graph:
+        """
+        make a copy-on-write clone of the graph, whose nodes and edges are cloned by
+        `Node.clone` and `Edge.clone`. Changing the clone does not change this graph.
+        @return: the clone
+        """
+        node_clones = {node: node.clone() for node in self.nodes}
+        edge_clones = [edge.clone(NodeTuple(node_clones[edge.get_incident_node()], node_clones[edge.get_final_node()]))
+                       for edge in self.edges]
+
+        graph = type(self).__new__(type(self))
+        Graph.__init__(graph, node_clones.values(), edge_clones,
+                       node_container=type(self.nodes), edge_container=type(self.edges),
+                       add_default_styles=False, add_default_classes=False)
+        graph._clone_styles_from(self)
+        graph.layout = self.layout
+        graph.high_light_classes = list(self.high_light_classes)
+        return graph
+
+    def freeze(self) -> FrozenGraph:
+        """
+        take an immutable snapshot of the graph for read-only algorithms.
+        Later changes to this graph are not reflected in the snapshot.
+        @return: the snapshot
+        """
+        return FrozenGraph.from_graph(self)
+
     def empty(self) -> bool:
         return len(self.nodes) == 0
 
@@ -131,7 +294,7 @@ class Graph(Stylable, Generic[_Node_C, _Edge_C]):
             print('Wrong layout name. Nothing is changed. Please use GraphLayout Enum.')
 
     @staticmethod
-    def graph_generator(graph_json: Union[str, Mapping] = '') -> 'Graph':
+    def graph_generator(graph_json: Union[CyjsSource, Mapping] = '') -> 'Graph':
         """
         generate a graph instance from json
         template:
@@ -158,46 +321,36 @@ class Graph(Stylable, Generic[_Node_C, _Edge_C]):
             style: [ { selector: '***', style: {'label': 'data(id)', ...}, ... ]
         }
 
-        @param graph_json:
+        @param graph_json: a decoded json object, or a json string, utf-8 bytes or a text/binary file,
+                           which are parsed in one pass without decoding the whole document
         @return: a graph instance built from the given json
+        @raise GraphJsonFormatError: on the first format error found
         """
-        # TODO this is not try enough, cut the json loading
-        if isinstance(graph_json, str):
-            try:
-                graph_dict = json.loads(graph_json)
-                # TODO do not support json5
-            except TypeError as e:
-                raise GraphJsonFormatError(e)
-            except json.JSONDecodeError as e:
-                raise GraphJsonFormatError('Please check the json format. '
-                                           'The other json format is not supported for now. '
-                                           f'Error: {e}')
-        elif isinstance(graph_json, Mapping):
-            graph_dict = graph_json
-        else:
-            raise GraphJsonFormatError('The graph json must be a json string or a json object')
-
-        if 'elements' in graph_dict:
-            element_dict = graph_dict['elements']
-            layout_dict = graph_dict.get('layout', None)
-            layout_name = GraphLayout(layout_dict) if layout_dict else GraphLayout.fcose
-            if isinstance(element_dict, Mapping):
-                parsed_node_set = []
-                parsed_edge_set = []
-                node_ids_instance_mapping = {}
-
-                if 'nodes' in element_dict:
-                    parsed_node_set, node_ids_instance_mapping = NodeSet.generate_node_set(element_dict['nodes'])
-
-                if 'edges' in element_dict:
-                    parsed_edge_set, edge_ids_instance_mapping = EdgeSet.generate_edge_set(element_dict['edges'],
-                                                                                           node_ids_instance_mapping)
-
-                g = Graph(parsed_node_set, parsed_edge_set)
-                g.set_layout(layout_name)
-                return g
+        if isinstance(graph_json, Mapping):
+            if 'elements' not in graph_json:
+                raise GraphJsonFormatError('malformed json file')
+
+            element_dict = graph_json['elements']
+            layout_dict = graph_json.get('layout', None)
+            if not isinstance(element_dict, Mapping):
+                raise GraphJsonFormatError('The `elements` field must be an object')
+
+            parsed_node_set = []
+            parsed_edge_set = []
+            node_ids_instance_mapping = {}
+
+            if 'nodes' in element_dict:
+                parsed_node_set, node_ids_instance_mapping = NodeSet.generate_node_set(element_dict['nodes'])
+
+            if 'edges' in element_dict:
+                parsed_edge_set, _ = EdgeSet.generate_edge_set(element_dict['edges'], node_ids_instance_mapping)
         else:
-            raise GraphJsonFormatError('malformed json file')
+            parsed_node_set, parsed_edge_set, layout_dict = parse_cyjs(graph_json)
+
+        layout_name = GraphLayout(layout_dict) if layout_dict else GraphLayout.fcose
+        g = Graph(parsed_node_set, parsed_edge_set)
+        g.set_layout(layout_name)
+        return g
 
 
 class MutableGraph(Graph):
@@ -214,54 +367,147 @@ class MutableGraph(Graph):
         self.nodes.add_node(node)
         return node
 
-    def add_edge(self,
-                 identity: str = None,
-                 edge: Union[Edge, NodeTuple, Tuple[Node, Node], EdgeIDTuple, Tuple[str, str]] = (),
-                 styles: Union[str, Iterable[Mapping]] = (), classes: Iterable[str] = (),
-                 add_default_styles: bool = False, add_default_classes: bool = False) -> Optional[Edge]:
+    def add_nodes_from(self, nodes: Iterable[Union[str, Node]]) -> List[Node]:
+        """
+        add a batch of nodes
+        @param nodes: Node instances or the identities of new nodes
+        @return: the added nodes
+        @raise TypeError: if an element is neither a node nor an identity, in which case nothing is added
+        """
+        nodes = [Node.return_node(node) for node in nodes]
+        self.nodes.add_node(*nodes)
+        return nodes
+
+    def _resolve_edge(self,
+                      identity: str = None,
+                      edge: Union[Edge, NodeTuple, Tuple[Node, Node], EdgeIDTuple, Tuple[str, str]] = (),
+                      styles: Union[str, Iterable[Mapping]] = (), classes: Iterable[str] = (),
+                      add_default_styles: bool = False, add_default_classes: bool = False) -> Edge:
+        """
+        turn the arguments of `add_edge` into an edge whose nodes are in the graph
+        @return: the edge
+        @raise ValueError: if the nodes of the edge are not in the graph
+        @raise TypeError: if the edge is given in an unknown form
+        """
         if isinstance(edge, Edge):
-            n1, n2 = edge.get_nodes()
-            if not self.has_node(n1) and not self.has_node(n2):
+            if not all(self.has_node(node) for node in edge.get_nodes()):
                 raise ValueError(f'You need to add nodes first. Unresolved node in {edge}')
-            edge = edge
-        elif isinstance(edge, NodeTuple) or (isinstance(edge, Tuple) and all(isinstance(ele, Node) for ele in edge)):
+        elif isinstance(edge, NodeTuple) or (isinstance(edge, tuple) and all(isinstance(ele, Node) for ele in edge)):
             if not all(self.has_node(ele) for ele in edge):
                 raise ValueError(f'You need to add nodes first. Unresolved node in {edge}')
             edge = Edge(identity, edge, styles=styles, classes=classes,
                         add_default_styles=add_default_styles, add_default_classes=add_default_classes)
-        elif isinstance(edge, EdgeIDTuple) or (isinstance(edge, Tuple) and all(isinstance(ele, str) for ele in edge)):
+        elif isinstance(edge, EdgeIDTuple) or (isinstance(edge, tuple) and all(isinstance(ele, str) for ele in edge)):
             node_pair = self.get_node(edge[0]), self.get_node(edge[1])
             edge = Edge(identity, node_pair, styles=styles, classes=classes,
                         add_default_styles=add_default_styles, add_default_classes=add_default_classes)
         else:
             raise TypeError('Invalid Type')
+        return edge
 
-        self.edges.add_edge(edge)
+    def add_edge(self,
+                 identity: str = None,
+                 edge: Union[Edge, NodeTuple, Tuple[Node, Node], EdgeIDTuple, Tuple[str, str]] = (),
+                 styles: Union[str, Iterable[Mapping]] = (), classes: Iterable[str] = (),
+                 add_default_styles: bool = False, add_default_classes: bool = False) -> Optional[Edge]:
+        edge = self._resolve_edge(identity, edge, styles=styles, classes=classes,
+                                  add_default_styles=add_default_styles, add_default_classes=add_default_classes)
+        if edge not in self.edges:
+            self.edges.add_edge(edge)
+            self._index_edge(edge)
         return edge
 
+    def add_edges_from(self, edges: Iterable[Union[Edge, Tuple[str, tuple]]]) -> List[Edge]:
+        """
+        add a batch of edges. The whole batch is checked before any edge is added.
+        @param edges: Edge instances or `(identity, node pair)` tuples, where the node pair
+                      takes the same forms as in `add_edge`
+        @return: the added edges, including the ones that are already in the graph
+        @raise ValueError: if the nodes of an edge are not in the graph, in which case nothing is added
+        @raise TypeError: if an edge is given in an unknown form, in which case nothing is added
+        """
+        edges = [self._resolve_edge(edge=edge) if isinstance(edge, Edge) else self._resolve_edge(*edge)
+                 for edge in edges]
+        # keep the first one of the edges with the same identity, like `add_edge` does
+        new_edges = [edge for edge in dict.fromkeys(edges) if edge not in self.edges]
+
+        self.edges.add_edge(*new_edges)
+        for edge in new_edges:
+            self._index_edge(edge)
+        return edges
+
     def remove_node(self, identity: Union[str, Node], with_edge: bool = False) -> bool:
-        node = Node.return_node(identity)
-        related_edges = [edge for edge in self.edges if node in edge]
+        return self.remove_nodes_from((identity,), with_edge=with_edge)
+
+    def remove_nodes_from(self, nodes: Iterable[Union[str, Node]], with_edge: bool = False) -> bool:
+        """
+        remove a batch of nodes, which costs O(degree) for each node
+        @param nodes: Node instances or the identities of the nodes
+        @param with_edge: whether to remove the edges connected to the nodes too.
+                          If not, nothing is removed when some of the nodes have edges.
+        @return: whether the nodes are removed
+        @raise KeyError: if a node is not in the graph, in which case nothing is removed
+        """
+        # a node listed twice is removed once
+        nodes = list(dict.fromkeys(Node.return_node(node) for node in nodes))
+        missing_nodes = [node for node in nodes if node not in self.nodes]
+        if missing_nodes:
+            raise KeyError(f'There are no nodes {missing_nodes} in the graph')
+
+        related_edges = {}
+        for node in nodes:
+            related_edges.update(self._incidence.get(node, {}))
         if related_edges:
             if not with_edge:
                 return False
-            self.edges.remove_edge(*related_edges)
+            self._remove_stored_edges(related_edges)
 
-        self.nodes.remove_node(node)
+        self.nodes.remove_node(*nodes)
         return True
 
     def remove_edge(self, identity: Union[str, Edge]) -> bool:
-        # TODO it's a little messy here
-        if isinstance(identity, Edge):
-            edge = Edge.return_edge(edge=identity)
-        else:
-            edge = Edge.return_edge(identity=identity)
+        return self.remove_edges_from((identity,))
 
-        self.edges.remove_edge(edge)
+    def remove_edges_from(self, edges: Iterable[Union[str, Edge]]) -> bool:
+        """
+        remove a batch of edges
+        @param edges: Edge instances or the identities of the edges
+        @return: whether the edges are removed
+        @raise KeyError: if an edge is not in the graph, in which case nothing is removed
+        """
+        # the stored instances hold the node pairs that are indexed
+        stored_edges = {}
+        for edge in edges:
+            stored_edge = self.get_edge(edge.identity if isinstance(edge, Edge) else edge)
+            if stored_edge is None:
+                raise KeyError(f'There is no edge with identity {edge}')
+            stored_edges[stored_edge] = None
+
+        self._remove_stored_edges(stored_edges)
         return True
 
+    def _remove_stored_edges(self, edges: Iterable[Edge]) -> None:
+        self.edges.remove_edge(*edges)
+        for edge in edges:
+            self._unindex_edge(edge)
+
     def generate_json(self, indent: int = None) -> str:
         return json.dumps(self, indent=indent, cls=MutableGraph.GraphObjectEncoder)
 
     def generate_json_object(self) -> dict:
-        return json.loads(self.generate_json())
+        return MutableGraph.GraphObjectEncoder.return_graph_object(self)
+
+    def iter_json(self, batch_size: int = 1024) -> Iterator[str]:
+        """
+        @param batch_size: the number of nodes or edges in each chunk
+        @return: the chunks of `generate_json()`, without building the whole string
+        """
+        return MutableGraph.GraphObjectEncoder.iter_graph_encoding(self, batch_size)
+
+    def dump_json(self, fp: TextIO, batch_size: int = 1024) -> None:
+        """
+        write the json of the graph into a text file, or anything with a `write` method
+        @param fp:
+        @param batch_size: the number of nodes or edges written at a time
+        """
+        MutableGraph.GraphObjectEncoder.dump_graph(self, fp, batch_size)
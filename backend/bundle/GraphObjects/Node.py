@@ -1,15 +1,21 @@
 from __future__ import annotations
 
+import collections.abc
 import warnings
 
 from .Base import Comparable, HasProperty, Stylable, ElementSet
-from typing import Iterable, Mapping, Union, Tuple
+from typing import Iterable, Mapping, Union, Tuple, Dict, Optional, List
 
-from .Errors import GraphJsonFormatError
+from .Errors import GraphJsonPositionError, InvalidIdentityError
 
 
 class Node(Comparable, HasProperty, Stylable):
+    __slots__ = Comparable._SLOTS + HasProperty._SLOTS + Stylable._SLOTS
+
     _PREFIX = 'v'
+    # the repr only shows the identity, which never changes since it is hashed.
+    # The tracer does not check the repr again if it is the same node
+    _STABLE_REPR = True
 
     def __init__(self, identity: str, name: str = None,
                  styles: Union[str, Iterable[Mapping]] = (), classes: Iterable[str] = (),
@@ -28,6 +34,18 @@ class Node(Comparable, HasProperty, Stylable):
             add_default_styles=add_default_styles, add_default_classes=add_default_classes
         )
 
+    def clone(self) -> Node:
+        """
+        make a copy-on-write clone which has the same identity and cy_id as this node.
+        Changing the clone does not change this node and the other way around.
+        @return: the clone
+        """
+        node = type(self).__new__(type(self))
+        node._clone_identity_from(self)
+        node._clone_properties_from(self)
+        node._clone_styles_from(self)
+        return node
+
     def __str__(self):
         return 'Node(%s)' % self.identity
 
@@ -56,37 +74,79 @@ class NodeSet(ElementSet[Node]):
 
     @staticmethod
     def generate_node_set(nodes: Iterable[Mapping]) -> Tuple[NodeSet, Mapping]:
-        stored_nodes = {}
-        all_has_id = all('id' in edge['data'] for edge in nodes)
-        all_has_name = all('name' in edge['data'] for edge in nodes)
+        """
+        generate a node set by a given list of node entries (from cyjs)
+        @param nodes:
+        @return: created node set and the mapping from the cyjs ids to the nodes
+        @raise GraphJsonFormatError: if the data is invalid
+        """
+        builder = NodeSetBuilder()
+        for node in nodes:
+            builder.add(node)
+        return builder.build()
 
-        if not (all_has_id or all_has_name) or (all_has_name and not all_has_id):
-            raise GraphJsonFormatError('All Node entry must contain `name` and `id` fields or only `id` fields.')
 
-        for node in nodes:
-            if not (isinstance(node, Mapping) and 'data' in node):
-                raise GraphJsonFormatError(f'invalid format for Node {node}')
+class NodeSetBuilder:
+    """
+    Build a node set from cyjs node entries in one pass.
 
-            data_field = node['data']
-            id_str = data_field['id']
+    The entries are checked and turned into nodes as they are added. The `name` of the
+    entries is only used as the identity when every entry has one, which is not known
+    until the last entry, so the nodes are created with their `id` first and renamed
+    in `build`.
+    """
+    def __init__(self):
+        self.mapping: Dict[str, Node] = {}
+        self._named_nodes: Optional[List[Tuple[Node, str]]] = []
+        self._position = 0
 
-            if all_has_name:
-                name = data_field['name']
+    def add(self, entry: Mapping) -> Node:
+        """
+        check a node entry and create its node
+        @param entry:
+        @return: the created node
+        @raise GraphJsonPositionError: if the entry is invalid
+        """
+        path = f'nodes[{self._position}]'
+        if not (isinstance(entry, collections.abc.Mapping) and isinstance(entry.get('data'), collections.abc.Mapping)):
+            raise GraphJsonPositionError(f'invalid format for Node {entry}', path)
+
+        data_field = entry['data']
+        if 'id' not in data_field:
+            raise GraphJsonPositionError('All Node entry must contain `name` and `id` fields or only `id` fields.',
+                                         path)
+        id_str = data_field['id']
+
+        stored_node = Node(id_str)
+        stored_node.cy_id = id_str
+
+        if self._named_nodes is not None:
+            if 'name' in data_field:
+                self._named_nodes.append((stored_node, data_field['name']))
             else:
-                name = id_str
-
-            stored_node = Node(name)
-            stored_node.cy_id = id_str
+                self._named_nodes = None
 
-            if 'displayed' in data_field:
-                stored_node.update_properties(data_field['displayed'])
+        if 'displayed' in data_field:
+            stored_node.update_properties(data_field['displayed'])
 
-            if name in stored_nodes:
-                warnings.warn('Detected Duplicated Node in the graph.')
+        if id_str in self.mapping:
+            warnings.warn('Detected Duplicated Node in the graph.')
 
-            stored_nodes[stored_node.cy_id] = stored_node
+        self.mapping[id_str] = stored_node
+        self._position += 1
+        return stored_node
 
-        return NodeSet(stored_nodes.values()), stored_nodes
+    def build(self) -> Tuple[NodeSet, Mapping]:
+        """
+        @return: the node set and the mapping from the cyjs ids to the nodes
+        @raise InvalidIdentityError: if a name cannot be used as an identity
+        """
+        if self._named_nodes:
+            for node, name in self._named_nodes:
+                if not Node.identity_validator(name):
+                    raise InvalidIdentityError
+                node.identity = name
+        return NodeSet(self.mapping.values()), self.mapping
 
 
 class MutableNodeSet(NodeSet):
@@ -97,11 +157,10 @@ class MutableNodeSet(NodeSet):
         if not all(isinstance(node, self.element_type) for node in nodes):
             raise TypeError(f'The Mutable Node Set Only Accept {self.element_type}')
 
-        self.elements.update(nodes)
+        self._add_elements(nodes)
 
     def remove_node(self, *nodes: Node):
         if not all(isinstance(node, self.element_type) for node in nodes):
             raise TypeError(f'The Mutable Node Set Only Accept {self.element_type}')
 
-        for node in nodes:
-            self.elements.remove(node)
+        self._remove_elements(nodes)
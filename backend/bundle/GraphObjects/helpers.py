@@ -1,6 +1,6 @@
 from __future__ import annotations
 import json
-from typing import Any, List
+from typing import Any, List, Iterator, Iterable, Callable, TextIO
 
 from .Base import HasProperty
 from .Node import Node, NodeSet
@@ -10,11 +10,147 @@ from .Graph import Graph
 # TODO add default styles
 default_directed_styles: dict = {}
 
+# the types that `json.loads(json.dumps(value))` gives back unchanged
+_JSON_SCALAR_TYPES = frozenset((str, int, float, bool, type(None)))
+
+
+class _NotJsonNative(Exception):
+    pass
+
+
+def _copy_json_native(value: Any) -> Any:
+    value_type = type(value)
+    if value_type in _JSON_SCALAR_TYPES:
+        return value
+    if value_type is dict:
+        copied = {}
+        for key, item in value.items():
+            if type(key) is not str:
+                raise _NotJsonNative
+            copied[key] = _copy_json_native(item)
+        return copied
+    if value_type is list or value_type is tuple:
+        return [_copy_json_native(item) for item in value]
+    raise _NotJsonNative
+
 
 class GraphObjectEncoder(json.JSONEncoder):
+    # the `return_*_object` methods build the same dict as `json.loads(json.dumps(obj, cls=GraphObjectEncoder))`
+    # without going through a json string, and `iter_graph_encoding` streams the json string of a graph
+    # element by element
+
+    @classmethod
+    def to_json_object(cls, value: Any) -> Any:
+        """
+        copy a value as if it is dumped to json and loaded back. Plain dicts, lists and scalars
+        are copied directly and the other values take the round trip.
+        @param value:
+        @return: the copy
+        @raise TypeError: if the value cannot be encoded
+        """
+        try:
+            return _copy_json_native(value)
+        except (_NotJsonNative, RecursionError):
+            return json.loads(json.dumps(value, cls=cls))
+
+    @classmethod
+    def displayed_object(cls, obj: HasProperty) -> dict:
+        properties = obj.get_properties()
+        if all(type(value) in _JSON_SCALAR_TYPES for value in properties.values()) and \
+                all(type(key) is str for key in properties):
+            return dict(properties)
+        return cls.to_json_object(dict(properties))
+
+    @classmethod
+    def return_node_object(cls, node: Node) -> dict:
+        name = node.identity
+        return {
+            'data': {
+                'id': node.cy_id,
+                'name': name if type(name) in _JSON_SCALAR_TYPES else cls.to_json_object(name),
+                'displayed': cls.displayed_object(node)
+            },
+            'style': [cls.to_json_object(node.get_styles())],
+        }
+
+    @classmethod
+    def return_edge_object(cls, edge: Edge) -> dict:
+        name = edge.identity
+        return {
+            'data': {
+                'id': edge.cy_id,
+                'name': name if type(name) in _JSON_SCALAR_TYPES else cls.to_json_object(name),
+                'source': edge.get_incident_node().cy_id,
+                'target': edge.get_final_node().cy_id,
+                'displayed': cls.displayed_object(edge)
+            },
+            'style': [
+                cls.to_json_object(edge.get_styles()),
+                cls.to_json_object(default_directed_styles) if edge.directed else {}
+            ]
+        }
+
+    @classmethod
+    def return_graph_object(cls, graph: Graph) -> dict:
+        """
+        @param graph:
+        @return: the cyjs dict of the graph, which shares nothing with the graph
+        """
+        return {
+            'elements': {
+                'nodes': [cls.return_node_object(node) for node in graph.V],
+                'edges': [cls.return_edge_object(edge) for edge in graph.E]
+            },
+            'style': cls.to_json_object(graph.get_styles()),
+            'layout': cls.to_json_object(graph.layout)
+        }
+
+    @classmethod
+    def _iter_element_chunks(cls, encode: Callable[[Any], str], elements: Iterable,
+                             return_encoding: Callable[[Any], dict], batch_size: int) -> Iterator[str]:
+        batch = []
+        separator = ''
+        for element in elements:
+            batch.append(return_encoding(element))
+            if len(batch) >= batch_size:
+                # a batch is encoded as one list, whose brackets are then cut off
+                yield separator + encode(batch)[1:-1]
+                separator = ', '
+                batch.clear()
+        if batch:
+            yield separator + encode(batch)[1:-1]
+
+    @classmethod
+    def iter_graph_encoding(cls, graph: Graph, batch_size: int = 1024) -> Iterator[str]:
+        """
+        encode a graph into json chunks, so that the whole string is never held in memory.
+        The joined chunks are the same as `json.dumps(graph, cls=GraphObjectEncoder)`.
+        @param graph:
+        @param batch_size: the number of nodes or edges in each chunk
+        @return: the chunks
+        """
+        encode = cls().encode
+
+        yield '{"elements": {"nodes": ['
+        yield from cls._iter_element_chunks(encode, graph.V, cls.return_node_encoding, batch_size)
+        yield '], "edges": ['
+        yield from cls._iter_element_chunks(encode, graph.E, cls.return_edge_encoding, batch_size)
+        yield f']}}, "style": {encode([*graph.get_styles()])}, "layout": {encode(graph.layout)}}}'
+
+    @classmethod
+    def dump_graph(cls, graph: Graph, fp: TextIO, batch_size: int = 1024) -> None:
+        """
+        write the json of a graph into a text file, or anything with a `write` method
+        @param graph:
+        @param fp:
+        @param batch_size: the number of nodes or edges written at a time
+        """
+        for chunk in cls.iter_graph_encoding(graph, batch_size):
+            fp.write(chunk)
+
     @classmethod
     def displayed_encoding_added(cls, encoded: dict, obj: HasProperty) -> dict:
-        encoded['data']['displayed'] = obj.properties
+        encoded['data']['displayed'] = dict(obj.get_properties())
         return encoded
 
     @classmethod
@@ -25,7 +161,7 @@ class GraphObjectEncoder(json.JSONEncoder):
                     'id': node.cy_id,
                     'name': node.identity
                 },
-                'style': [node.styles],
+                'style': [list(node.get_styles())],
             },
             node
         )
@@ -41,7 +177,7 @@ class GraphObjectEncoder(json.JSONEncoder):
                     'target': edge.get_final_node().cy_id
                 },
                 'style': [
-                    edge.styles,
+                    list(edge.get_styles()),
                     default_directed_styles if edge.directed else {}
                 ]
             },
@@ -64,7 +200,7 @@ class GraphObjectEncoder(json.JSONEncoder):
                 'edges': cls.return_edge_set_encoding(graph.E)
             },
             'style': [
-                *graph.styles
+                *graph.get_styles()
             ],
             'layout': graph.layout
         }
@@ -0,0 +1,325 @@
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Iterator, Iterable, Optional, Mapping, Tuple, Union, IO, List, Any
+
+from .Errors import GraphJsonFormatError, GraphJsonPositionError
+from .Node import NodeSet, NodeSetBuilder
+from .Edge import EdgeSet, EdgeSetBuilder
+
+CyjsSource = Union[str, bytes, bytearray, IO]
+
+_CHUNK_SIZE = 1 << 16
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _iter_text_chunks(source: CyjsSource, chunk_size: int) -> Iterator[str]:
+    """
+    split a source into text chunks, decoding bytes as utf-8 on the way
+    @param source: a string, a bytes object or a text/binary file
+    @param chunk_size:
+    @return: the chunks
+    @raise GraphJsonFormatError: if the source is not supported
+    """
+    if isinstance(source, str):
+        # the whole string is already in memory, cutting it would only copy it
+        yield source
+        return
+
+    if isinstance(source, (bytes, bytearray)):
+        view = memoryview(source)
+        read = (lambda position: view[position:position + chunk_size])
+        chunks = (read(position) for position in range(0, len(source), chunk_size))
+    elif hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        raise GraphJsonFormatError('The graph json must be a json string, bytes or a file')
+
+    decoder = None
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            yield chunk
+            continue
+        if decoder is None:
+            # `utf-8-sig` also drops the byte order mark that some editors add
+            decoder = codecs.getincrementaldecoder('utf-8-sig')()
+        try:
+            yield decoder.decode(chunk)
+        except UnicodeDecodeError as e:
+            raise GraphJsonFormatError(f'The graph json is not valid utf-8. Error: {e}')
+    if decoder is not None:
+        try:
+            yield decoder.decode(b'', final=True)
+        except UnicodeDecodeError as e:
+            raise GraphJsonFormatError(f'The graph json is not valid utf-8. Error: {e}')
+
+
+class CyjsStreamParser:
+    """
+    Single pass parser for cyjs documents.
+
+    The document is read in chunks. Only the structure of the top level object and
+    of `elements` is walked by hand; every node and edge entry is decoded on its own
+    with `json.JSONDecoder.raw_decode` and handed to `NodeSetBuilder` or `EdgeSetBuilder`
+    right away, so the whole document is never decoded into one dict. The other fields,
+    like `style`, are decoded and thrown away, except for `layout`.
+    """
+    def __init__(self, source: CyjsSource, chunk_size: int = _CHUNK_SIZE):
+        """
+        @param source: a json string, utf-8 bytes or a text/binary file
+        @param chunk_size: the number of characters or bytes read at a time
+        """
+        self._chunks = _iter_text_chunks(source, chunk_size)
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        # the offset of `_buffer[0]` in the document
+        self._buffer_offset = 0
+        self._exhausted = False
+
+    @property
+    def offset(self) -> int:
+        """
+        @return: the offset of the parser in the document
+        """
+        return self._buffer_offset + self._pos
+
+    def _read_more(self) -> bool:
+        """
+        append at least as much text as the buffer holds, so that a value that
+        keeps failing to decode is retried a logarithmic number of times
+        @return: whether anything is read
+        """
+        if self._exhausted:
+            return False
+
+        if self._pos:
+            self._buffer_offset += self._pos
+            self._buffer = self._buffer[self._pos:]
+            self._pos = 0
+
+        wanted = max(len(self._buffer), 1)
+        chunks = []
+        size = 0
+        for chunk in self._chunks:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= wanted:
+                break
+        else:
+            self._exhausted = True
+
+        if not size:
+            return False
+        self._buffer += ''.join(chunks)
+        return True
+
+    def _peek(self) -> str:
+        """
+        skip the whitespaces
+        @return: the next character, or an empty string at the end of the document
+        """
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ''
+
+    def _expect(self, char: str, path: str) -> None:
+        if self._peek() != char:
+            raise GraphJsonPositionError(f'Expecting {char!r}', path, self.offset)
+        self._pos += 1
+
+    def _decode_value(self, path: str) -> Tuple[Any, int]:
+        """
+        decode the next json value
+        @param path: the path of the value, used in error messages
+        @return: the value and its offset in the document
+        @raise GraphJsonPositionError: if the value is invalid
+        """
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError as e:
+                error_offset = self._buffer_offset + e.pos
+                # the value may be cut by the end of the buffer
+                if self._read_more():
+                    continue
+                raise GraphJsonPositionError(f'Invalid json: {e.msg}', path, error_offset) from None
+
+            # a number at the end of the buffer may go on in the next chunk
+            if end == len(self._buffer) and self._read_more():
+                continue
+
+            offset = self.offset
+            self._pos = end
+            return value, offset
+
+    def _iter_object(self, path: str) -> Iterator[str]:
+        """
+        walk through an object. The value of each yielded key must be consumed before
+        the next iteration.
+        @param path:
+        @return: the keys
+        """
+        self._expect('{', path)
+        if self._peek() == '}':
+            self._pos += 1
+            return
+
+        while True:
+            key, offset = self._decode_value(path)
+            if not isinstance(key, str):
+                raise GraphJsonPositionError('Expecting property name enclosed in double quotes', path, offset)
+            self._expect(':', path)
+            yield key
+
+            char = self._peek()
+            self._pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise GraphJsonPositionError("Expecting ',' delimiter", path, self.offset - 1)
+
+    def _iter_array(self, path: str) -> Iterator[int]:
+        """
+        walk through an array. The value of each yielded index must be consumed before
+        the next iteration.
+        @param path:
+        @return: the indices
+        """
+        self._expect('[', path)
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        index = 0
+        while True:
+            yield index
+            index += 1
+
+            char = self._peek()
+            self._pos += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise GraphJsonPositionError("Expecting ',' delimiter", path, self.offset - 1)
+
+    def _iter_entries(self, path: str) -> Iterator[Tuple[int, Any, int]]:
+        """
+        walk through an array and decode its values
+        @param path:
+        @return: the index, the value and the offset of each value
+        """
+        scan_once = self._decoder.scan_once
+        for index in self._iter_array(path):
+            buffer = self._buffer
+            pos = _WHITESPACE.match(buffer, self._pos).end()
+            # most values are complete and followed by more text in the buffer,
+            # which can be decoded without the checks in `_decode_value`
+            try:
+                value, end = scan_once(buffer, pos)
+            except (StopIteration, json.JSONDecodeError):
+                # let `_decode_value` read more or report the error
+                end = len(buffer)
+
+            if end < len(buffer):
+                self._pos = end
+                yield index, value, self._buffer_offset + pos
+            else:
+                value, offset = self._decode_value(f'{path}[{index}]')
+                yield index, value, offset
+
+    def _parse_elements(self, node_builder: NodeSetBuilder, edge_builder: EdgeSetBuilder) -> None:
+        """
+        parse the `elements` object into the builders
+        @param node_builder:
+        @param edge_builder:
+        @return:
+        """
+        # edges listed before the nodes wait until the nodes are built
+        pending_edges: Optional[List[Tuple[int, Mapping, int]]] = []
+        seen_keys = set()
+
+        for key in self._iter_object('elements'):
+            if key in ('nodes', 'edges'):
+                if key in seen_keys:
+                    self._peek()
+                    raise GraphJsonPositionError(f'Duplicate `{key}` field', f'elements.{key}', self.offset)
+                seen_keys.add(key)
+
+            if key == 'nodes':
+                for index, entry, offset in self._iter_entries('elements.nodes'):
+                    try:
+                        node_builder.add(entry)
+                    except GraphJsonPositionError as e:
+                        raise GraphJsonPositionError(e.msg, f'elements.nodes[{index}]', offset) from None
+                self._build_edges(edge_builder, pending_edges)
+                pending_edges = None
+            elif key == 'edges':
+                if pending_edges is None:
+                    self._build_edges(edge_builder, self._iter_entries('elements.edges'))
+                else:
+                    pending_edges.extend(self._iter_entries('elements.edges'))
+            else:
+                self._decode_value(f'elements.{key}')
+
+        if pending_edges:
+            self._build_edges(edge_builder, pending_edges)
+
+    @staticmethod
+    def _build_edges(edge_builder: EdgeSetBuilder, entries: Iterable[Tuple[int, Mapping, int]]) -> None:
+        for index, entry, offset in entries:
+            try:
+                edge_builder.add(entry)
+            except GraphJsonPositionError as e:
+                raise GraphJsonPositionError(e.msg, f'elements.edges[{index}]', offset) from None
+
+    def parse(self) -> Tuple[NodeSet, EdgeSet, Optional[Mapping]]:
+        """
+        parse the document
+        @return: the node set, the edge set and the `layout` field
+        @raise GraphJsonFormatError: on the first format error found
+        """
+        if self._peek() != '{':
+            raise GraphJsonPositionError('malformed json file', '$', self.offset)
+
+        node_builder = NodeSetBuilder()
+        edge_builder = EdgeSetBuilder(node_builder.mapping)
+        layout_dict = None
+        has_elements = False
+
+        for key in self._iter_object('$'):
+            if key == 'elements':
+                if self._peek() != '{':
+                    raise GraphJsonPositionError('The `elements` field must be an object', 'elements', self.offset)
+                self._parse_elements(node_builder, edge_builder)
+                has_elements = True
+            elif key == 'layout':
+                layout_dict, _ = self._decode_value('layout')
+            else:
+                self._decode_value(key)
+
+        if self._peek():
+            raise GraphJsonPositionError('Extra data', '$', self.offset)
+        if not has_elements:
+            raise GraphJsonFormatError('malformed json file')
+
+        node_set, _ = node_builder.build()
+        edge_set, _ = edge_builder.build()
+        return node_set, edge_set, layout_dict
+
+
+def parse_cyjs(source: CyjsSource, chunk_size: int = _CHUNK_SIZE) -> Tuple[NodeSet, EdgeSet, Optional[Mapping]]:
+    """
+    parse a cyjs document in one pass
+    @param source: a json string, utf-8 bytes or a text/binary file
+    @param chunk_size: the number of characters or bytes read at a time
+    @return: the node set, the edge set and the `layout` field
+    @raise GraphJsonFormatError: on the first format error found, with its position when it is known
+    """
+    return CyjsStreamParser(source, chunk_size).parse()
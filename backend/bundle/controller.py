@@ -6,7 +6,7 @@ from logging.handlers import TimedRotatingFileHandler
 from os import getenv
 from typing import Union, List, Mapping
 
-from bundle.utils.recorder import Recorder
+from bundle.utils.recorder import Recorder, DEFAULT_KEYFRAME_INTERVAL
 from bundle.utils.cache_file_helpers import CacheFolder, USER_DOCS_PATH
 from bundle.seeker import tracer
 
@@ -55,6 +55,12 @@ class _Controller:
     def get_processed_result_json(self) -> str:
         return self.recorder.get_change_list_json()
 
+    def get_delta_result(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> List[Mapping]:
+        return self.recorder.get_delta_change_list(keyframe_interval)
+
+    def get_pooled_result(self, delta: bool = False, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> Mapping:
+        return self.recorder.get_pooled_change_list(delta, keyframe_interval)
+
     def purge_records(self) -> None:
         self.recorder.purge()
 
@@ -0,0 +1,75 @@
+"""
+Execution budgets of the tracers
+
+A budget limits the recorded steps, the wall time and the estimated size of the records
+of one execution. The tracers check it at every recorded step. When any of the limits is
+reached, a truncation record is added to the recorder and `ExecutionBudgetExceeded` is
+raised in the traced code, so the execution stops with the records made so far.
+"""
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+from bundle.utils.recorder import Recorder
+
+
+class ExecutionBudgetExceeded(BaseException):
+    """
+    Raised in the traced code when the budget runs out. It is not an `Exception`,
+    so that `except Exception` in the traced code does not stop it.
+    """
+    def __init__(self, reason: str):
+        super(ExecutionBudgetExceeded, self).__init__(reason)
+        self.reason = reason
+
+
+class ExecutionBudget:
+    def __init__(self, max_steps: int = 0, max_seconds: float = 0, max_recorded_bytes: int = 0):
+        """
+        the limits of one execution. A limit of 0 means no limit
+        @param max_steps: the maximum number of records
+        @param max_seconds: the maximum wall time from `start`
+        @param max_recorded_bytes: the maximum estimated size of the records
+        """
+        self.max_steps = max_steps
+        self.max_seconds = max_seconds
+        self.max_recorded_bytes = max_recorded_bytes
+        self._deadline: Optional[float] = None
+        self.exceeded_reason: Optional[str] = None
+
+    def start(self) -> None:
+        """
+        start the clock of the wall time limit, which starts at the first check otherwise
+        """
+        self.exceeded_reason = None
+        self._deadline = time.perf_counter() + self.max_seconds if self.max_seconds else None
+
+    def check(self, recorder: Recorder) -> None:
+        """
+        check the limits before a new step is recorded
+        @param recorder: the recorder of the steps
+        @raise ExecutionBudgetExceeded: if any limit is reached, after adding a truncation record to the recorder
+        """
+        if self.exceeded_reason is None:
+            reason = self._find_exceeded_limit(recorder)
+            if reason is None:
+                return
+            self.exceeded_reason = reason
+            recorder.add_truncation_record(reason)
+        raise ExecutionBudgetExceeded(self.exceeded_reason)
+
+    def _find_exceeded_limit(self, recorder: Recorder) -> Optional[str]:
+        if self.max_steps and len(recorder.get_change_list()) >= self.max_steps:
+            return f'The execution is stopped after {self.max_steps} steps.'
+
+        if self.max_seconds:
+            if self._deadline is None:
+                self._deadline = time.perf_counter() + self.max_seconds
+            elif time.perf_counter() >= self._deadline:
+                return f'The execution is stopped after {self.max_seconds}s.'
+
+        if self.max_recorded_bytes and recorder.get_estimated_size() >= self.max_recorded_bytes:
+            return f'The execution is stopped after recording about {self.max_recorded_bytes} bytes.'
+
+        return None
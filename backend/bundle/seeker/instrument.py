@@ -0,0 +1,919 @@
+"""
+AST instrumentation engine of the tracer
+
+`sys.settrace` calls the trace function on every line, and the tracer takes a snapshot of
+the watched variables every time. This engine rewrites the functions decorated by `tracer`
+before the module is compiled instead. Every statement starts with a call to the probe of
+its function, which adds the same record `sys.settrace` would give at that line, and the
+variables are only looked at after the statements that can bind or change the watched
+ones, so that the records are the same as the ones of the `sys.settrace` tracer. The
+statements that run code of the program without binding a watched name can only change the
+objects the watched variables are bound to, which is not possible when they are local
+variables bound to immutable values.
+
+The events are emulated statement by statement, including the `line` events of the loop
+headers and the `with` exits and the `exception` events. The functions that cannot be
+emulated exactly are left as they are and traced with `sys.settrace`: generators and
+coroutines, tracers with `depth` other than 1, statements spanning several lines, one line
+`while`/`with` blocks, one line functions, `match` and `except*`, nested functions with
+decorators, comprehensions on python 3.12+, which run in the frame of the function, and on
+python 3.9 the statements compiled to nothing whose `line` event depends on the code after them,
+the `break`/`continue` statements other jumps go straight through and the jumps out of a `try`
+statement with a `finally` block.
+
+Only the records are made for the instrumented functions. The text log is not written.
+"""
+from __future__ import annotations
+
+import ast
+import copy
+import importlib.util
+import sys
+from types import CodeType, FrameType, GeneratorType, ModuleType, TracebackType
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .write_set import WriteSet, get_bound_names, get_test_write_set, get_write_set, walk_statement
+
+# the line events of python 3.8 and older are different
+INSTRUMENTATION_AVAILABLE = sys.version_info >= (3, 9)
+
+_PROBE_NAME_TEMPLATE = '__seeker_probe_{}__'
+_TRACER_NAME = 'tracer'
+_COMPREHENSIONS_INLINED = sys.version_info >= (3, 12)
+_WITH_EXIT_HAS_LINE_EVENT = sys.version_info >= (3, 10)
+# before python 3.10 an exhausted generator sets a `StopIteration` too
+_GENERATOR_EXIT_IS_EXCEPTION = sys.version_info < (3, 10)
+# before python 3.10 the statements compiled to nothing, like `pass`, only have the line
+# of the code compiled right after them, if no other statement comes first
+_EVERY_STATEMENT_HAS_LINE_EVENT = sys.version_info >= (3, 10)
+# python 3.10 and 3.11 raise the exception that entered a `finally` block again with the line of
+# the last statement of the block, which is a `line` event if the block does not end on that line
+_FINALLY_END_HAS_LINE_EVENT = (3, 10) <= sys.version_info < (3, 12)
+# python 3.11 also gives that `line` event when another exception leaves the block
+_FINALLY_CLEANUP_HAS_LINE_EVENT = sys.version_info[:2] == (3, 11)
+# python 3.10 ends the block at the `with` line of a last `with` statement, where `__exit__` is called
+_FINALLY_ENDS_AT_WITH = sys.version_info < (3, 11)
+# before python 3.10 a jump out of a `try` statement gets its line again after its `finally` block,
+# unless the block ends with a jump python sends straight to the target
+_JUMP_THROUGH_FINALLY_HAS_LINE_EVENT = sys.version_info < (3, 10)
+# before python 3.10 an exception leaving an `except ... as` handler gives a `line` event of the line
+# compiled last in the handler, where the name is deleted
+_HANDLER_CLEANUP_HAS_LINE_EVENT = sys.version_info < (3, 10)
+# python 3.10+ gives the `return` event of an exception the line that raised it last, instead of
+# the line of the last event
+_RETURN_AFTER_EXCEPTION_AT_RAISING_LINE = sys.version_info >= (3, 10)
+
+# what python 3.9 compiles right after a block: nothing, an instruction, or a jump
+_NOTHING_AFTER, _INSTRUCTION_AFTER, _JUMP_AFTER = range(3)
+
+# whether a statement can change the watched variables, or the watched names if it can only
+# change the objects they are bound to
+Changing = Union[bool, Tuple[str, ...]]
+
+# the types of the values that cannot change, besides the tuples and frozensets of such values
+_IMMUTABLE_TYPES = frozenset({int, float, complex, bool, str, bytes, type(None)})
+
+
+def get_probe_name(code: CodeType) -> str:
+    """
+    @param code: the code of an instrumented function
+    @return: the global name of the probe of the function
+    """
+    return _PROBE_NAME_TEMPLATE.format(code.co_firstlineno)
+
+
+def is_instrumented(code: CodeType) -> bool:
+    """
+    @param code:
+    @return: whether the code is of a function rewritten by this engine
+    """
+    return get_probe_name(code) in code.co_names
+
+
+class InstrumentationProbe:
+    """
+    The recording side of an instrumented function, which is a global of its module.
+    It feeds the recorder of its tracer the way `Tracer._record` does with `sys.settrace` events.
+
+    The state of every running frame is [the current line, whether a variable can have
+    changed since the last event, the reported tracebacks still in use, the line that raised last,
+    whether the next `finally` block is entered by an exception, whether each running `finally`
+    block was entered by an exception].
+    """
+    __slots__ = ('_tracer', '_thread_global', '_states')
+
+    def __init__(self, tracer, thread_global):
+        """
+        @param tracer: the tracer of the function
+        @param thread_global: the thread local shared by the tracers, which counts the depth of the calls
+        """
+        self._tracer = tracer
+        self._thread_global = thread_global
+        self._states: Dict[FrameType, list] = {}
+
+    def call(self, line_no: int) -> None:
+        frame = sys._getframe(1)
+        tracer = self._tracer
+        if tracer._budget is not None:
+            tracer._budget.check(tracer.recorder)
+        thread_global = self._thread_global
+        thread_global.depth = thread_global.__dict__.get('depth', -1) + 1
+        tracer.recorder.add_record(line_no)
+        tracer._record_variables(frame, 'call')
+        self._states[frame] = [line_no, False, (), line_no, False, []]
+
+    def line(self, line_no: int, changing: Changing = False) -> None:
+        """
+        @param line_no:
+        @param changing: whether the statement can change the watched variables, which are
+            then looked at by the next event, or the watched names if it can only change the
+            objects they are bound to
+        """
+        frame = sys._getframe(1)
+        self._line(frame, self._states[frame], line_no, changing)
+
+    def _line(self, frame: FrameType, state: list, line_no: int, changing: Changing) -> None:
+        tracer = self._tracer
+        if tracer._budget is not None:
+            tracer._budget.check(tracer.recorder)
+        tracer.recorder.add_record(line_no)
+        state[0] = line_no
+        if state[1] is True or state[1] and not _keeps_values(frame, state[1]):
+            tracer._record_variables(frame, 'line')
+        state[1] = changing
+
+    def changing(self) -> None:
+        """
+        mark a statement that has no `line` event of its own, as it is on the line of the last one
+        """
+        self._states[sys._getframe(1)][1] = True
+
+    def test(self, line_no: int, changing: Changing = False) -> bool:
+        """
+        the `line` event of the condition of a `while` loop
+        @return: True
+        """
+        frame = sys._getframe(1)
+        self._line(frame, self._states[frame], line_no, changing)
+        return True
+
+    def loop(self, line_no: int, iterable: Iterable, changing: Changing = True) -> Iterator:
+        """
+        @param line_no: the line of the `for` loop
+        @param iterable:
+        @param changing: whether taking the next item can change the watched variables
+        @return: the iterator of the loop, which gives the `line` event of the loop header
+            every time the loop goes back to it
+        """
+        frame = sys._getframe(1)
+        return _LoopIterator(self, frame, self._states[frame], line_no, iter(iterable), changing)
+
+    def handler(self, line_no: int, exception_type: Any = BaseException, changing: Changing = False) -> Any:
+        """
+        the `line` event of an `except` clause, which is checked after the `exception` event
+        @return: the exception type of the clause
+        """
+        frame = sys._getframe(1)
+        state = self._states[frame]
+        self._report_exception(frame, state)
+        self._line(frame, state, line_no, changing)
+        return exception_type
+
+    def exception(self) -> None:
+        """
+        the `exception` event of the exception that is handled, if it is new in this frame
+        """
+        frame = sys._getframe(1)
+        self._report_exception(frame, self._states[frame])
+
+    def finally_exception(self) -> None:
+        """
+        the `exception` event of the exception that runs a `finally` block
+        """
+        frame = sys._getframe(1)
+        state = self._states[frame]
+        self._report_exception(frame, state)
+        state[4] = True
+
+    def enter_finally(self) -> None:
+        state = self._states[sys._getframe(1)]
+        state[5].append(state[4])
+        state[4] = False
+
+    def end_finally(self, line_no: int, changing: Changing = False) -> None:
+        """
+        the end of a `finally` block, where python 3.10 and 3.11 raise the exception that entered it
+        again from the line of its last statement
+        @param line_no: the line of the last statement of the block
+        @param changing:
+        """
+        frame = sys._getframe(1)
+        state = self._states[frame]
+        if state[5][-1] and state[0] != line_no:
+            self._line(frame, state, line_no, changing)
+
+    def finally_raised(self, line_no: int, changing: Changing = False) -> None:
+        """
+        the `exception` event of the exception that leaves a `finally` block, followed on
+        python 3.11 by the `line` event of its last statement if the block was entered by an exception
+        @param line_no: the line of the last statement of the block
+        @param changing:
+        """
+        frame = sys._getframe(1)
+        state = self._states[frame]
+        self._report_exception(frame, state)
+        # the line only changes if the exception is not raised there
+        if state[5][-1] and state[0] != line_no:
+            self._line(frame, state, line_no, changing)
+
+    def leave_finally(self) -> None:
+        self._states[sys._getframe(1)][5].pop()
+
+    def reraise(self) -> None:
+        """
+        mark the line of a bare `raise`, which raises the exception again without a new traceback entry
+        """
+        state = self._states[sys._getframe(1)]
+        state[3] = state[0]
+
+    def propagate(self) -> None:
+        """
+        the `exception` event of the exception that leaves the function. Python 3.10+ goes back to
+        the line that raised last, from a `with` exit or a `finally` block, before the `return` event
+        """
+        frame = sys._getframe(1)
+        state = self._states[frame]
+        self._report_exception(frame, state)
+        if _RETURN_AFTER_EXCEPTION_AT_RAISING_LINE:
+            state[0] = state[3]
+
+    def _report_exception(self, frame: FrameType, state: list) -> None:
+        exception = sys.exc_info()[1]
+        traceback = exception.__traceback__ if exception is not None else None
+        # a new traceback entry is made when the exception is raised in or comes into this frame, and
+        # the exception is not raised again by a bare `raise` or at the end of a `finally` block, even
+        # after the exceptions handled in between
+        if traceback is None or traceback.tb_frame is not frame or traceback in state[2]:
+            return
+        state[2] = _get_frame_tracebacks(exception, frame)
+        state[3] = state[0]
+        self._exception_event(frame, state)
+
+    def _exception_event(self, frame: FrameType, state: list) -> None:
+        tracer = self._tracer
+        if tracer._budget is not None and tracer._budget.exceeded_reason is not None:
+            return
+        tracer.recorder.add_record(state[0])
+        if state[1] is True or state[1] and not _keeps_values(frame, state[1]):
+            tracer._record_variables(frame, 'exception')
+            state[1] = False
+
+    def leave(self) -> None:
+        """
+        the `return` event, at the line of the last event
+        """
+        frame = sys._getframe(1)
+        state = self._states.pop(frame)
+        tracer = self._tracer
+        budget = tracer._budget
+        if budget is None or budget.exceeded_reason is None:
+            recorder = tracer.recorder
+            if state[0] != recorder.get_last_record_line_number():
+                recorder.add_record(state[0])
+            if state[1] is True or state[1] and not _keeps_values(frame, state[1]):
+                tracer._record_variables(frame, 'return')
+        tracer.frame_to_local_reprs.pop(frame, None)
+        self._thread_global.depth -= 1
+
+
+class _LoopIterator:
+    __slots__ = ('_probe', '_frame', '_state', '_line_no', '_iterator', '_changing', '_started')
+
+    def __init__(self, probe: InstrumentationProbe, frame: FrameType, state: list, line_no: int, iterator: Iterator,
+                 changing: Changing):
+        self._probe = probe
+        self._frame = frame
+        self._state = state
+        self._line_no = line_no
+        self._iterator = iterator
+        self._changing = changing
+        self._started = False
+
+    def __iter__(self) -> Iterator:
+        return self
+
+    def __next__(self) -> Any:
+        if self._started:
+            self._probe._line(self._frame, self._state, self._line_no, self._changing)
+        else:
+            self._started = True
+        try:
+            return next(self._iterator)
+        except StopIteration as e:
+            traceback = e.__traceback__
+            if traceback is not None and traceback.tb_next is not None or \
+                    _GENERATOR_EXIT_IS_EXCEPTION and isinstance(self._iterator, GeneratorType):
+                # a `StopIteration` raised by a python `__next__` is an `exception` event of the loop
+                self._probe._exception_event(self._frame, self._state)
+            raise
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _get_frame_tracebacks(exception: BaseException, frame: FrameType) -> Tuple[TracebackType, ...]:
+    """
+    @param exception: the exception raised last in the frame
+    @param frame:
+    @return: the traceback entries in the frame of the exception and of the ones being handled when it was
+        raised, which can be raised again without a new entry
+    """
+    tracebacks = []
+    seen = set()
+    # a `__context__` set by hand can make a cycle
+    while exception is not None and id(exception) not in seen:
+        seen.add(id(exception))
+        traceback = exception.__traceback__
+        if traceback is not None and traceback.tb_frame is frame:
+            tracebacks.append(traceback)
+        exception = exception.__context__
+    return tuple(tracebacks)
+
+
+def _is_immutable(value: Any) -> bool:
+    value_type = type(value)
+    if value_type in _IMMUTABLE_TYPES:
+        return True
+    return (value_type is tuple or value_type is frozenset) and all(_is_immutable(item) for item in value)
+
+
+def _keeps_values(frame: FrameType, names: Tuple[str, ...]) -> bool:
+    """
+    @param frame:
+    @param names: the watched names
+    @return: whether the variables cannot change without their names being bound again, as they
+        are local variables that are not cells, bound to values that cannot change
+    """
+    code = frame.f_code
+    frame_locals = frame.f_locals
+    for name in names:
+        # the cells can be bound again by the nested functions
+        if name not in code.co_varnames or name in code.co_cellvars or \
+                not _is_immutable(frame_locals.get(name, frame_locals)):
+            return False
+    return True
+
+
+def _get_tracer_call(decorator: ast.expr) -> Optional[ast.expr]:
+    """
+    @param decorator:
+    @return: the decorator itself if it is `tracer`, `seeker.tracer` or a call of them, otherwise None
+    """
+    function = decorator.func if isinstance(decorator, ast.Call) else decorator
+    if isinstance(function, ast.Name) and function.id == _TRACER_NAME or \
+            isinstance(function, ast.Attribute) and function.attr == _TRACER_NAME:
+        return decorator
+    return None
+
+
+def _get_string_constants(node: ast.expr) -> Optional[List[str]]:
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, (ast.Tuple, ast.List)) and \
+            all(isinstance(element, ast.Constant) and isinstance(element.value, str) for element in node.elts):
+        return [element.value for element in node.elts]
+    return None
+
+
+def _get_watched_names(decorator: ast.expr) -> Optional[FrozenSet[str]]:
+    """
+    @param decorator: the `tracer` decorator
+    @return: the names the watched expressions read, or None for all of them
+    @raise _Unsupported: if the tracer is deeper than the function, or its depth is unknown
+    """
+    if not isinstance(decorator, ast.Call):
+        return frozenset()
+
+    sources = []
+    only_watch = True
+    for argument in decorator.args:
+        strings = _get_string_constants(argument)
+        if strings is None:
+            return None
+        sources.extend(strings)
+    for keyword in decorator.keywords:
+        if keyword.arg == 'depth':
+            if not (isinstance(keyword.value, ast.Constant) and keyword.value.value == 1):
+                raise _Unsupported('the tracer is deeper than the function')
+        elif keyword.arg in ('watch', 'watch_explode'):
+            strings = _get_string_constants(keyword.value)
+            if strings is None:
+                return None
+            sources.extend(strings)
+        elif keyword.arg == 'only_watch':
+            if not isinstance(keyword.value, ast.Constant):
+                return None
+            only_watch = bool(keyword.value.value)
+        elif keyword.arg is None:
+            return None
+
+    if not only_watch:
+        return None
+    names = set()
+    for source in sources:
+        try:
+            expression = ast.parse(source, mode='eval')
+        except SyntaxError:
+            return None
+        names.update(node.id for node in ast.walk(expression) if isinstance(node, ast.Name))
+    return frozenset(names)
+
+
+class _FunctionInstrumenter:
+    def __init__(self, function: ast.FunctionDef, watched: Optional[FrozenSet[str]]):
+        """
+        @param function:
+        @param watched: the names the watched variables depend on, or None for all of them
+        """
+        self.function = function
+        self.watched = watched
+        # the `changing` of the statements that can only change the objects of the watched variables
+        self._watched_names: Changing = tuple(sorted(watched)) if watched else True
+        first_line_no = min([function.lineno] + [decorator.lineno for decorator in function.decorator_list])
+        self.probe_name = _PROBE_NAME_TEMPLATE.format(first_line_no)
+        # the jump statements python 3.9 compiles to a bare jump in the current block
+        self._bare_jumps: Tuple[type, ...] = ()
+
+    def _binds_watched(self, name: str) -> bool:
+        return self.watched is None or name in self.watched
+
+    def _watches_any(self) -> bool:
+        return self.watched is None or bool(self.watched)
+
+    def _is_changing(self, *nodes: Optional[ast.AST]) -> Changing:
+        """
+        @return: whether running the nodes can bind or change a watched variable, see `write_set.py`,
+            or the watched names if they can only change the objects of the watched variables
+        """
+        return self._is_changed_by(get_write_set(*nodes), nodes)
+
+    def _is_test_changing(self, test: ast.expr) -> Changing:
+        """
+        @return: whether testing the truth value of the expression can bind or change a watched variable,
+            or the watched names if it can only change the objects of the watched variables
+        """
+        return self._is_changed_by(get_test_write_set(test), (test,))
+
+    def _is_changed_by(self, write_set: WriteSet, nodes: Iterable[Optional[ast.AST]]) -> Changing:
+        if not self._watches_any():
+            return False
+        if write_set is None:
+            # the code the nodes run cannot bind the local variables
+            return True if self._binds_any_watched(get_bound_names(*nodes)) else self._watched_names
+        return self._binds_any_watched(write_set)
+
+    def _binds_any_watched(self, names: FrozenSet[str]) -> bool:
+        return bool(names) if self.watched is None else not names.isdisjoint(self.watched)
+
+    def _probe_call(self, method: str, line_no: int, *args: ast.expr) -> ast.Call:
+        call = ast.Call(
+            func=ast.Attribute(value=ast.Name(id=self.probe_name, ctx=ast.Load()), attr=method, ctx=ast.Load()),
+            args=[ast.Constant(value=line_no), *args] if line_no else list(args),
+            keywords=[],
+        )
+        return _locate(call, line_no or self.function.lineno)
+
+    def _probe_statement(self, method: str, line_no: int, *args: ast.expr) -> ast.stmt:
+        return _locate(ast.Expr(value=self._probe_call(method, line_no, *args)), line_no or self.function.lineno)
+
+    def _line(self, line_no: int, changing: bool) -> ast.stmt:
+        return self._probe_statement('line', line_no, ast.Constant(value=changing))
+
+    def _reporting_handler(self, line_no: int, method: str = 'exception', *args: ast.expr) -> ast.ExceptHandler:
+        """
+        @return: `except BaseException: probe.<method>(*args); raise`
+        """
+        return _locate(ast.ExceptHandler(
+            type=ast.Name(id='BaseException', ctx=ast.Load()),
+            name=None,
+            body=[self._probe_statement(method, 0, *args), ast.Raise(exc=None, cause=None)],
+        ), line_no)
+
+    def instrument(self) -> None:
+        """
+        rewrite the body of the function
+        @raise _Unsupported: if the function cannot be rewritten
+        """
+        function = self.function
+        if not function.body or function.body[0].lineno == function.lineno:
+            raise _Unsupported('one line function')
+        for node in (child for statement in function.body for child in walk_statement(statement)):
+            if isinstance(node, (ast.Yield, ast.YieldFrom, ast.Await)):
+                raise _Unsupported('generator')
+            if _COMPREHENSIONS_INLINED and isinstance(node, (ast.ListComp, ast.SetComp, ast.DictComp)):
+                raise _Unsupported('inlined comprehension')
+
+        body = function.body
+        docstring = []
+        if isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) and \
+                isinstance(body[0].value.value, str):
+            docstring, body = body[:1], body[1:]
+
+        end_line_no = function.end_lineno
+        function.body = docstring + [
+            self._probe_statement('call', function.lineno),
+            _locate(ast.Try(
+                body=self._block(body, function.lineno, _INSTRUCTION_AFTER) or [_locate(ast.Pass(), end_line_no)],
+                handlers=[self._reporting_handler(end_line_no, 'propagate')],
+                orelse=[],
+                finalbody=[self._probe_statement('leave', 0)],
+            ), end_line_no),
+        ]
+
+    def _block(self, statements: List[ast.stmt], previous_line_no: Optional[int], after: int,
+               jumped_to: bool = False) -> List[ast.stmt]:
+        """
+        @param statements:
+        @param previous_line_no: the line run right before the first statement, whose line
+            has no `line` event if it is the same one
+        @param after: what python 3.9 compiles right after the block, which gets the line of
+            a last statement compiled to nothing
+        @param jumped_to: whether the block can be reached by a jump
+        """
+        result = []
+        for index, statement in enumerate(statements):
+            if not _EVERY_STATEMENT_HAS_LINE_EVENT:
+                if _compiles_to_nothing(statement) and not _has_line_event_of_next_code(statements, index, after):
+                    result.append(statement)
+                    continue
+                if jumped_to and isinstance(statement, self._bare_jumps):
+                    # python 3.9 sends the jumps to a jump straight to its target
+                    raise _Unsupported('jump reached by a jump')
+            result.extend(self._statement(statement, statement.lineno != previous_line_no))
+            previous_line_no = statement.lineno if isinstance(statement, _SIMPLE_STATEMENTS) else None
+            if not isinstance(statement, (ast.Global, ast.Nonlocal)):
+                # the compound statements jump to their end
+                jumped_to = isinstance(statement, (ast.If, ast.For, ast.While, ast.Try, ast.With))
+        return result
+
+    def _inner_block(self, statements: List[ast.stmt], previous_line_no: Optional[int], after: int,
+                     bare_jumps: Tuple[type, ...]) -> List[ast.stmt]:
+        """
+        `_block` for the body of a loop, or a block that is left through some cleanup
+        @param bare_jumps: the jump statements compiled to a bare jump in the block
+        """
+        outer_bare_jumps, self._bare_jumps = self._bare_jumps, bare_jumps
+        try:
+            return self._block(statements, previous_line_no, after)
+        finally:
+            self._bare_jumps = outer_bare_jumps
+
+    def _statement(self, statement: ast.stmt, has_line_event: bool) -> List[ast.stmt]:
+        line_no = statement.lineno
+
+        if isinstance(statement, (ast.Global, ast.Nonlocal)):
+            return [statement]
+
+        if isinstance(statement, _SIMPLE_STATEMENTS):
+            if isinstance(statement, (ast.FunctionDef, ast.ClassDef)):
+                if statement.decorator_list:
+                    raise _Unsupported('nested decorated definition')
+                end_line_no = statement.body[0].lineno - 1
+            else:
+                end_line_no = statement.end_lineno
+            if end_line_no != line_no:
+                raise _Unsupported('multi-line statement')
+            changing = self._is_changing(statement)
+            instrumented = [self._probe_statement('reraise', 0), statement] \
+                if isinstance(statement, ast.Raise) and statement.exc is None else [statement]
+            if has_line_event:
+                return [self._line(line_no, changing)] + instrumented
+            return ([self._probe_statement('changing', 0)] if changing else []) + instrumented
+
+        if not has_line_event:
+            raise _Unsupported('compound statement on the line of another one')
+
+        if isinstance(statement, ast.If):
+            _check_header(line_no, statement.test)
+            if not _EVERY_STATEMENT_HAS_LINE_EVENT and _is_constant_test(statement.test):
+                # python 3.9 only compiles the body, without the test
+                statement.body = self._block(statement.body, None, _NOTHING_AFTER)
+                statement.orelse = self._block(statement.orelse, None, _NOTHING_AFTER)
+                return [statement]
+            statement.body = self._block(statement.body, line_no, _JUMP_AFTER if statement.orelse else _NOTHING_AFTER)
+            statement.orelse = self._block(statement.orelse, line_no, _NOTHING_AFTER, jumped_to=True)
+            return [self._line(line_no, self._is_test_changing(statement.test)), statement]
+
+        if isinstance(statement, ast.For):
+            _check_header(line_no, statement.target, statement.iter)
+            # `iter` and `next` can run any code
+            changing = self._is_changing(statement.target, statement.iter)
+            statement.iter = self._probe_call('loop', line_no, statement.iter, ast.Constant(value=changing))
+            # `break` pops the iterator first
+            statement.body = self._inner_block(statement.body, line_no, _JUMP_AFTER, (ast.Continue,))
+            statement.orelse = self._block(statement.orelse, line_no, _NOTHING_AFTER)
+            return [self._line(line_no, changing), statement]
+
+        if isinstance(statement, ast.While):
+            _check_header(line_no, statement.test)
+            if statement.body[0].lineno == line_no:
+                raise _Unsupported('one line while loop')
+            if _EVERY_STATEMENT_HAS_LINE_EVENT or not _is_constant_test(statement.test):
+                changing = self._is_test_changing(statement.test)
+                statement.test = _locate(ast.BoolOp(op=ast.And(), values=[
+                    self._probe_call('test', line_no, ast.Constant(value=changing)), statement.test
+                ]), line_no)
+            statement.body = self._inner_block(statement.body, line_no, _JUMP_AFTER, (ast.Continue, ast.Break))
+            statement.orelse = self._block(statement.orelse, line_no, _NOTHING_AFTER, jumped_to=True)
+            return [statement]
+
+        if isinstance(statement, ast.With):
+            _check_header(line_no, *statement.items)
+            if statement.body[0].lineno == line_no:
+                raise _Unsupported('one line with block')
+            # so can `__enter__` and `__exit__`
+            changing = self._is_changing(*statement.items)
+            exit_changing = self._is_changed_by(None, ())
+            if _WITH_EXIT_HAS_LINE_EVENT:
+                # the `__exit__` call gives a `line` event of the `with` line, after the `exception` event
+                handler = self._reporting_handler(line_no)
+                exit_statement = self._line(line_no, exit_changing)
+            else:
+                # before python 3.10 it only gives one when an exception leaves the block, of the
+                # line compiled last in the block
+                exit_line_no = _get_last_line_no(statement.body)
+                handler = self._reporting_handler(line_no)
+                handler.body.insert(1, self._line(exit_line_no, exit_changing))
+                exit_statement = self._probe_statement('changing', 0)
+            statement.body = [_locate(ast.Try(
+                body=self._inner_block(statement.body, line_no, _INSTRUCTION_AFTER, ()),
+                handlers=[handler],
+                orelse=[],
+                finalbody=[exit_statement] if exit_changing or _WITH_EXIT_HAS_LINE_EVENT else [],
+            ), line_no)]
+            return [self._line(line_no, changing), statement]
+
+        if isinstance(statement, ast.Try):
+            blocks = [statement.body, statement.orelse] + [handler.body for handler in statement.handlers]
+            if _JUMP_THROUGH_FINALLY_HAS_LINE_EVENT and statement.finalbody and _has_jump_out(blocks):
+                raise _Unsupported('jump through a finally block')
+            statement.body = self._inner_block(statement.body, line_no, _INSTRUCTION_AFTER, ())
+            for handler in statement.handlers:
+                _check_header(handler.lineno, handler.type)
+                changing = True if handler.name is not None and self._binds_watched(handler.name) \
+                    else self._is_changing(handler.type)
+                arguments = [handler.type or ast.Name(id='BaseException', ctx=ast.Load()),
+                             ast.Constant(value=changing)]
+                handler.type = self._probe_call('handler', handler.lineno, *arguments)
+                cleanup_handlers = []
+                if handler.name is not None and _HANDLER_CLEANUP_HAS_LINE_EVENT:
+                    cleanup_handlers.append(self._reporting_handler(handler.lineno))
+                    cleanup_handlers[0].body.insert(1, self._line(_get_last_line_no(handler.body),
+                                                                  self._binds_watched(handler.name)))
+                handler.body = self._inner_block(handler.body, handler.lineno, _INSTRUCTION_AFTER, ())
+                if handler.name is not None and (cleanup_handlers or self._binds_watched(handler.name)):
+                    # the name is deleted when the handler is left
+                    handler.body = [_locate(ast.Try(
+                        body=handler.body,
+                        handlers=cleanup_handlers,
+                        orelse=[],
+                        finalbody=[self._probe_statement('changing', 0)] if self._binds_watched(handler.name) else [],
+                    ), handler.lineno)]
+            if not statement.finalbody:
+                statement.orelse = self._block(statement.orelse, None, _NOTHING_AFTER, jumped_to=True)
+            else:
+                statement.orelse = self._inner_block(statement.orelse, None, _NOTHING_AFTER, ())
+                # the exceptions of the handlers are reported before the `finally` block, which
+                # raises them again from its last line
+                inner_body = statement.body
+                if statement.handlers or statement.orelse:
+                    inner_body = [_locate(ast.Try(body=statement.body, handlers=statement.handlers,
+                                                  orelse=statement.orelse, finalbody=[]), line_no)]
+                finalbody = self._inner_block(statement.finalbody, None, _NOTHING_AFTER, ())
+                # python 3.10 and 3.11 give the line of the last statement of a `finally` block entered by
+                # an exception to the end of the block
+                last_statement = _get_finally_last_statement(statement.finalbody) \
+                    if _FINALLY_END_HAS_LINE_EVENT else None
+                reporting_method = 'exception'
+                if last_statement is not None:
+                    reporting_method = 'finally_exception'
+                    changing = self._is_test_changing(last_statement.test) \
+                        if isinstance(last_statement, ast.While) else self._is_changing(last_statement)
+                    arguments = [ast.Constant(value=last_statement.lineno), ast.Constant(value=changing)]
+                    handlers = [self._reporting_handler(line_no, 'finally_raised', *arguments)] \
+                        if _FINALLY_CLEANUP_HAS_LINE_EVENT else []
+                    finalbody = [self._probe_statement('enter_finally', 0), _locate(ast.Try(
+                        body=finalbody + [self._probe_statement('end_finally', 0, *arguments)],
+                        handlers=handlers,
+                        orelse=[],
+                        finalbody=[self._probe_statement('leave_finally', 0)],
+                    ), line_no)]
+                statement = _locate(ast.Try(
+                    body=inner_body,
+                    handlers=[self._reporting_handler(line_no, reporting_method)],
+                    orelse=[],
+                    finalbody=finalbody + [self._probe_statement('reraise', 0)],
+                ), line_no)
+            return [self._line(line_no, False), statement]
+
+        raise _Unsupported(type(statement).__name__)
+
+
+_SIMPLE_STATEMENTS = (ast.Expr, ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Delete, ast.Pass, ast.Break,
+                      ast.Continue, ast.Return, ast.Raise, ast.Assert, ast.Import, ast.ImportFrom,
+                      ast.FunctionDef, ast.ClassDef)
+
+
+def _get_last_line_no(statements: List[ast.stmt]) -> int:
+    """
+    @param statements: a block
+    @return: the line of the code compiled last in the block, by python 3.9
+    @raise _Unsupported: if the block ends with a statement whose last compiled line is not known
+    """
+    statement = statements[-1]
+    if isinstance(statement, ast.If) and _is_constant_test(statement.test):
+        return _get_last_line_no(statement.body)
+    if isinstance(statement, (ast.If, ast.For, ast.While)):
+        return _get_last_line_no(statement.orelse or statement.body)
+    if isinstance(statement, _SIMPLE_STATEMENTS) and not isinstance(statement, (ast.FunctionDef, ast.ClassDef)):
+        return statement.lineno
+    raise _Unsupported('block left by an exception ending with a compound statement')
+
+
+def _get_finally_last_statement(statements: List[ast.stmt]) -> Optional[ast.stmt]:
+    """
+    @param statements: a `finally` block
+    @return: the statement whose line python 3.10 and 3.11 give to the end of the block, or None if
+        the end has no line
+    """
+    statement = statements[-1]
+    if isinstance(statement, (ast.If, ast.For, ast.While)) and statement.orelse:
+        return _get_finally_last_statement(statement.orelse)
+    if isinstance(statement, ast.If):
+        return _get_finally_last_statement(statement.body)
+    if isinstance(statement, ast.With) and _FINALLY_ENDS_AT_WITH:
+        return statement
+    if isinstance(statement, (ast.For, ast.With, ast.Try)):
+        return None
+    # the test of a `while` loop is compiled last
+    return statement
+
+
+def _has_jump_out(blocks: List[List[ast.stmt]], loop_jumps: Tuple[type, ...] = (ast.Break, ast.Continue)) -> bool:
+    """
+    @param blocks:
+    @param loop_jumps: the jump statements that leave the blocks
+    @return: whether a `return`, or a `break` or `continue` of an outer loop, can leave the blocks
+    """
+    for statement in (statement for block in blocks for statement in block):
+        if isinstance(statement, (ast.Return, *loop_jumps)):
+            return True
+        if isinstance(statement, (ast.For, ast.While)):
+            if _has_jump_out([statement.body], ()) or _has_jump_out([statement.orelse], loop_jumps):
+                return True
+        elif isinstance(statement, (ast.If, ast.With, ast.Try)):
+            inner_blocks = [getattr(statement, field, []) for field in ('body', 'orelse', 'finalbody')]
+            inner_blocks.extend(handler.body for handler in getattr(statement, 'handlers', []))
+            if _has_jump_out(inner_blocks, loop_jumps):
+                return True
+    return False
+
+
+def _is_folded(node: ast.expr) -> bool:
+    """
+    @return: whether python folds the expression into a constant, if it can be computed
+    """
+    return all(isinstance(child, (ast.Constant, ast.UnaryOp, ast.BinOp, ast.Tuple, ast.unaryop, ast.operator,
+                                  ast.expr_context)) for child in ast.walk(node))
+
+
+def _is_constant_test(test: ast.expr) -> bool:
+    """
+    @return: whether python 3.9 compiles the test to nothing, as it is always true
+    @raise _Unsupported: if it may compile the statement to nothing, or only some of it
+    """
+    if not _is_folded(test):
+        return False
+    if isinstance(test, ast.Constant) and test.value:
+        return True
+    raise _Unsupported('constant test')
+
+
+def _compiles_to_nothing(statement: ast.stmt) -> bool:
+    """
+    @return: whether python 3.9 compiles the statement to nothing
+    @raise _Unsupported: if it may compile the statement to nothing, if the value can be computed
+    """
+    if isinstance(statement, ast.Pass):
+        return True
+    if not isinstance(statement, ast.Expr) or not _is_folded(statement.value):
+        return False
+    if isinstance(statement.value, ast.Constant):
+        return True
+    raise _Unsupported('constant expression statement')
+
+
+def _has_line_event_of_next_code(statements: List[ast.stmt], index: int, after: int) -> bool:
+    """
+    @param statements: a block
+    @param index: the index of a statement compiled to nothing by python 3.9
+    @param after: what is compiled right after the block
+    @return: whether running the statement gives its `line` event, as the code after it has its line
+    @raise _Unsupported: if the code after it can also run without the statement
+    """
+    if index < len(statements) - 1:
+        # the next statement sets its own line first
+        return False
+    if after == _INSTRUCTION_AFTER:
+        return True
+    if after == _JUMP_AFTER:
+        # the jumps of a compound statement right before it go straight to the target of that jump
+        previous_statements = [statement for statement in statements[:index] if not _compiles_to_nothing(statement)]
+        if not previous_statements or isinstance(previous_statements[-1], _SIMPLE_STATEMENTS):
+            return True
+    raise _Unsupported('statement compiled to nothing at the end of a block')
+
+
+def _check_header(line_no: int, *nodes: Optional[ast.AST]) -> None:
+    for node in nodes:
+        for child in ast.walk(node) if node is not None else ():
+            if getattr(child, 'end_lineno', line_no) != line_no or getattr(child, 'lineno', line_no) != line_no:
+                raise _Unsupported('multi-line header')
+
+
+def _locate(node: ast.AST, line_no: int) -> ast.AST:
+    """
+    give the added nodes the line of the statement they belong to
+    """
+    for child in ast.walk(node):
+        if 'lineno' in child._attributes and not hasattr(child, 'lineno'):
+            child.lineno = child.end_lineno = line_no
+            child.col_offset = child.end_col_offset = 0
+    return node
+
+
+class _ModuleInstrumenter(ast.NodeTransformer):
+    def __init__(self):
+        self.instrumented: List[str] = []
+
+    def visit_FunctionDef(self, node: ast.FunctionDef) -> ast.FunctionDef:
+        # the nested functions are rewritten first, and are plain statements of this one
+        self.generic_visit(node)
+        decorators = [_get_tracer_call(decorator) for decorator in node.decorator_list]
+        decorators = [decorator for decorator in decorators if decorator is not None]
+        if len(decorators) != 1:
+            return node
+
+        # the statements are rewritten in place, so a copy is rewritten and only kept if it is finished
+        instrumented = copy.deepcopy(node)
+        try:
+            _FunctionInstrumenter(instrumented, _get_watched_names(decorators[0])).instrument()
+        except _Unsupported:
+            return node
+        self.instrumented.append(node.name)
+        return instrumented
+
+
+def instrument_source(source: str, file_name: str = '<unknown>') -> ast.Module:
+    """
+    rewrite the functions decorated by `tracer` in the source
+    @param source:
+    @param file_name:
+    @return: the rewritten module, which is compiled with the original line numbers
+    """
+    tree = ast.parse(source, file_name)
+    if INSTRUMENTATION_AVAILABLE:
+        tree = _ModuleInstrumenter().visit(tree)
+    return ast.fix_missing_locations(tree)
+
+
+def compile_instrumented(source: str, file_name: str) -> CodeType:
+    """
+    @param source:
+    @param file_name:
+    @return: the code of the module with its traced functions instrumented
+    """
+    return compile(instrument_source(source, file_name), file_name, 'exec')
+
+
+def load_instrumented_module(module_name: str) -> ModuleType:
+    """
+    import a module with its traced functions instrumented, in place of `import_module`
+    @param module_name:
+    @return: the module, which is in `sys.modules`
+    @raise ImportError: if the module is not found
+    """
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or spec.loader is None or not hasattr(spec.loader, 'get_source'):
+        raise ImportError(f'Cannot find the source of module {module_name}', name=module_name)
+
+    code = compile_instrumented(spec.loader.get_source(module_name), spec.origin)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        exec(code, module.__dict__)
+    except BaseException:
+        sys.modules.pop(module_name, None)
+        raise
+    return module
@@ -0,0 +1,127 @@
+"""
+line tables of the traced code objects
+
+The tracer shows the source line of every event, and moves the `call` event of a
+decorated function from its first decorator to its `def` line. A line table does both
+for one code object. It is built once, when the code is registered by the tracer or
+first seen, instead of searching the source at every event, and it is shared by the
+tracers and the executions of the same code.
+"""
+from __future__ import annotations
+
+import dis
+import itertools
+import threading
+from collections import OrderedDict
+from types import CodeType
+from typing import Dict, Sequence, Tuple
+
+# the tables of the code objects that are gone are dropped after this many new ones
+MAX_LINE_TABLES = 1024
+
+
+def find_definition_line(source: Sequence[str], line_no: int) -> Tuple[int, str]:
+    """
+    find the `def` line of a call event, which starts at the decorators
+    @param source: the source lines
+    @param line_no: the line number of the call event
+    @return: the line number and the source line of the definition
+    """
+    source_line = source[line_no - 1]
+
+    # Dealing with misplaced function definition: #########################
+    #                                                                     #
+    if source_line.lstrip().startswith('@'):
+        # If a function decorator is found, skip lines until an actual
+        # function definition is found.
+        for candidate_line_no in itertools.count(line_no):
+            try:
+                candidate_source_line = source[candidate_line_no - 1]
+            except IndexError:
+                # End of source file reached without finding a function
+                # definition. Fall back to original source line.
+                break
+
+            if candidate_source_line.lstrip().startswith('def'):
+                # Found the def line!
+                return candidate_line_no, candidate_source_line
+    #                                                                     #
+    # Finished dealing with misplaced function definition. ################
+    return line_no, source_line
+
+
+class LineTable:
+    """
+    The source path, and the displayed line number and source line of every line of a code object.
+    """
+    __slots__ = ('source_path', '_source', '_lines', '_call_lines')
+
+    def __init__(self, code: CodeType, source_path: str, source: Sequence[str]):
+        """
+        @param code:
+        @param source_path:
+        @param source: the source lines of the file of the code
+        """
+        self.source_path = source_path
+        self._source = source
+        self._lines: Dict[int, str] = {}
+        for _, line_no in dis.findlinestarts(code):
+            if line_no is not None and line_no not in self._lines:
+                try:
+                    self._lines[line_no] = source[line_no - 1]
+                except IndexError:
+                    pass
+        self._call_lines: Dict[int, Tuple[int, str]] = {
+            code.co_firstlineno: find_definition_line(source, code.co_firstlineno)
+        }
+
+    def get_line(self, line_no: int) -> str:
+        """
+        @param line_no: the line number of a `line`, `return` or `exception` event
+        @return: the source line
+        """
+        try:
+            return self._lines[line_no]
+        except KeyError:
+            source_line = self._lines[line_no] = self._source[line_no - 1]
+            return source_line
+
+    def get_call_line(self, line_no: int) -> Tuple[int, str]:
+        """
+        @param line_no: the line number of a `call` event, which is the first line of the code,
+            or the line a generator is resumed at
+        @return: the displayed line number and source line
+        """
+        try:
+            return self._call_lines[line_no]
+        except KeyError:
+            call_line = self._call_lines[line_no] = find_definition_line(self._source, line_no)
+            return call_line
+
+
+_line_tables: OrderedDict[Tuple[CodeType, str], LineTable] = OrderedDict()
+_line_tables_lock = threading.Lock()
+
+
+def get_line_table(code: CodeType, source_path: str, source: Sequence[str]) -> LineTable:
+    """
+    get the line table of a code object from the shared tables. Equal code objects,
+    like the ones of the same code run again, share one table
+    @param code:
+    @param source_path:
+    @param source: the source lines of the file of the code
+    @return: the line table
+    """
+    key = (code, source_path)
+    with _line_tables_lock:
+        line_table = _line_tables.get(key, None)
+        if line_table is not None and line_table._source is source:
+            _line_tables.move_to_end(key)
+            return line_table
+
+    line_table = LineTable(code, source_path, source)
+    with _line_tables_lock:
+        _line_tables[key] = line_table
+        if len(_line_tables) > MAX_LINE_TABLES:
+            _line_tables.popitem(last=False)
+    return line_table
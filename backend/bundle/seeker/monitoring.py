@@ -0,0 +1,244 @@
+"""
+`sys.monitoring` (PEP 669) backend of the tracer
+
+`sys.settrace` makes the interpreter call the trace function on every frame of the
+program, and the frames of the libraries are thrown away by the trace function one by
+one. `sys.monitoring` lets us ask for the events of the traced code objects only.
+
+The dispatcher turns the monitoring events back into the `(frame, event, arg)` calls
+that `sys.settrace` makes, including the local trace function of every frame, so that
+`Tracer.trace` is called with exactly the same arguments in the same order as with
+`sys.settrace`, as long as the tracer only looks at the traced functions (`depth == 1`).
+"""
+from __future__ import annotations
+
+import sys
+import threading
+from types import CodeType, FrameType
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+MONITORING_AVAILABLE = hasattr(sys, 'monitoring')
+
+TraceFunction = Callable[[FrameType, str, object], Optional[Callable]]
+
+# the ids reserved for debuggers, coverage tools, profilers and optimizers are left alone
+_TOOL_IDS = (3, 4)
+_TOOL_NAME = 'graphery-seeker'
+
+
+class MonitoringDispatcher:
+    """
+    Emulates `sys.settrace` with `sys.monitoring`.
+
+    The trace functions given to `activate` work as the global trace function: they get
+    the `call` events and return the local trace function of the new frame. The other
+    events of the frame go to its local trace function, the same as `frame.f_trace`.
+    Only the code objects passed to `activate` are monitored.
+    """
+    def __init__(self):
+        self._tool_id: Optional[int] = None
+        # code -> the number of activations that monitor it
+        self._code_counts: Dict[CodeType, int] = {}
+        self._activation_count = 0
+        # frame -> local trace function, which is `frame.f_trace` in `sys.settrace`
+        self._frame_traces: Dict[FrameType, TraceFunction] = {}
+        # the stack of global trace functions of each thread, the last one is in use
+        self._thread_local = threading.local()
+        # code -> instruction offset -> line number
+        self._line_tables: Dict[CodeType, Dict[int, int]] = {}
+
+    def _get_trace_stack(self) -> List[TraceFunction]:
+        try:
+            return self._thread_local.trace_stack
+        except AttributeError:
+            stack = self._thread_local.trace_stack = []
+            return stack
+
+    def _acquire_tool_id(self) -> bool:
+        if self._tool_id is not None:
+            return True
+
+        monitoring = sys.monitoring
+        for tool_id in _TOOL_IDS:
+            try:
+                monitoring.use_tool_id(tool_id, _TOOL_NAME)
+            except ValueError:
+                continue
+
+            events = monitoring.events
+            for event, callback in ((events.PY_START, self._on_start),
+                                    (events.PY_RESUME, self._on_start),
+                                    (events.PY_THROW, self._on_throw),
+                                    (events.PY_RETURN, self._on_return),
+                                    (events.PY_YIELD, self._on_return),
+                                    (events.PY_UNWIND, self._on_unwind),
+                                    (events.LINE, self._on_line),
+                                    (events.JUMP, self._on_jump),
+                                    (events.RAISE, self._on_raise)):
+                monitoring.register_callback(tool_id, event, callback)
+            self._tool_id = tool_id
+            return True
+        return False
+
+    def activate(self, trace: TraceFunction, codes: Iterable[CodeType], frame: FrameType = None) -> bool:
+        """
+        start dispatching the events of some code objects in this thread
+        @param trace: the global trace function
+        @param codes: the code objects to monitor
+        @param frame: a running frame to trace right away, whose local trace function is `trace`
+        @return: whether the monitoring is started, which fails when all the tool ids are taken
+        """
+        if not self._acquire_tool_id():
+            return False
+
+        monitoring = sys.monitoring
+        events = monitoring.events
+        local_events = (events.PY_START | events.PY_RESUME | events.PY_RETURN | events.PY_YIELD |
+                        events.LINE | events.JUMP)
+        for code in codes:
+            count = self._code_counts.get(code, 0)
+            if not count:
+                monitoring.set_local_events(self._tool_id, code, local_events)
+            self._code_counts[code] = count + 1
+
+        if frame is not None:
+            self._frame_traces[frame] = trace
+
+        if not self._activation_count:
+            # these events cannot be monitored for single code objects
+            monitoring.set_events(self._tool_id, events.RAISE | events.PY_UNWIND | events.PY_THROW)
+        self._activation_count += 1
+
+        self._get_trace_stack().append(trace)
+        return True
+
+    def deactivate(self, codes: Iterable[CodeType], frame: FrameType = None) -> None:
+        """
+        undo the last `activate` of this thread
+        @param codes: the code objects passed to `activate`
+        @param frame: the frame passed to `activate`
+        """
+        self._get_trace_stack().pop()
+
+        monitoring = sys.monitoring
+        self._activation_count -= 1
+        if not self._activation_count:
+            monitoring.set_events(self._tool_id, 0)
+
+        if frame is not None:
+            self._frame_traces.pop(frame, None)
+
+        for code in codes:
+            count = self._code_counts[code] - 1
+            if count:
+                self._code_counts[code] = count
+            else:
+                del self._code_counts[code]
+                monitoring.set_local_events(self._tool_id, code, 0)
+
+    def _is_tracing(self) -> bool:
+        # `sys.settrace(None)` turns off the local trace functions too
+        return bool(getattr(self._thread_local, 'trace_stack', None))
+
+    def _call(self, frame: FrameType) -> None:
+        stack = self._get_trace_stack()
+        if stack:
+            local_trace = stack[-1](frame, 'call', None)
+            if local_trace is not None:
+                self._frame_traces[frame] = local_trace
+
+    def _dispatch(self, frame: FrameType, event: str, arg: object) -> None:
+        local_trace = self._frame_traces.get(frame, None)
+        if local_trace is not None and self._is_tracing():
+            local_trace = local_trace(frame, event, arg)
+            if local_trace is None:
+                self._frame_traces.pop(frame, None)
+            else:
+                self._frame_traces[frame] = local_trace
+
+    def _finish(self, frame: FrameType, arg: object) -> None:
+        local_trace = self._frame_traces.pop(frame, None)
+        if local_trace is not None and self._is_tracing():
+            local_trace(frame, 'return', arg)
+
+    def _on_start(self, code: CodeType, instruction_offset: int) -> None:
+        self._call(sys._getframe(1))
+
+    def _on_throw(self, code: CodeType, instruction_offset: int, exception: BaseException) -> None:
+        if code in self._code_counts:
+            self._call(sys._getframe(1))
+
+    def _on_return(self, code: CodeType, instruction_offset: int, value: object) -> None:
+        self._finish(sys._getframe(1), value)
+
+    def _on_unwind(self, code: CodeType, instruction_offset: int, exception: BaseException) -> None:
+        if code in self._code_counts:
+            # a frame ended by an exception gets a `return` event with `None`
+            self._finish(sys._getframe(1), None)
+
+    def _on_line(self, code: CodeType, line_number: int) -> None:
+        self._dispatch(sys._getframe(1), 'line', None)
+
+    def _on_jump(self, code: CodeType, instruction_offset: int, destination_offset: int) -> object:
+        # `sys.settrace` gives a `line` event when a loop jumps back to the start of the same
+        # line, like the loop of a one line comprehension, which is not a `LINE` event
+        if destination_offset < instruction_offset:
+            line_table = self._line_tables.get(code, None)
+            if line_table is None:
+                line_table = self._line_tables[code] = _build_line_table(code)
+            if line_table.get(instruction_offset) == line_table.get(destination_offset):
+                self._dispatch(sys._getframe(1), 'line', None)
+                return None
+        # the other jumps never matter
+        return sys.monitoring.DISABLE
+
+    def _on_raise(self, code: CodeType, instruction_offset: int, exception: BaseException) -> None:
+        if code in self._code_counts:
+            self._dispatch(sys._getframe(1), 'exception', (type(exception), exception, exception.__traceback__))
+
+
+def _build_line_table(code: CodeType) -> Dict[int, int]:
+    """
+    @param code:
+    @return: the line number of every instruction offset
+    """
+    line_table = {}
+    for start, end, line_number in code.co_lines():
+        for offset in range(start, end, 2):
+            line_table[offset] = line_number
+    return line_table
+
+
+_dispatcher: Optional[MonitoringDispatcher] = None
+
+
+def get_dispatcher() -> MonitoringDispatcher:
+    """
+    @return: the dispatcher shared by the tracers, as the monitoring tool ids are shared by the process
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = MonitoringDispatcher()
+    return _dispatcher
+
+
+class MonitoringSession:
+    """
+    One `activate`/`deactivate` pair, which is pushed to the trace function stack of
+    the tracer in place of the previous `sys.settrace` function.
+    """
+    __slots__ = ('_dispatcher', '_codes', '_frame')
+
+    def __init__(self, codes: Iterable[CodeType], frame: FrameType = None):
+        self._dispatcher = get_dispatcher()
+        codes = set(codes)
+        if frame is not None:
+            codes.add(frame.f_code)
+        self._codes: Tuple[CodeType, ...] = tuple(codes)
+        self._frame = frame
+
+    def start(self, trace: TraceFunction) -> bool:
+        return self._dispatcher.activate(trace, self._codes, self._frame)
+
+    def stop(self) -> None:
+        self._dispatcher.deactivate(self._codes, self._frame)
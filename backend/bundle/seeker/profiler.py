@@ -0,0 +1,100 @@
+"""
+line profiler of the traced code
+
+The tracer tells the profiler about every event of the traced frames. The profiler counts
+the `line` events of every line, and adds the time from one event of a frame to the next one
+to the line the frame is at, which is the self time of the line: the time spent in the traced
+functions it calls and in the tracer itself is not counted. The times are in nanoseconds
+from `time.perf_counter_ns`.
+"""
+from __future__ import annotations
+
+import threading
+from time import perf_counter_ns
+from types import CodeType, FrameType
+from typing import Callable, Dict, List, Mapping, Optional
+
+# the line number -> [the hits, the self time] of a code object
+LineStats = Dict[int, List[int]]
+
+
+class LineProfiler:
+    def __init__(self):
+        self._code_stats: Dict[CodeType, LineStats] = {}
+        # the stack of [frame, [hits, self time] of the current line, start time] of each thread
+        self._thread_local = threading.local()
+
+    def _get_stack(self) -> List[list]:
+        try:
+            return self._thread_local.stack
+        except AttributeError:
+            stack = self._thread_local.stack = []
+            return stack
+
+    def pause(self, frame: FrameType, event: str) -> None:
+        """
+        stop the clock of the current line at an event of the tracer, and move to the line of the event
+        @param frame:
+        @param event:
+        """
+        now = perf_counter_ns()
+        stack = self._get_stack()
+        if stack:
+            current = stack[-1]
+            if current[1] is not None:
+                current[1][1] += now - current[2]
+
+        if event == 'line':
+            if not stack or stack[-1][0] is not frame:
+                # the frame of a `with` block is traced without a `call` event
+                stack.append([frame, None, 0])
+            line_stats = self._code_stats.setdefault(frame.f_code, {})
+            try:
+                current_line = line_stats[frame.f_lineno]
+            except KeyError:
+                current_line = line_stats[frame.f_lineno] = [0, 0]
+            current_line[0] += 1
+            stack[-1][1] = current_line
+        elif event == 'call':
+            stack.append([frame, None, 0])
+        elif event == 'return':
+            if stack and stack[-1][0] is frame:
+                stack.pop()
+
+    def resume(self) -> None:
+        """
+        start the clock of the current line again when the tracer is done with the event
+        """
+        stack = self._get_stack()
+        if stack:
+            stack[-1][2] = perf_counter_ns()
+
+    def get_line_stats(self, code: CodeType) -> LineStats:
+        """
+        @param code:
+        @return: the hits and the self time of the lines of the code object
+        """
+        return self._code_stats.get(code, {})
+
+    def get_profile(self, file_filter: Optional[Callable[[str], bool]] = None) -> List[Mapping]:
+        """
+        @param file_filter: whether the code objects of a file are in the profile, all of them by default
+        @return: the hits and the self time in nanoseconds of the lines of each profiled code object
+        """
+        return [
+            {
+                'fileName': code.co_filename,
+                'functionName': code.co_name,
+                'firstLineNumber': code.co_firstlineno,
+                'lines': [
+                    {'lineNumber': line_no, 'hits': hits, 'selfTime': self_time}
+                    for line_no, (hits, self_time) in sorted(line_stats.items())
+                ],
+            }
+            for code, line_stats in self._code_stats.items()
+            if file_filter is None or file_filter(code.co_filename)
+        ]
+
+    def clear(self) -> None:
+        self._code_stats.clear()
+        self._thread_local = threading.local()
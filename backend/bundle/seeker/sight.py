@@ -6,15 +6,22 @@ import sys
 import re
 import collections
 import datetime as datetime_module
-import itertools
 import threading
 import traceback
 import logging
-from types import FrameType, FunctionType
-from typing import Iterable, Tuple, Any, Mapping, Optional, List, Callable, Union
+from time import perf_counter_ns
+from types import CodeType, FrameType, FunctionType
+from typing import Iterable, Tuple, Any, Mapping, Optional, List, Callable, Union, Dict, AbstractSet
 
 from bundle.utils.recorder import Recorder
 from .variables import CommonVariable, Exploding, BaseVariable
+from .monitoring import MONITORING_AVAILABLE, MonitoringSession
+from .budget import ExecutionBudget, ExecutionBudgetExceeded
+from .line_table import LineTable, get_line_table
+from .write_set import WriteSets, get_write_sets
+from .profiler import LineProfiler
+from .instrument import InstrumentationProbe, get_probe_name, is_instrumented
+from .source_cache import SourceCache, get_content_digest
 from . import utils, pycompat
 
 from io import StringIO
@@ -26,25 +33,79 @@ if pycompat.PY2:
 ipython_filename_pattern = re.compile('^<ipython-input-([0-9]+)-.*>$')
 
 
+# the value, its repr and its fingerprint
+LocalValue = Tuple[Any, str, Optional[utils.Fingerprint]]
+
+
+class LocalValues(collections.OrderedDict):
+    """
+    the values of the local and watched variables of a frame got at an event, with the values
+    of each watched variable and the line of the last event of the frame
+    """
+    def __init__(self, line_no: int):
+        super(LocalValues, self).__init__()
+        self.line_no = line_no
+        self.watched: Dict[BaseVariable, List[Tuple[str, LocalValue]]] = {}
+
+
 def get_local_values(frame: FrameType,
                      watch: Iterable[BaseVariable] = (),
                      custom_repr=(),
                      max_length: int = None,
-                     only_watch: bool = True) -> Mapping[str, Tuple[Any, str]]:
-    result = collections.OrderedDict()
+                     only_watch: bool = True,
+                     previous: LocalValues = None,
+                     changed: AbstractSet[str] = None) -> LocalValues:
+    """
+    get the values of the local and watched variables of a frame with their reprs
+    @param frame:
+    @param watch:
+    @param custom_repr:
+    @param max_length:
+    @param only_watch:
+    @param previous: the values got at the last event of the frame, whose reprs are reused
+        when the values still match their fingerprints
+    @param changed: the names the frame can have changed since `previous`, or None if it can have
+        changed any variable. The variables that do not depend on them keep their previous values
+    @return: the variable names mapped to their values
+    """
+    if previous is None:
+        previous = LocalValues(0)
+
+    def get_local_value(key: str, value: Any) -> LocalValue:
+        previous_value = previous.get(key, None)
+        if previous_value is not None and utils.matches_fingerprint(previous_value[2], value):
+            return previous_value
+        return (value,
+                utils.get_shortish_repr(value, custom_repr, max_length),
+                utils.get_fingerprint(value, custom_repr))
+
+    result = LocalValues(frame.f_lineno)
+    frame_locals = frame.f_locals if watch or not only_watch else {}
     if not only_watch:
         code = frame.f_code
         vars_order = (code.co_varnames + code.co_cellvars + code.co_freevars +
-                      tuple(frame.f_locals.keys()))
-        result_values = [(key, value) for key, value in frame.f_locals.items()]
+                      tuple(frame_locals.keys()))
+        result_values = [(key, value) for key, value in frame_locals.items()]
         result_values.sort(key=lambda key_value: vars_order.index(key_value[0]))
 
         for (key, value) in result_values:
-            result[key] = (value, utils.get_shortish_repr(value, custom_repr, max_length))
-
-    for variable in watch:
-        result.update((key, (value, utils.get_shortish_repr(value, custom_repr, max_length)))
-                      for key, value in sorted(variable.values(frame)))
+            if changed is not None and key not in changed and key in previous:
+                result[key] = previous[key]
+            else:
+                result[key] = get_local_value(key, value)
+
+    if watch:
+        # the globals and the locals are read once for all the variables
+        frame_globals = frame.f_globals or {}
+        for variable in watch:
+            values = None
+            if changed is not None and changed.isdisjoint(variable.names):
+                values = previous.watched.get(variable, None)
+            if values is None:
+                values = [(key, get_local_value(key, value))
+                          for key, value in sorted(variable.evaluate(frame_globals, frame_locals))]
+            result.watched[variable] = values
+            result.update(values)
 
     return result
 
@@ -54,7 +115,7 @@ class UnavailableSource:
         return u'SOURCE IS UNAVAILABLE'
 
 
-source_and_path_cache = {}
+source_and_path_cache = SourceCache()
 
 
 def get_path_and_source_from_frame(frame):
@@ -62,30 +123,34 @@ def get_path_and_source_from_frame(frame):
     module_name = globs.get('__name__')
     file_name = frame.f_code.co_filename
     cache_key = (module_name, file_name)
-    try:
-        return source_and_path_cache[cache_key]
-    except KeyError:
-        pass
+    source = source_and_path_cache.get(cache_key)
+    if source is not None:
+        return file_name, source
     loader = globs.get('__loader__')
 
-    source = None
+    content = None
     if hasattr(loader, 'get_source'):
         try:
-            source = loader.get_source(module_name)
+            content = loader.get_source(module_name)
         except ImportError:
             pass
-        if source is not None:
-            source = source.splitlines()
-    if source is None:
+    if content is None:
         ipython_filename_match = ipython_filename_pattern.match(file_name)
         if ipython_filename_match:
             raise ValueError('Ipython is not supported yet.')
         else:
             try:
                 with open(file_name, 'rb') as fp:
-                    source = fp.read().splitlines()
+                    content = fp.read()
             except utils.file_reading_errors as e:
                 logging.warning(f'Cannot Read Files And Determine Source. Error: {e}')
+
+    digest = get_content_digest(content)
+    source = source_and_path_cache.get_by_content(cache_key, digest)
+    if source is not None:
+        return file_name, source
+
+    source = content.splitlines() if content is not None else None
     if not source:
         # We used to check `if source is None` but I found a rare bug where it
         # was empty, but not `None`, so now we check `if not source`.
@@ -106,9 +171,7 @@ def get_path_and_source_from_frame(frame):
         source = [pycompat.text_type(sline, encoding, 'replace') for sline in
                   source]
 
-    result = (file_name, source)
-    source_and_path_cache[cache_key] = result
-    return result
+    return file_name, source_and_path_cache.put(cache_key, digest, source)
 
 
 def get_write_function(output, overwrite):
@@ -162,10 +225,25 @@ using_log_output = bool(int(os.getenv(_LOG_OUTPUT_ENV_NAME, True)))
 _DEFAULT_OUTPUT_ENV_NAME = 'SEEKER_DEFAULT_OUTPUT_FLAG'
 using_default_output = bool(int(os.getenv(_DEFAULT_OUTPUT_ENV_NAME, True)))
 
+# use `sys.monitoring` instead of `sys.settrace` when it is available (python 3.12+). It is off by
+# default, as a `sys.settrace` tracer installed outside stays active in the traced frames
+_MONITORING_ENV_NAME = 'SEEKER_MONITORING_FLAG'
+using_monitoring = bool(int(os.getenv(_MONITORING_ENV_NAME, False)))
+
+# only feed the recorder, and never build the text log
+_RECORD_ONLY_ENV_NAME = 'SEEKER_RECORD_ONLY_FLAG'
+using_record_only = bool(int(os.getenv(_RECORD_ONLY_ENV_NAME, False)))
+
+# only look again at the variables the last line of a frame can have changed, see `write_set.py`
+_WRITE_SET_ENV_NAME = 'SEEKER_WRITE_SET_FLAG'
+using_write_sets = bool(int(os.getenv(_WRITE_SET_ENV_NAME, True)))
+
 
 class Tracer:
     _recorder: Recorder = None
     _logger: logging.Logger = None
+    _budget: Optional[ExecutionBudget] = None
+    _profiler: Optional[LineProfiler] = None
 
     def __init__(self, *watch_list,
                  default_output: bool = using_default_output,
@@ -173,7 +251,10 @@ class Tracer:
                  output: Union[str, Callable, utils.WritableStream, StringIO] = None,
                  watch=(), watch_explode=(), depth: int = 1, prefix: str = '', overwrite: bool = False,
                  thread_info: bool = False, custom_repr=(), max_variable_length: int = 100,
-                 relative_time: bool = False, only_watch: bool = True):
+                 relative_time: bool = False, only_watch: bool = True,
+                 use_monitoring: bool = using_monitoring,
+                 record_only: bool = using_record_only,
+                 use_write_sets: bool = using_write_sets):
 
         if output:
             self._log_path = output
@@ -183,6 +264,9 @@ class Tracer:
             self._log_path = None
         else:
             self._log_path = False
+        self.record_only = record_only
+        if record_only:
+            self._log_path = False
         self._write = get_write_function(self._log_path, overwrite)
 
         self.watch = [
@@ -196,7 +280,10 @@ class Tracer:
                          for v in utils.ensure_tuple(watch_explode)
                      ]
 
-        self.frame_to_local_reprs = {}
+        # the names the watched variables read
+        self.watched_names = frozenset().union(*(variable.names for variable in self.watch))
+
+        self.frame_to_local_reprs: Dict[FrameType, LocalValues] = {}
         self.start_times = {}
         self.depth = depth
         self.prefix = prefix
@@ -204,6 +291,9 @@ class Tracer:
         self.thread_info_padding = 0
         assert self.depth >= 1
         self.target_codes = set()
+        self.line_tables: Dict[CodeType, LineTable] = {}
+        self.use_write_sets = use_write_sets
+        self.write_sets: Dict[CodeType, Optional[WriteSets]] = {}
         self.target_frames = set()
         self.thread_local = threading.local()
         if len(custom_repr) == 2 and \
@@ -214,6 +304,9 @@ class Tracer:
         self.max_variable_length = max_variable_length
         self.relative_time = relative_time
         self.only_watch = only_watch
+        # the monitoring backend only sees the traced code objects, so the frames
+        # deeper than them cannot be traced with it
+        self.use_monitoring = use_monitoring and MONITORING_AVAILABLE and self.depth == 1
         self.recorder = type(self).get_recorder()
 
     @classmethod
@@ -239,6 +332,39 @@ class Tracer:
     def log_output(cls, message: str) -> None:
         cls._logger.info(message.rstrip())
 
+    @classmethod
+    def set_budget(cls, budget: Optional[ExecutionBudget]) -> None:
+        """
+        set the budget of the execution, which all the tracers check
+        @param budget: the budget, or `None` for no limit
+        """
+        cls._budget = budget
+
+    @classmethod
+    def get_budget(cls) -> Optional[ExecutionBudget]:
+        return cls._budget
+
+    @classmethod
+    def set_profiler(cls, profiler: Optional[LineProfiler]) -> None:
+        """
+        set the profiler of the execution, which gets the events of all the tracers
+        @param profiler: the profiler, or `None` to stop profiling
+        """
+        cls._profiler = profiler
+
+    @classmethod
+    def get_profiler(cls) -> Optional[LineProfiler]:
+        return cls._profiler
+
+    @staticmethod
+    def invalidate_source(file_name: Union[str, os.PathLike]) -> None:
+        """
+        forget the cached source of a file, which is read again the next time it is traced.
+        Call it when the file is written.
+        @param file_name:
+        """
+        source_and_path_cache.invalidate(file_name)
+
     def __call__(self, function_or_class):
         if DISABLED:
             return function_or_class
@@ -279,6 +405,11 @@ class Tracer:
         return cls
 
     def _wrap_function(self, function):
+        if is_instrumented(function.__code__):
+            # the function is rewritten to feed the recorder itself, see `instrument.py`
+            function.__globals__[get_probe_name(function.__code__)] = InstrumentationProbe(self, thread_global)
+            return function
+
         self.target_codes.add(function.__code__)
 
         # function.__name__ = 'graphery_{}'.format(function.__name__)
@@ -321,31 +452,55 @@ class Tracer:
             return
 
         calling_frame = inspect.currentframe().f_back
-        if not self._is_internal_frame(calling_frame):
-            calling_frame.f_trace = self.trace
-            self.target_frames.add(calling_frame)
+        traced_frame = None if self._is_internal_frame(calling_frame) else calling_frame
+        if traced_frame is not None:
+            self.target_frames.add(traced_frame)
 
         thread_global.__dict__.setdefault('depth', -1)
         stack = self.thread_local.__dict__.setdefault(
             'original_trace_functions', []
         )
+        self.thread_local.__dict__.setdefault('original_depths', []).append(thread_global.depth)
+        if not self.record_only:
+            self.start_times[calling_frame] = perf_counter_ns()
+
+        if self.use_monitoring:
+            session = MonitoringSession(self.target_codes, traced_frame)
+            if session.start(self.trace):
+                # the session takes the place of the previous trace function
+                stack.append(session)
+                return
+
+        if traced_frame is not None:
+            traced_frame.f_trace = self.trace
         stack.append(sys.gettrace())
-        self.start_times[calling_frame] = datetime_module.datetime.now()
         sys.settrace(self.trace)
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
         if DISABLED:
             return
         stack = self.thread_local.original_trace_functions
-        sys.settrace(stack.pop())
+        previous = stack.pop()
+        if isinstance(previous, MonitoringSession):
+            previous.stop()
+        else:
+            sys.settrace(previous)
+        original_depth = self.thread_local.original_depths.pop()
+        if exc_type is not None and issubclass(exc_type, ExecutionBudgetExceeded):
+            # `sys.settrace` is turned off when the trace function raises, so the
+            # returns of the frames stopped by the budget are never seen
+            thread_global.depth = original_depth
         calling_frame = inspect.currentframe().f_back
         self.target_frames.discard(calling_frame)
         self.frame_to_local_reprs.pop(calling_frame, None)
 
+        if self.record_only:
+            return
+
         # Writing elapsed time: ###############################################
         #                                                                     #
         start_time = self.start_times.pop(calling_frame)
-        duration = datetime_module.datetime.now() - start_time
+        duration = datetime_module.timedelta(microseconds=(perf_counter_ns() - start_time) // 1000)
         elapsed_time_string = pycompat.timedelta_format(duration)
         indent = ' ' * 4 * (thread_global.depth + 1)
         self.write(
@@ -364,6 +519,135 @@ class Tracer:
                                        current_thread_len)
         return thread_info.ljust(self.thread_info_padding)
 
+    def _get_line_table(self, frame: FrameType) -> LineTable:
+        """
+        @param frame:
+        @return: the line table of the code of the frame. It is made when the code is first traced
+            rather than when it is decorated, so that the source is read at the same time as before
+        """
+        code = frame.f_code
+        try:
+            return self.line_tables[code]
+        except KeyError:
+            line_table = self.line_tables[code] = get_line_table(code, *get_path_and_source_from_frame(frame))
+            return line_table
+
+    def _get_write_sets(self, frame: FrameType) -> Optional[WriteSets]:
+        """
+        @param frame:
+        @return: the write sets of the lines of the code of the frame, or None if it is not a function
+        """
+        code = frame.f_code
+        try:
+            return self.write_sets[code]
+        except KeyError:
+            _, source = get_path_and_source_from_frame(frame)
+            write_sets = self.write_sets[code] = get_write_sets(code, source)
+            return write_sets
+
+    def _get_changed_names(self, frame: FrameType, event: str) -> Optional[AbstractSet[str]]:
+        """
+        @param frame:
+        @param event:
+        @return: the names the frame can have changed since its last event, which ran the line of
+            that event, or None if it can have changed any variable
+        """
+        if not self.use_write_sets or event == 'call':
+            return None
+        local_reprs = self.frame_to_local_reprs.get(frame, None)
+        if local_reprs is None:
+            return None
+        write_sets = self._get_write_sets(frame)
+        return write_sets.get(local_reprs.line_no) if write_sets is not None else None
+
+    def _record_variables(self, frame: FrameType, event: str,
+                          changed: AbstractSet[str] = None) -> List[Tuple[str, str, bool]]:
+        """
+        record the new and modified variables of a frame
+        @param frame:
+        @param event:
+        @param changed: the names the frame can have changed since its last event, or None if it
+            can have changed any variable
+        @return: the name, the repr and whether it is new of each recorded variable
+        """
+        old_local_reprs = self.frame_to_local_reprs.get(frame, None)
+        if old_local_reprs is None:
+            old_local_reprs = LocalValues(0)
+        elif changed is not None and \
+                (not changed or self.only_watch and changed.isdisjoint(self.watched_names)):
+            # none of the variables can have changed
+            old_local_reprs.line_no = frame.f_lineno
+            return []
+
+        # TODO do I need the extra repr? Why not just use variable
+        self.frame_to_local_reprs[frame] = local_reprs = get_local_values(frame,
+                                                                          watch=self.watch,
+                                                                          custom_repr=self.custom_repr,
+                                                                          only_watch=self.only_watch,
+                                                                          previous=old_local_reprs,
+                                                                          changed=changed)
+
+        changes = []
+        for name, (value, value_repr, _) in local_reprs.items():
+            identifier = (self.prefix, name)
+            identifier_string = self.recorder.register_variable(identifier)
+
+            if name not in old_local_reprs:
+                if event == 'call' or event == 'return':
+                    self.recorder.add_vc_to_last_record(identifier_string, value)
+                else:
+                    self.recorder.add_vc_to_previous_record(identifier_string, value)
+                changes.append((name, value_repr, True))
+            elif old_local_reprs[name][1] != value_repr:
+                if event == 'return':
+                    self.recorder.add_vc_to_last_record(identifier_string, value)
+                else:
+                    self.recorder.add_vc_to_previous_record(identifier_string, value)
+                changes.append((name, value_repr, False))
+        return changes
+
+    def _record(self, frame: FrameType, event: str, arg: Any) -> None:
+        """
+        the part of `trace` that feeds the recorder, without the text log
+        @param frame:
+        @param event:
+        @param arg:
+        """
+        line_no = frame.f_lineno
+        if event == 'call':
+            line_no, _ = self._get_line_table(frame).get_call_line(line_no)
+
+        if not (event == 'return' and line_no == self.recorder.get_last_record_line_number()):
+            self.recorder.add_record(line_no)
+
+        self._record_variables(frame, event, self._get_changed_names(frame, event))
+
+        if event == 'return':
+            self.frame_to_local_reprs.pop(frame, None)
+            self.start_times.pop(frame, None)
+            thread_global.depth -= 1
+
+    def _check_budget(self, frame: FrameType, event: str) -> bool:
+        """
+        check the budget of the execution. After it runs out, the frames are left without
+        being recorded, so the truncation record stays the last one
+        @param frame:
+        @param event:
+        @return: whether the event can be recorded
+        @raise ExecutionBudgetExceeded: at `call` and `line` events when the budget has run out
+        """
+        budget = self._budget
+        if event == 'call' or event == 'line':
+            budget.check(self.recorder)
+            return True
+        if budget.exceeded_reason is None:
+            return True
+        if event == 'return':
+            self.frame_to_local_reprs.pop(frame, None)
+            self.start_times.pop(frame, None)
+            thread_global.depth -= 1
+        return False
+
     def trace(self, frame, event, arg):
 
         # Checking whether we should trace this line: #########################
@@ -391,24 +675,55 @@ class Tracer:
                 else:
                     return None
 
+        #                                                                     #
+        # Finished checking whether we should trace this line. ################
+
+        profiler = self._profiler
+        if profiler is None:
+            return self._trace_event(frame, event, arg)
+
+        # the time spent here is not counted in the profile
+        profiler.pause(frame, event)
+        try:
+            return self._trace_event(frame, event, arg)
+        finally:
+            profiler.resume()
+
+    def _trace_event(self, frame: FrameType, event: str, arg: Any):
+        """
+        record and log an event of a traced frame
+        @param frame:
+        @param event:
+        @param arg:
+        @return: the local trace function of the frame
+        """
+        if self._budget is not None and not self._check_budget(frame, event):
+            return self.trace
+
         if event == 'call':
             thread_global.depth += 1
-        indent = ' ' * 4 * thread_global.depth
 
-        #                                                                     #
-        # Finished checking whether we should trace this line. ################
+        if self.record_only:
+            self._record(frame, event, arg)
+            return self.trace
+
+        indent = ' ' * 4 * thread_global.depth
 
         # simplified time stamp
         timestamp = ' ' * 16
 
         # get line_no
         line_no = frame.f_lineno
-        source_path, source = get_path_and_source_from_frame(frame)
+        line_table = self._get_line_table(frame)
+        source_path = line_table.source_path
         if self.last_source_path != source_path:
             self.write(u'{indent}Source path:... {source_path}'.
                        format(**locals()))
             self.last_source_path = source_path
-        source_line = source[line_no - 1]
+        if event == 'call':
+            line_no, source_line = line_table.get_call_line(line_no)
+        else:
+            source_line = line_table.get_line(line_no)
         thread_info = ""
         if self.thread_info:
             current_thread = threading.current_thread()
@@ -416,59 +731,19 @@ class Tracer:
                 ident=current_thread.ident, name=current_thread.getName())
         thread_info = self.set_thread_info_padding(thread_info)
 
-        # Dealing with misplaced function definition: #########################
-        #                                                                     #
-        if event == 'call' and source_line.lstrip().startswith('@'):
-            # If a function decorator is found, skip lines until an actual
-            # function definition is found.
-            for candidate_line_no in itertools.count(line_no):
-                try:
-                    candidate_source_line = source[candidate_line_no - 1]
-                except IndexError:
-                    # End of source file reached without finding a function
-                    # definition. Fall back to original source line.
-                    break
-
-                if candidate_source_line.lstrip().startswith('def'):
-                    # Found the def line!
-                    line_no = candidate_line_no
-                    source_line = candidate_source_line
-                    break
-        #                                                                     #
-        # Finished dealing with misplaced function definition. ################
-
         if not (event == 'return' and line_no == self.recorder.get_last_record_line_number()):
             self.recorder.add_record(line_no)
 
         # Reporting newish and modified variables: ############################
         #                                                                     #
 
-        old_local_reprs = self.frame_to_local_reprs.get(frame, {})
-
-        # TODO do I need the extra repr? Why not just use variable
-        self.frame_to_local_reprs[frame] = local_reprs = get_local_values(frame,
-                                                                          watch=self.watch,
-                                                                          custom_repr=self.custom_repr,
-                                                                          only_watch=self.only_watch)
-
         newish_string = ('Starting var:.. ' if event == 'call' else
                          'New var:....... ')
 
-        for name, (value, value_repr) in local_reprs.items():
-            identifier = (self.prefix, name)
-            identifier_string = self.recorder.register_variable(identifier)
-
-            if name not in old_local_reprs:
-                if event == 'call' or event == 'return':
-                    self.recorder.add_vc_to_last_record(identifier_string, value)
-                else:
-                    self.recorder.add_vc_to_previous_record(identifier_string, value)
+        for name, value_repr, is_new in self._record_variables(frame, event, self._get_changed_names(frame, event)):
+            if is_new:
                 self.write('{indent}{newish_string}{name} = {value_repr}'.format(**locals()))
-            elif old_local_reprs[name][1] != value_repr:
-                if event == 'return':
-                    self.recorder.add_vc_to_last_record(identifier_string, value)
-                else:
-                    self.recorder.add_vc_to_previous_record(identifier_string, value)
+            else:
                 self.write('{indent}Modified var:.. {name} = {value_repr}'.format(**locals()))
 
         #                                                                     #
@@ -0,0 +1,163 @@
+"""
+source cache of the traced files
+
+The tracer reads the source of a file the first time it traces code from it. The
+sources are cached by the md5 of their content, so that files with the same content,
+like the entry files of the same code run again, share one source (and so the line
+tables of their code). A file is looked up by its module name and file name first;
+that lookup is dropped by `invalidate` when the file is written again.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from hashlib import md5
+from typing import Dict, Optional, Sequence, Set, Tuple, Union
+
+# (module name, file name)
+SourceLocation = Tuple[Optional[str], str]
+
+MAX_CACHED_SOURCES = 256
+
+
+def get_content_digest(content: Union[str, bytes, None]) -> str:
+    """
+    @param content: the content of a file, or None if it cannot be read
+    @return: the md5 of the content, or an empty string if there is none
+    """
+    if content is None:
+        return ''
+    if isinstance(content, str):
+        content = content.encode('utf-8', 'surrogatepass')
+    return md5(content).hexdigest()
+
+
+class SourceCache:
+    """
+    Least recently used cache of the source lines of files, keyed by the md5 of their content.
+    """
+    def __init__(self, max_entries: int = MAX_CACHED_SOURCES):
+        """
+        @param max_entries: the maximum number of cached sources
+        """
+        self.max_entries = max_entries
+
+        self._sources: OrderedDict[str, Tuple[Sequence[str], Set[SourceLocation]]] = OrderedDict()
+        self._locations: Dict[SourceLocation, str] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.content_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, location: SourceLocation) -> Optional[Sequence[str]]:
+        """
+        @param location:
+        @return: the cached source of the file, or None if it has to be read
+        """
+        with self._lock:
+            digest = self._locations.get(location, None)
+            if digest is None:
+                return None
+            self._sources.move_to_end(digest)
+            self.hits += 1
+            return self._sources[digest][0]
+
+    def get_by_content(self, location: SourceLocation, digest: str) -> Optional[Sequence[str]]:
+        """
+        get the cached source of the same content read from another file, which is then
+        cached for this file too
+        @param location:
+        @param digest: the digest of the content of the file
+        @return: the cached source, or None if the content is not cached
+        """
+        with self._lock:
+            entry = self._sources.get(digest, None)
+            if entry is None:
+                return None
+            self._sources.move_to_end(digest)
+            self._link(location, digest)
+            self.content_hits += 1
+            return entry[0]
+
+    def put(self, location: SourceLocation, digest: str, source: Sequence[str]) -> Sequence[str]:
+        """
+        cache the source read from a file, which counts as a miss
+        @param location:
+        @param digest: the digest of the content of the file
+        @param source: the source lines
+        @return: the cached source, which is the one cached before if the content is already there
+        """
+        with self._lock:
+            self.misses += 1
+            entry = self._sources.get(digest, None)
+            if entry is None:
+                self._sources[digest] = (source, set())
+            else:
+                source = entry[0]
+                self._sources.move_to_end(digest)
+            self._link(location, digest)
+
+            while len(self._sources) > self.max_entries:
+                _, (_, locations) = self._sources.popitem(last=False)
+                for evicted_location in locations:
+                    del self._locations[evicted_location]
+                self.evictions += 1
+        return source
+
+    def _link(self, location: SourceLocation, digest: str) -> None:
+        previous_digest = self._locations.get(location, None)
+        if previous_digest == digest:
+            return
+        if previous_digest is not None:
+            self._unlink(location, previous_digest)
+        self._locations[location] = digest
+        self._sources[digest][1].add(location)
+
+    def _unlink(self, location: SourceLocation, digest: str) -> None:
+        # the source stays until it is evicted, for the files written again with the same content
+        del self._locations[location]
+        self._sources[digest][1].discard(location)
+
+    def invalidate(self, file_name: Union[str, os.PathLike]) -> int:
+        """
+        forget the source of a file, which is read again the next time it is traced.
+        Call it when the file is written.
+        @param file_name:
+        @return: the number of dropped lookups
+        """
+        file_name = os.path.abspath(file_name)
+        with self._lock:
+            stale_locations = [location for location in self._locations
+                               if os.path.abspath(location[1]) == file_name]
+            for location in stale_locations:
+                self._unlink(location, self._locations[location])
+            self.invalidations += len(stale_locations)
+        return len(stale_locations)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sources.clear()
+            self._locations.clear()
+
+    def __len__(self) -> int:
+        return len(self._sources)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        @return: the hit, miss, eviction and invalidation counts and the current usage
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'contentHits': self.content_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._sources),
+                'files': len(self._locations),
+                'maxEntries': self.max_entries,
+            }
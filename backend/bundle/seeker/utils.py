@@ -1,7 +1,9 @@
 import abc
+import itertools
+import operator
 import re
 
-from typing import Mapping, Any, Callable, Union, Iterable
+from typing import Mapping, Any, Callable, Union, Iterable, Optional, Set, Tuple, Dict
 
 from .pycompat import ABC, string_types
 
@@ -87,6 +89,116 @@ def get_shortish_repr(item: Any,
     return r
 
 
+# the repr of these types never changes
+_ATOMIC_TYPES = frozenset((type(None), bool, int, float, complex, str, bytes, range,
+                           type(Ellipsis), type(NotImplemented)))
+_CONTAINER_TYPES = frozenset((list, tuple, set, frozenset))
+_stable_repr_cache: Dict[type, bool] = {}
+
+# (the object, its type, the objects shown in its repr, or `None` if its repr never changes,
+#  and the fingerprints of the shown objects whose repr can change)
+Fingerprint = Tuple[Any, type, Optional[Tuple], Tuple['Fingerprint', ...]]
+
+
+class _NoFingerprint(Exception):
+    pass
+
+
+def _has_stable_repr(item_type: type) -> bool:
+    """
+    @param item_type:
+    @return: whether the repr of the objects of the type never changes
+    """
+    try:
+        return _stable_repr_cache[item_type]
+    except KeyError:
+        # the default repr only shows the type and the address
+        stable = (item_type in _ATOMIC_TYPES or item_type.__repr__ is object.__repr__
+                  or getattr(item_type, '_STABLE_REPR', False))
+        _stable_repr_cache[item_type] = stable
+        return stable
+
+
+def _get_repr_parts(item: Any) -> Tuple:
+    """
+    @param item: an object whose repr can change
+    @return: the objects whose reprs are in the repr of the item, in order
+    @raise _NoFingerprint: if the objects in the repr of the item are not known
+    """
+    item_type = type(item)
+    if item_type is dict:
+        return tuple(itertools.chain.from_iterable(item.items()))
+    if item_type in _CONTAINER_TYPES:
+        return tuple(item)
+    repr_parts = getattr(item_type, '_repr_parts', None)
+    if repr_parts is None:
+        raise _NoFingerprint
+    return tuple(repr_parts(item))
+
+
+def _make_fingerprint(item: Any, path: Set[int]) -> Fingerprint:
+    if _has_stable_repr(type(item)) or id(item) in path:
+        # a container in itself is shown as `[...]`
+        return item, type(item), None, ()
+
+    parts = _get_repr_parts(item)
+    if all(map(_has_stable_repr, set(map(type, parts)))):
+        return item, type(item), parts, ()
+
+    path.add(id(item))
+    try:
+        return item, type(item), parts, tuple(_make_fingerprint(part, path) for part in parts
+                                             if not _has_stable_repr(type(part)))
+    finally:
+        path.discard(id(item))
+
+
+def get_fingerprint(item: Any, custom_repr: Mapping[Union[Callable, type], Callable] = ()) -> Optional[Fingerprint]:
+    """
+    take a fingerprint of an item, which is much cheaper to check than a repr. The repr of the
+    item stays the same as long as the item matches the fingerprint
+    @param item:
+    @param custom_repr: custom representation function mappings
+    @return: the fingerprint, or `None` if the repr of the item has to be checked every time
+    """
+    if custom_repr and get_repr_function(item, custom_repr) is not repr:
+        return None
+    try:
+        return _make_fingerprint(item, set())
+    except (_NoFingerprint, RecursionError):
+        return None
+
+
+def _matches_fingerprint(fingerprint: Fingerprint) -> bool:
+    item, item_type, parts, changeable_parts = fingerprint
+    if type(item) is not item_type:
+        return False
+    if parts is None:
+        return True
+
+    current_parts = _get_repr_parts(item)
+    return (len(current_parts) == len(parts)
+            and all(map(operator.is_, current_parts, parts))
+            and all(map(_matches_fingerprint, changeable_parts)))
+
+
+def matches_fingerprint(fingerprint: Optional[Fingerprint], item: Any) -> bool:
+    """
+    check whether an item is the same object as the fingerprint is taken from, and whether
+    the objects shown in its repr are the same ones in the same order
+    @param fingerprint: the fingerprint from `get_fingerprint`
+    @param item:
+    @return: whether the repr of the item is the same as when the fingerprint is taken
+    """
+    if fingerprint is None or fingerprint[0] is not item:
+        return False
+    try:
+        return _matches_fingerprint(fingerprint)
+    except (_NoFingerprint, RuntimeError):
+        # changed in another thread while being checked
+        return False
+
+
 def truncate(string, max_length):
     if (max_length is None) or (len(string) <= max_length):
         return string
@@ -1,8 +1,11 @@
+import ast
+import builtins
 import itertools
 import abc
 import logging
-from types import FrameType
-from typing import Tuple, List, Any
+from types import CodeType, FrameType, ModuleType
+from typing import Tuple, List, Any, Optional, Mapping as MappingType, Dict, Type, \
+    FrozenSet
 
 try:
     from collections.abc import Mapping, Sequence
@@ -21,11 +24,93 @@ def needs_parentheses(source):
     return code('{}.x'.format(source)) != code('({}).x'.format(source))
 
 
+def get_names(code: CodeType) -> FrozenSet[str]:
+    """
+    @param code: the code of an expression
+    @return: the names the code and its nested code can read, with the attribute names among them
+    """
+    names = set(code.co_names)
+    for constant in code.co_consts:
+        if isinstance(constant, CodeType):
+            names.update(get_names(constant))
+    return frozenset(names)
+
+
+# the name, and whether each step is an attribute (or a subscript) with its attribute name (or key)
+Accessor = Tuple[str, Tuple[Tuple[bool, Any], ...]]
+
+
+def compile_accessor(source: str) -> Optional[Accessor]:
+    """
+    compile a simple expression made of a name, attributes and constant subscripts,
+    like `node`, `graph.V` or `node['weight']`, which can be looked up without `eval`
+    @param source: the expression
+    @return: the accessor, or `None` if the expression is not simple
+    """
+    try:
+        node = ast.parse(source.strip(), mode='eval').body
+    except SyntaxError:
+        return None
+
+    steps = []
+    while not isinstance(node, ast.Name):
+        if isinstance(node, ast.Attribute):
+            steps.append((True, node.attr))
+        elif isinstance(node, ast.Subscript):
+            key_node = node.slice
+            if not isinstance(key_node, ast.expr):
+                # `ast.Index` of python 3.8
+                key_node = getattr(key_node, 'value', None)
+            try:
+                key = ast.literal_eval(key_node)
+            except (ValueError, TypeError, SyntaxError):
+                return None
+            if type(key) not in (int, str):
+                return None
+            steps.append((False, key))
+        else:
+            return None
+        node = node.value
+
+    return node.id, tuple(reversed(steps))
+
+
+def _get_builtins(frame_globals: MappingType) -> MappingType:
+    frame_builtins = frame_globals.get('__builtins__', builtins)
+    return vars(frame_builtins) if isinstance(frame_builtins, ModuleType) else frame_builtins
+
+
+def evaluate_accessor(accessor: Accessor, frame_globals: MappingType, frame_locals: MappingType) -> Any:
+    """
+    look up the value of an accessor the same way as `eval`
+    @param accessor: the accessor from `compile_accessor`
+    @param frame_globals:
+    @param frame_locals:
+    @return: the value
+    @raise Exception: the exception that `eval` would raise, except that a missing name raises `KeyError`
+    """
+    name, steps = accessor
+    try:
+        value = frame_locals[name]
+    except KeyError:
+        try:
+            value = frame_globals[name]
+        except KeyError:
+            value = _get_builtins(frame_globals)[name]
+
+    for is_attribute, key in steps:
+        value = getattr(value, key) if is_attribute else value[key]
+    return value
+
+
 class BaseVariable(pycompat.ABC):
     def __init__(self, source, exclude=()):
         self.source = source
         self.exclude = utils.ensure_tuple(exclude)
         self.code = compile(source, '<variable>', 'eval')
+        # the value only changes when one of these names is bound again, or an object is changed
+        self.names = get_names(self.code)
+        self.accessor: Optional[Accessor] = compile_accessor(source)
         if needs_parentheses(source):
             self.unambiguous_source = '({})'.format(source)
         else:
@@ -37,8 +122,20 @@ class BaseVariable(pycompat.ABC):
         @param frame:
         @return: the value(s) of this variable
         """
+        return self.evaluate(frame.f_globals or {}, frame.f_locals)
+
+    def evaluate(self, frame_globals: MappingType, frame_locals: MappingType):
+        """
+        evaluate the variable's value with the globals and the locals of a frame
+        @param frame_globals:
+        @param frame_locals:
+        @return: the value(s) of this variable
+        """
         try:
-            main_value = eval(self.code, frame.f_globals or {}, frame.f_locals)
+            if self.accessor is None:
+                main_value = eval(self.code, frame_globals, frame_locals)
+            else:
+                main_value = evaluate_accessor(self.accessor, frame_globals, frame_locals)
         except Exception:
             return ()
 
@@ -169,6 +266,11 @@ class Exploding(BaseVariable):
     """
     Dynamic variable
     """
+    def __init__(self, source, exclude=()):
+        super(Exploding, self).__init__(source, exclude)
+        # the variables the value explodes into, which are compiled once
+        self._explosions: Dict[Type[CommonVariable], CommonVariable] = {}
+
     def _values(self, main_value):
         if isinstance(main_value, Mapping):
             cls = Keys
@@ -177,4 +279,7 @@ class Exploding(BaseVariable):
         else:
             cls = Attrs
 
-        return cls(self.source, self.exclude)._values(main_value)
+        explosion = self._explosions.get(cls, None)
+        if explosion is None:
+            explosion = self._explosions[cls] = cls(self.source, self.exclude)
+        return explosion._values(main_value)
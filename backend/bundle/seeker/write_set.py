@@ -0,0 +1,266 @@
+"""
+static write sets of the traced functions
+
+The variables of a frame only change through the names its lines bind or delete, and through
+the objects they mutate, which needs some code of the program to run. Any node that can run
+it, a call, an operator, a comparison, a truth test, an attribute or item read, iteration,
+hashing or formatting, which can all end up in a dunder method or a property, makes the line
+change anything. The finalizers run when a name is rebound or deleted are left out. The write
+set of a line is the names it can bind or delete, or None when it can change anything. The
+tracer looks again at the variables that depend on the write set of the line a frame ran
+since its last event, and keeps the values of the other ones.
+"""
+from __future__ import annotations
+
+import ast
+import sys
+import threading
+from collections import OrderedDict, abc
+from types import CodeType
+from typing import Dict, FrozenSet, Iterator, List, Optional, Sequence, Tuple
+
+# whether leaving a `with` block gives a `line` event of the `with` line, where `__exit__` runs
+_WITH_EXIT_HAS_LINE_EVENT = sys.version_info >= (3, 10)
+
+# the write sets of the code objects that are gone are dropped after this many new ones
+MAX_WRITE_SETS = 1024
+
+WriteSet = Optional[FrozenSet[str]]
+
+# the nodes that do not run any code of the program by themselves
+_INERT_NODES = (ast.Expr, ast.Assign, ast.AnnAssign, ast.Delete, ast.Pass, ast.Break, ast.Continue, ast.Return,
+                ast.Global, ast.Nonlocal, ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.NamedExpr,
+                ast.Name, ast.Constant, ast.Tuple, ast.List, ast.Dict, ast.expr_context)
+
+_SIMPLE_STATEMENTS = (ast.Expr, ast.Assign, ast.AugAssign, ast.AnnAssign, ast.Delete, ast.Pass, ast.Break,
+                      ast.Continue, ast.Return, ast.Raise, ast.Assert, ast.Import, ast.ImportFrom, ast.Global,
+                      ast.Nonlocal)
+
+
+def walk_statement(node: ast.AST) -> Iterator[ast.AST]:
+    """
+    walk the nodes run when a statement runs, without the bodies of the nested functions, which run later
+    @param node:
+    @return: the nodes
+    """
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        yield node
+        if isinstance(node, ast.Lambda):
+            nodes.extend(node.args.defaults)
+            nodes.extend(default for default in node.args.kw_defaults if default is not None)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            nodes.extend(node.decorator_list)
+            nodes.extend(node.args.defaults)
+            nodes.extend(default for default in node.args.kw_defaults if default is not None)
+            arguments = node.args.posonlyargs + node.args.args + [node.args.vararg] + node.args.kwonlyargs + \
+                [node.args.kwarg]
+            nodes.extend(argument.annotation for argument in arguments
+                         if argument is not None and argument.annotation is not None)
+            if node.returns is not None:
+                nodes.append(node.returns)
+        else:
+            nodes.extend(ast.iter_child_nodes(node))
+
+
+def _is_plain_unpacking(target: ast.expr, value: ast.expr) -> bool:
+    """
+    @return: whether unpacking the value into the target only takes the items of a tuple or list display
+    """
+    if not isinstance(target, (ast.Tuple, ast.List)) or not isinstance(value, (ast.Tuple, ast.List)):
+        return False
+    return len(target.elts) == len(value.elts) and all(isinstance(name, ast.Name) for name in target.elts) and \
+        not any(isinstance(item, ast.Starred) for item in value.elts)
+
+
+def get_write_set(*nodes: Optional[ast.AST]) -> WriteSet:
+    """
+    @param nodes: a statement, or the parts of one that run together
+    @return: the names the nodes can bind or delete, or None if they can change any variable
+    """
+    names = set()
+    for node in nodes:
+        if node is None:
+            continue
+        for child in walk_statement(node):
+            if not isinstance(child, _INERT_NODES):
+                return None
+            if isinstance(child, ast.Name) and not isinstance(child.ctx, ast.Load):
+                names.add(child.id)
+            elif isinstance(child, ast.Assign):
+                # unpacking anything else than a display calls `iter` and `next`
+                if any(isinstance(target, (ast.Tuple, ast.List)) and not _is_plain_unpacking(target, child.value)
+                       for target in child.targets):
+                    return None
+            elif isinstance(child, ast.Dict):
+                # `None` is a `**` unpacking, and the other keys are hashed
+                if not all(isinstance(key, ast.Constant) for key in child.keys):
+                    return None
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if child.decorator_list:
+                    return None
+                names.add(child.name)
+    return frozenset(names)
+
+
+def get_test_write_set(test: ast.expr) -> WriteSet:
+    """
+    @param test: the test of an `if` statement or `while` loop
+    @return: the write set of the test, whose truth value comes from `__bool__` or `__len__` unless it is a constant
+    """
+    return get_write_set(test) if isinstance(test, ast.Constant) else None
+
+
+def get_bound_names(*nodes: Optional[ast.AST]) -> FrozenSet[str]:
+    """
+    @param nodes: a statement, or the parts of one that run together
+    @return: the names the nodes bind or delete themselves, without the ones the code they run can
+        bind in other scopes
+    """
+    names = set()
+    for node in nodes:
+        if node is None:
+            continue
+        for child in walk_statement(node):
+            if isinstance(child, ast.Name) and not isinstance(child.ctx, ast.Load):
+                names.add(child.id)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(child.name)
+            elif isinstance(child, (ast.Import, ast.ImportFrom)):
+                names.update(alias.asname or alias.name.split('.')[0] for alias in child.names)
+    return frozenset(names)
+
+
+class WriteSets:
+    """
+    The write sets of the lines of a function. The lines of a statement spanning several
+    lines share its write set, and a line shared by several statements gets all of theirs.
+    """
+    __slots__ = ('_write_sets',)
+
+    def __init__(self, function: ast.FunctionDef):
+        self._write_sets: Dict[int, WriteSet] = {}
+        self._add_block(function.body, frozenset())
+
+    def get(self, line_no: int) -> WriteSet:
+        """
+        @param line_no:
+        @return: the write set of the line, which is None for the unknown lines
+        """
+        return self._write_sets.get(line_no, None)
+
+    def _add(self, first_line_no: int, last_line_no: int, write_set: WriteSet, extra_names: WriteSet) -> None:
+        if write_set is not None:
+            write_set = write_set | extra_names if extra_names is not None else None
+        for line_no in range(first_line_no, last_line_no + 1):
+            if line_no not in self._write_sets:
+                self._write_sets[line_no] = write_set
+            else:
+                previous_write_set = self._write_sets[line_no]
+                self._write_sets[line_no] = None if previous_write_set is None or write_set is None \
+                    else previous_write_set | write_set
+
+    def _add_block(self, statements: List[ast.stmt], extra_names: WriteSet) -> None:
+        """
+        @param statements:
+        @param extra_names: the names the lines of the block can change besides their own ones,
+            or None if they can change anything
+        """
+        for statement in statements:
+            self._add_statement(statement, extra_names)
+
+    def _add_statement(self, statement: ast.stmt, extra_names: WriteSet) -> None:
+        line_no = statement.lineno
+
+        if isinstance(statement, _SIMPLE_STATEMENTS):
+            self._add(line_no, statement.end_lineno, get_write_set(statement), extra_names)
+
+        elif isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            first_line_no = min([line_no] + [decorator.lineno for decorator in statement.decorator_list])
+            self._add(first_line_no, max(line_no, statement.body[0].lineno - 1), get_write_set(statement), extra_names)
+
+        elif isinstance(statement, (ast.If, ast.While)):
+            self._add(line_no, statement.test.end_lineno, get_test_write_set(statement.test), extra_names)
+            self._add_block(statement.body, extra_names)
+            self._add_block(statement.orelse, extra_names)
+
+        elif isinstance(statement, (ast.For, ast.AsyncFor)):
+            # `iter` and `next` can run any code
+            self._add(line_no, statement.iter.end_lineno, None, extra_names)
+            self._add_block(statement.body, extra_names)
+            self._add_block(statement.orelse, extra_names)
+
+        elif isinstance(statement, (ast.With, ast.AsyncWith)):
+            # so can `__enter__` and `__exit__`, which is called at the `with` line too
+            self._add(line_no, max(item.context_expr.end_lineno for item in statement.items), None, extra_names)
+            # before python 3.10 there is no such event, and the next one follows the line that left the block
+            self._add_block(statement.body, extra_names if _WITH_EXIT_HAS_LINE_EVENT else None)
+
+        elif isinstance(statement, ast.Try):
+            self._add(line_no, line_no, frozenset(), extra_names)
+            self._add_block(statement.body, extra_names)
+            for handler in statement.handlers:
+                write_set = get_write_set(handler.type)
+                handler_names = extra_names
+                if handler.name is not None:
+                    if write_set is not None:
+                        write_set = write_set | {handler.name}
+                    # the name is deleted when the handler is left
+                    handler_names = extra_names | {handler.name} if extra_names is not None else None
+                header_end_line_no = handler.type.end_lineno if handler.type is not None else handler.lineno
+                self._add(handler.lineno, header_end_line_no, write_set, extra_names)
+                self._add_block(handler.body, handler_names)
+            self._add_block(statement.orelse, extra_names)
+            self._add_block(statement.finalbody, extra_names)
+
+        else:
+            # `match` binds names that are not `ast.Name` nodes, and `try`/`except*` is left alone too
+            self._add(line_no, statement.end_lineno, None, extra_names)
+
+
+def _find_function(tree: ast.Module, code: CodeType) -> Optional[ast.FunctionDef]:
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == code.co_name and \
+                min([node.lineno] + [decorator.lineno for decorator in node.decorator_list]) == code.co_firstlineno:
+            return node
+    return None
+
+
+_write_sets: OrderedDict[CodeType, Tuple[Sequence[str], Optional[WriteSets]]] = OrderedDict()
+# the module last parsed, as the functions of a file are usually traced together
+_last_tree: Tuple[Optional[Sequence[str]], Optional[ast.Module]] = (None, None)
+_write_sets_lock = threading.Lock()
+
+
+def get_write_sets(code: CodeType, source: Sequence[str]) -> Optional[WriteSets]:
+    """
+    get the write sets of the lines of a code object from the shared ones
+    @param code:
+    @param source: the source lines of the file of the code
+    @return: the write sets, or None if the code is not a function found in the source
+    """
+    global _last_tree
+
+    with _write_sets_lock:
+        entry = _write_sets.get(code, None)
+        if entry is not None and entry[0] is source:
+            _write_sets.move_to_end(code)
+            return entry[1]
+        last_source, tree = _last_tree
+
+    if last_source is not source:
+        try:
+            # the placeholder of an unavailable source is not a sequence
+            tree = ast.parse('\n'.join(source)) if isinstance(source, abc.Sequence) else None
+        except (SyntaxError, TypeError, ValueError):
+            tree = None
+    function = _find_function(tree, code) if tree is not None else None
+    write_sets = WriteSets(function) if function is not None else None
+
+    with _write_sets_lock:
+        _last_tree = (source, tree)
+        _write_sets[code] = (source, write_sets)
+        if len(_write_sets) > MAX_WRITE_SETS:
+            _write_sets.popitem(last=False)
+    return write_sets
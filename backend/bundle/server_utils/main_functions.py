@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import json
-from typing import Mapping, Callable, Any, List
+from typing import Mapping, Callable, Any, List, Union, Tuple, Optional
 from wsgiref.simple_server import make_server
 from multiprocessing import Pool, TimeoutError
 
 from bundle.server_utils.params import TIMEOUT_SECONDS, ONLY_ACCEPTED_ORIGIN, ACCEPTED_ORIGIN, \
-    REQUEST_GRAPH_NAME, REQUEST_CODE_NAME, REQUEST_VERSION_NAME, VERSION, ENV_NAME_COLLECTION
+    REQUEST_GRAPH_NAME, REQUEST_CODE_NAME, REQUEST_VERSION_NAME, VERSION, ENV_NAME_COLLECTION, \
+    GRAPH_CACHE_MAX_ENTRIES, GRAPH_CACHE_MAX_SIZE, REQUEST_DELTA_NAME, \
+    REQUEST_RECORD_FORMAT_VERSION_NAME
 from bundle.server_utils.utils import create_error_response, create_data_response, execute, \
-    ExecutionException, ExecutionServerException
+    ExecutionException, ExecutionServerException, graph_template_cache, load_graph_template
+from bundle.utils.recorder import POOLED_FORMAT_VERSION
+from bundle.GraphObjects.Graph import Graph
 
 
 class StringEncoder(json.JSONEncoder):
@@ -24,6 +28,7 @@ def main(url: str, port: int) -> None:
         print(f'Server Ver: {VERSION}. Press <ctrl+c> to stop the server.')
         print(f'Ready for Python code on {url}:{port} ...')
         print(f'Time out is set to {TIMEOUT_SECONDS}s.')
+        print(f'Caching up to {GRAPH_CACHE_MAX_ENTRIES} graphs or {GRAPH_CACHE_MAX_SIZE} characters of graph json.')
         print(f'The origin is `{ACCEPTED_ORIGIN}`. Accepting other origins too: {not ONLY_ACCEPTED_ORIGIN}')
         print(f'Request graph name: `{REQUEST_GRAPH_NAME}`; request code name: `{REQUEST_CODE_NAME}`; '
               f'request version name: `{REQUEST_VERSION_NAME}`;')
@@ -62,14 +67,37 @@ def application(environ: Mapping, start_response: Callable) -> List:
     return [json.dumps(content, cls=StringEncoder).encode()]
 
 
-def time_out_execute(*args, **kwargs) -> Mapping:
+def execute_in_worker(code: str, graph_json: Union[str, Mapping], send_template: bool, **kwargs) \
+        -> Tuple[Tuple[str, Union[List[Mapping], Mapping], Optional[List[Mapping]]], Optional[Graph]]:
+    """
+    run `execute` in a worker process, where the graph is parsed under the timeout
+    @param code:
+    @param graph_json:
+    @param send_template: whether the parsed graph is sent back for the template cache of the server
+    @param kwargs: the other arguments of `execute`
+    @return: the result of `execute`, and the parsed graph if it is sent back
+    """
+    template = load_graph_template(graph_json) if send_template else None
+    return execute(code, graph_json, **kwargs), template
+
+
+def time_out_execute(code: str, graph_json: Union[str, Mapping], **kwargs) -> Mapping:
+    # the graph is only looked up here. A graph that is not cached yet is parsed by the worker,
+    # which inherits the cached ones, and sent back to be cached once it is parsed in time
+    cached = graph_template_cache.lookup(graph_json) is not None
+
     with Pool(processes=1) as pool:
         try:
-            result = pool.apply_async(func=execute, args=args, kwds=kwargs)
+            result = pool.apply_async(func=execute_in_worker, args=(code, graph_json, not cached), kwds=kwargs)
 
-            code_hash, exec_result = result.get(timeout=TIMEOUT_SECONDS)
+            (code_hash, exec_result, profile), template = result.get(timeout=TIMEOUT_SECONDS)
+            if template is not None:
+                graph_template_cache.add(graph_json, template)
 
-            response_dict = create_data_response({'codeHash': code_hash, 'execResult': exec_result})
+            response_data = {'codeHash': code_hash, 'execResult': exec_result}
+            if profile is not None:
+                response_data['profile'] = profile
+            response_dict = create_data_response(response_data)
         except TimeoutError:
             response_dict = create_error_response(f'Timeout: Code running timed out after {TIMEOUT_SECONDS}s.')
         except ExecutionException as e:
@@ -85,7 +113,7 @@ def time_out_execute(*args, **kwargs) -> Mapping:
         except Exception as e:
             response_dict = create_error_response(f'Unknown Exception: {e}.')
 
-        print('Execution done.')
+        print('Execution done. Graph cache: {hits} hits, {misses} misses.'.format(**graph_template_cache.get_stats()))
     return response_dict
 
 
@@ -97,6 +125,10 @@ def application_helper(environ: Mapping) -> Mapping:
     if method == 'GET' and path == '/env':
         return create_data_response(environ)
 
+    # graph template cache stats
+    if method == 'GET' and path == '/cache':
+        return create_data_response(graph_template_cache.get_stats())
+
     # entry point check
     if method != 'POST' or path != '/run':
         return create_error_response('Bad Request: Wrong Methods.')
@@ -116,6 +148,13 @@ def application_helper(environ: Mapping) -> Mapping:
     if REQUEST_GRAPH_NAME not in request_json_object:
         return create_error_response('No Graph Intel Embedded In The Request.')
 
-    # execute program with timed out
+    record_format_version = request_json_object.get(REQUEST_RECORD_FORMAT_VERSION_NAME, None)
+    if record_format_version is not None and record_format_version != POOLED_FORMAT_VERSION:
+        return create_error_response(f'The record format version {record_format_version} is not supported. '
+                                     f'The supported version is {POOLED_FORMAT_VERSION}.')
+
+    # execute program with timed out. The clients that do not ask for the delta records do not read them
     return time_out_execute(code=request_json_object[REQUEST_CODE_NAME],
-                            graph_json=request_json_object[REQUEST_GRAPH_NAME])
+                            graph_json=request_json_object[REQUEST_GRAPH_NAME],
+                            delta=bool(request_json_object.get(REQUEST_DELTA_NAME, False)),
+                            pooled=record_format_version is not None)
@@ -15,6 +15,45 @@ ACCEPTED_ORIGIN: str = ''
 _EXECUTION_TIME_OUT_ENV_NAME = _ENV_PREFIX + 'TIMEOUT_SECONDS'
 TIMEOUT_SECONDS: int = int(getenv(_EXECUTION_TIME_OUT_ENV_NAME, 5))
 
+# the traced execution stops by itself and returns the steps recorded so far when it runs out of
+# any of these budgets, which leaves time to send the partial result before the time out. 0 means no limit,
+# which is the default, as the clients that do not read `truncated` would show a cut execution as a whole one
+_EXECUTION_MAX_STEPS_ENV_NAME = _ENV_PREFIX + 'MAX_STEPS'
+EXECUTION_MAX_STEPS: int = int(getenv(_EXECUTION_MAX_STEPS_ENV_NAME, 0))
+
+_EXECUTION_MAX_SECONDS_ENV_NAME = _ENV_PREFIX + 'MAX_SECONDS'
+EXECUTION_MAX_SECONDS: float = float(getenv(_EXECUTION_MAX_SECONDS_ENV_NAME, 0))
+
+_EXECUTION_MAX_RECORDED_BYTES_ENV_NAME = _ENV_PREFIX + 'MAX_RECORDED_BYTES'
+EXECUTION_MAX_RECORDED_BYTES: int = int(getenv(_EXECUTION_MAX_RECORDED_BYTES_ENV_NAME, 0))
+
+# the recorded states are cut to these limits, and say how much is left out (see `Recorder.set_limits`).
+# 0 means no limit, which is the default, as the clients that do not read `elided` would show cut states as whole ones
+_EXECUTION_MAX_CONTAINER_LENGTH_ENV_NAME = _ENV_PREFIX + 'MAX_CONTAINER_LENGTH'
+EXECUTION_MAX_CONTAINER_LENGTH: int = int(getenv(_EXECUTION_MAX_CONTAINER_LENGTH_ENV_NAME, 0))
+
+_EXECUTION_MAX_CONTAINER_DEPTH_ENV_NAME = _ENV_PREFIX + 'MAX_CONTAINER_DEPTH'
+EXECUTION_MAX_CONTAINER_DEPTH: int = int(getenv(_EXECUTION_MAX_CONTAINER_DEPTH_ENV_NAME, 0))
+
+_EXECUTION_MAX_REPR_LENGTH_ENV_NAME = _ENV_PREFIX + 'MAX_REPR_LENGTH'
+EXECUTION_MAX_REPR_LENGTH: int = int(getenv(_EXECUTION_MAX_REPR_LENGTH_ENV_NAME, 0))
+
+# send the hits and the self time of every line of the entry file with the result
+_EXECUTION_PROFILE_FLAG_ENV_NAME = _ENV_PREFIX + 'PROFILE_FLAG'
+EXECUTION_PROFILE: bool = bool(int(getenv(_EXECUTION_PROFILE_FLAG_ENV_NAME, False)))
+
+# rewrite the traced functions of the entry file to record themselves instead of tracing them with `sys.settrace`
+_EXECUTION_INSTRUMENT_FLAG_ENV_NAME = _ENV_PREFIX + 'INSTRUMENT_FLAG'
+EXECUTION_INSTRUMENT: bool = bool(int(getenv(_EXECUTION_INSTRUMENT_FLAG_ENV_NAME, False)))
+
+# make `execute` give the records with only the changed variables and a full record every few ones
+# (see `Recorder.get_delta_change_list`) by default. The user server only sends them to the requests asking for them
+_EXECUTION_DELTA_FLAG_ENV_NAME = _ENV_PREFIX + 'DELTA_FLAG'
+EXECUTION_DELTA: bool = bool(int(getenv(_EXECUTION_DELTA_FLAG_ENV_NAME, False)))
+
+_EXECUTION_KEYFRAME_INTERVAL_ENV_NAME = _ENV_PREFIX + 'KEYFRAME_INTERVAL'
+EXECUTION_KEYFRAME_INTERVAL: int = int(getenv(_EXECUTION_KEYFRAME_INTERVAL_ENV_NAME, 64))
+
 _ENTRY_PY_MODULE_ENV_NAME = _ENV_PREFIX + 'ENTRY_PY_MODULE_NAME'
 ENTRY_PY_MODULE_NAME: str = getenv(_ENTRY_PY_MODULE_ENV_NAME, 'entry')
 ENTRY_PY_FILE_NAME: str = f'{ENTRY_PY_MODULE_NAME}.py'
@@ -22,11 +61,22 @@ ENTRY_PY_FILE_NAME: str = f'{ENTRY_PY_MODULE_NAME}.py'
 _MODULE_MAIN_FUNCTION_ENV_NAME = _ENV_PREFIX + 'MAIN_FUNCTION_NAME'
 MAIN_FUNCTION_NAME: str = getenv(_MODULE_MAIN_FUNCTION_ENV_NAME, 'main')
 
+_GRAPH_CACHE_MAX_ENTRIES_ENV_NAME = _ENV_PREFIX + 'GRAPH_CACHE_MAX_ENTRIES'
+GRAPH_CACHE_MAX_ENTRIES: int = int(getenv(_GRAPH_CACHE_MAX_ENTRIES_ENV_NAME, 64))
+
+# the total length of the cached cyjs
+_GRAPH_CACHE_MAX_SIZE_ENV_NAME = _ENV_PREFIX + 'GRAPH_CACHE_MAX_SIZE'
+GRAPH_CACHE_MAX_SIZE: int = int(getenv(_GRAPH_CACHE_MAX_SIZE_ENV_NAME, 64 * 1024 * 1024))
+
 GRAPH_OBJ_ANCHOR_NAME: str = 'graph_object'
 
 REQUEST_CODE_NAME: str = 'code'
 REQUEST_GRAPH_NAME: str = 'graph'
 
+REQUEST_DELTA_NAME: str = 'delta'
+# the version of the pooled records (see `Recorder.get_pooled_change_list`) the client reads, if any
+REQUEST_RECORD_FORMAT_VERSION_NAME: str = 'recordFormatVersion'
+
 REQUEST_VERSION_NAME: str = 'version'
 VERSION: str = '0.2.6'
 
@@ -37,6 +87,18 @@ ENV_NAME_COLLECTION = [
     _DEFAULT_PORT_ENV_NAME,
     _ORIGIN_ONLY_FLAG_ENV_NAME,
     _EXECUTION_TIME_OUT_ENV_NAME,
+    _EXECUTION_MAX_STEPS_ENV_NAME,
+    _EXECUTION_MAX_SECONDS_ENV_NAME,
+    _EXECUTION_MAX_RECORDED_BYTES_ENV_NAME,
+    _EXECUTION_MAX_CONTAINER_LENGTH_ENV_NAME,
+    _EXECUTION_MAX_CONTAINER_DEPTH_ENV_NAME,
+    _EXECUTION_MAX_REPR_LENGTH_ENV_NAME,
+    _EXECUTION_PROFILE_FLAG_ENV_NAME,
+    _EXECUTION_INSTRUMENT_FLAG_ENV_NAME,
+    _EXECUTION_DELTA_FLAG_ENV_NAME,
+    _EXECUTION_KEYFRAME_INTERVAL_ENV_NAME,
     _ENTRY_PY_MODULE_ENV_NAME,
     _MODULE_MAIN_FUNCTION_ENV_NAME,
+    _GRAPH_CACHE_MAX_ENTRIES_ENV_NAME,
+    _GRAPH_CACHE_MAX_SIZE_ENV_NAME,
 ]
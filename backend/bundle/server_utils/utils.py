@@ -1,20 +1,26 @@
 from __future__ import annotations
 
 import argparse
-import json
 import sys
 import pathlib
 import traceback
 from importlib import import_module
 from inspect import getsource
-from typing import Mapping, Any, Callable, Union, List, Tuple, Sequence, Iterable
+from typing import Mapping, Any, Callable, Union, List, Tuple, Sequence, Iterable, Optional
 
 from .params import DEFAULT_PORT, GRAPH_OBJ_ANCHOR_NAME, ENTRY_PY_MODULE_NAME, MAIN_FUNCTION_NAME, \
-    ENTRY_PY_FILE_NAME, DEFAULT_SERVE_URL
+    ENTRY_PY_FILE_NAME, DEFAULT_SERVE_URL, GRAPH_CACHE_MAX_ENTRIES, GRAPH_CACHE_MAX_SIZE, EXECUTION_MAX_STEPS, \
+    EXECUTION_MAX_SECONDS, EXECUTION_MAX_RECORDED_BYTES, EXECUTION_PROFILE, EXECUTION_INSTRUMENT, \
+    EXECUTION_DELTA, EXECUTION_KEYFRAME_INTERVAL, EXECUTION_MAX_CONTAINER_LENGTH, EXECUTION_MAX_CONTAINER_DEPTH, \
+    EXECUTION_MAX_REPR_LENGTH
 
 from ..GraphObjects.Graph import Graph
 from ..utils.cache_file_helpers import TempSysPathAdder, get_md5_of_a_string
+from ..utils.graph_cache import GraphTemplateCache
 from ..controller import controller
+from ..seeker.budget import ExecutionBudget, ExecutionBudgetExceeded
+from ..seeker.instrument import load_instrumented_module
+from ..seeker.profiler import LineProfiler
 
 
 class ExecutionServerException(Exception):
@@ -60,22 +66,55 @@ def create_data_response(data: Any) -> dict:
     }
 
 
+graph_template_cache = GraphTemplateCache(GRAPH_CACHE_MAX_ENTRIES, GRAPH_CACHE_MAX_SIZE)
+
+
+def load_graph_template(graph_json: Union[str, Mapping]) -> Graph:
+    """
+    get the parsed graph from the graph template cache
+    @param graph_json:
+    @return: the template, which must not be changed
+    @raise ExecutionServerException: if the graph cannot be parsed
+    """
+    try:
+        return graph_template_cache.get_template(graph_json)
+    except Exception as e:
+        raise ExecutionServerException(f'Cannot import graph objects. Error: {e}')
+
+
 _SOURCE_CODE_STARTS_LOGGING_TEMPLATE = '========== code starts =========='
 _SOURCE_CODE_ENDS_LOGGING_TEMPLATE = '========== code ends =========='
 _SOURCE_CODE_LOGGING_TEMPLATE = '\n{code_string}'
 _EXECUTION_STARTS_LOGGING_TEMPLATE = '========== execution starts =========='
 _EXECUTION_ENDS_LOGGING_TEMPLATE = '========== execution ends ==========\n'
-
-
-def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool = False) -> Tuple[str, List[Mapping]]:
+_EXECUTION_STOPPED_LOGGING_TEMPLATE = '========== execution stopped: {reason} =========='
+
+
+def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool = False,
+            profile: bool = EXECUTION_PROFILE,
+            instrument: bool = EXECUTION_INSTRUMENT,
+            delta: bool = EXECUTION_DELTA,
+            pooled: bool = False) -> Tuple[str, Union[List[Mapping], Mapping], Optional[List[Mapping]]]:
+    """
+    run the main function of the code on the graph
+    @param code:
+    @param graph_json:
+    @param auto_delete_cache: whether the folder of the code is deleted afterwards
+    @param profile: whether the lines of the code are profiled
+    @param instrument: whether the traced functions of the code are rewritten to record themselves
+        (see `seeker.instrument`). The profiler only sees the functions traced with `sys.settrace`,
+        so the code is not rewritten when it is profiled
+    @param delta: whether the records only have the changed variables, except a full one every
+        `EXECUTION_KEYFRAME_INTERVAL` records (see `Recorder.get_delta_change_list`)
+    @param pooled: whether the records are pooled (see `Recorder.get_pooled_change_list`)
+    @return: the md5 of the code, the records, and the profile of the code objects of the entry file
+        (see `LineProfiler.get_profile`) or None if it is not profiled
+    """
     folder_hash: str = get_md5_of_a_string(code)
 
-    try:
-        graph_json_obj = json.loads(graph_json) if isinstance(graph_json, str) else graph_json
-
-        graph_object = Graph.graph_generator(graph_json_obj)
-    except Exception as e:
-        raise ExecutionServerException(f'Cannot import graph objects. Error: {e}')
+    # the user code gets a clone so that its changes do not stay in the cached template
+    graph_object = load_graph_template(graph_json).clone()
+    profiler = LineProfiler() if profile else None
 
     with controller as folder_creator, \
             folder_creator(folder_hash, auto_delete=auto_delete_cache) as cache_folder, \
@@ -84,11 +123,16 @@ def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool
             entry_file: pathlib.Path = cache_folder.cache_folder_path / ENTRY_PY_FILE_NAME
 
             entry_file.write_text(code)
+            # the source of the last entry file written here is not shown for this one
+            controller.tracer_cls.invalidate_source(entry_file)
         except Exception as e:
             raise ExecutionServerException(f'Cannot create temporary execution file. Error: {e}')
 
         try:
-            imported_module = import_module(ENTRY_PY_MODULE_NAME)
+            if instrument and not profile:
+                imported_module = load_instrumented_module(ENTRY_PY_MODULE_NAME)
+            else:
+                imported_module = import_module(ENTRY_PY_MODULE_NAME)
             source_code = getsource(imported_module)
             controller.tracer_cls.log_output(_SOURCE_CODE_STARTS_LOGGING_TEMPLATE)
             controller.tracer_cls.log_output(_SOURCE_CODE_LOGGING_TEMPLATE.format(code_string=source_code))
@@ -110,7 +154,19 @@ def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool
             setattr(imported_module, GRAPH_OBJ_ANCHOR_NAME, graph_object)
 
             controller.purge_records()
+            controller.recorder.set_limits(EXECUTION_MAX_CONTAINER_LENGTH, EXECUTION_MAX_CONTAINER_DEPTH,
+                                           EXECUTION_MAX_REPR_LENGTH)
+            # the tracers do not check anything when no budget is set
+            budget = ExecutionBudget(EXECUTION_MAX_STEPS, EXECUTION_MAX_SECONDS, EXECUTION_MAX_RECORDED_BYTES) \
+                if EXECUTION_MAX_STEPS or EXECUTION_MAX_SECONDS or EXECUTION_MAX_RECORDED_BYTES else None
+            controller.tracer_cls.set_budget(budget)
+            controller.tracer_cls.set_profiler(profiler)
+            if budget is not None:
+                budget.start()
             main_function()
+        except ExecutionBudgetExceeded as e:
+            # the records end with the truncation record, and are sent as they are
+            controller.tracer_cls.log_output(_EXECUTION_STOPPED_LOGGING_TEMPLATE.format(reason=e.reason))
         except Exception as e:
             traceback.print_exc()
             _, _, exc_tb = sys.exc_info()
@@ -120,9 +176,21 @@ def execute(code: str, graph_json: Union[str, Mapping], auto_delete_cache: bool
                 for tb in tracebacks if tb.filename.endswith(ENTRY_PY_FILE_NAME)
             ))
         finally:
+            controller.tracer_cls.set_budget(None)
+            controller.tracer_cls.set_profiler(None)
+            controller.recorder.set_limits()
             del sys.modules[ENTRY_PY_MODULE_NAME]
             del imported_module
 
             controller.tracer_cls.log_output(_EXECUTION_ENDS_LOGGING_TEMPLATE)
 
-    return folder_hash, controller.get_processed_result()
+    profile_result = None
+    if profiler is not None:
+        profile_result = profiler.get_profile(lambda file_name: file_name.endswith(ENTRY_PY_FILE_NAME))
+    if pooled:
+        records = controller.get_pooled_result(delta, EXECUTION_KEYFRAME_INTERVAL)
+    elif delta:
+        records = controller.get_delta_result(EXECUTION_KEYFRAME_INTERVAL)
+    else:
+        records = controller.get_processed_result()
+    return folder_hash, records, profile_result
@@ -0,0 +1,92 @@
+"""
+watched variable change detection benchmark
+
+Traces loops that watch large containers which only change now and then. Without fingerprints,
+every watched value is turned into a repr at every line to tell whether it changed. With them,
+the repr is only made when the value does not match its fingerprint.
+
+    python -m bundle.tests.benchmarks.bench_change_detection
+"""
+from __future__ import annotations
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.seeker import tracer, utils
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes, \
+    generate_path_edges
+
+SIZE = 2_000
+LOOP = 200
+
+
+def make_workloads():
+    nodes = generate_nodes(SIZE)
+    graph = Graph(nodes, generate_path_edges(nodes))
+
+    @tracer('distances', 'visited', 'node', record_only=True)
+    def unchanged_containers():
+        distances = {node: index for index, node in enumerate(graph.V)}
+        visited = list(graph.V)
+        total = 0
+        for index in range(LOOP):
+            total += index
+        return total
+
+    @tracer('visited', 'node', record_only=True)
+    def growing_list():
+        visited = []
+        for node in nodes[:LOOP]:
+            visited.append(node)
+        return visited
+
+    @tracer('graph', 'node_set', 'node', record_only=True)
+    def graph_objects():
+        node_set = graph.V
+        count = 0
+        for node in nodes[:LOOP]:
+            count += 1
+        return count
+
+    return {
+        'unchanged dict and list': unchanged_containers,
+        'growing list': growing_list,
+        'graph and node set': graph_objects,
+    }
+
+
+def measure(workloads) -> dict:
+    results = {}
+    for name, workload in workloads.items():
+        # the tracers keep the recorder they are created with
+        recorder = tracer.get_recorder()
+
+        def run():
+            recorder.purge()
+            workload()
+
+        run()
+        results[name] = (time_it(run, repeat=5), len(recorder.get_change_list()))
+    return results
+
+
+def main() -> None:
+    workloads = make_workloads()
+    fingerprint_results = measure(workloads)
+
+    get_fingerprint = utils.get_fingerprint
+    utils.get_fingerprint = lambda item, custom_repr=(): None
+    try:
+        repr_results = measure(workloads)
+    finally:
+        utils.get_fingerprint = get_fingerprint
+
+    rows = []
+    for name, (repr_time, records) in repr_results.items():
+        fingerprint_time, fingerprint_records = fingerprint_results[name]
+        assert records == fingerprint_records
+        rows.append((name, records, format_seconds(repr_time / records),
+                     format_seconds(fingerprint_time / records), f'{repr_time / fingerprint_time:.2f}x'))
+    print_table(('workload', 'lines', 'repr per line', 'fingerprint per line', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+cycle tracking benchmark
+
+Records wide lists and dicts of nodes with the ids of the containing states shared by all
+the nested states, and with a copy of them made for every nested state, as before the
+sharing. Reports the best time spent per recorded state.
+
+    python -m bundle.tests.benchmarks.bench_cycle_tracking
+"""
+from __future__ import annotations
+
+from copy import copy
+
+from bundle.utils.recorder import Recorder
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes, \
+    count_states
+
+REPEAT = 5
+
+
+class CopyingRecorder(Recorder):
+    def process_variable_state(self, identifier_string, variable_state, memory_trace=None):
+        # the nested states get a copy, so that none is left in the given trace
+        return super().process_variable_state(identifier_string, variable_state,
+                                              None if memory_trace is None else copy(memory_trace))
+
+
+def make_values(size: int):
+    nodes = generate_nodes(size)
+    for node in nodes[:size // 10]:
+        node.properties['neighbors'] = nodes[:3]
+    return {
+        f'list of {size} nodes': nodes,
+        f'dict of {size} nodes': {node.identity: node for node in nodes},
+        f'{size} nested lists of nodes': [[node, [node]] for node in nodes],
+    }
+
+
+def main() -> None:
+    rows = []
+    for size in (1_000, 10_000):
+        for name, value in make_values(size).items():
+            times = {}
+            for recorder_cls in (CopyingRecorder, Recorder):
+                recorder = recorder_cls()
+                identifier_string = recorder.register_variable(('main', 'value'))
+                states = count_states(recorder.process_variable_state(identifier_string, value))
+                times[recorder_cls] = time_it(lambda: recorder.process_variable_state(identifier_string, value),
+                                              repeat=REPEAT)
+            rows.append((name, states, format_seconds(times[CopyingRecorder] / states),
+                         format_seconds(times[Recorder] / states),
+                         f'{times[CopyingRecorder] / times[Recorder]:.2f}x'))
+    print_table(('value', 'states', 'copied per state', 'shared per state', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
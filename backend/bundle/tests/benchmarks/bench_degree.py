@@ -0,0 +1,88 @@
+"""
+degree counting benchmark
+
+Compares the tutorial style degree counting, which scans every edge for every node,
+with `Graph.degree`, which reads the adjacency index. Both run under the seeker tracer
+the same way the user server runs them. `degree_dict` is not watched so that the
+numbers show the cost of finding the edges rather than recording the result. The edge
+scan is only timed on a few nodes and extrapolated to the whole graph, since a full run
+takes far too long.
+
+    python -m bundle.tests.benchmarks.bench_degree
+"""
+from __future__ import annotations
+
+import random
+import time
+from typing import List
+
+from bundle.GraphObjects.Edge import Edge
+from bundle.GraphObjects.Graph import Graph
+from bundle.GraphObjects.Node import Node
+from bundle.seeker import tracer
+from bundle.utils.recorder import Recorder
+from bundle.tests.benchmarks.utils import format_seconds, print_table, generate_nodes
+
+NODE_NUM = 10_000
+EDGE_NUM = 50_000
+SCANNED_NODE_NUM = 3
+
+
+def generate_random_graph(node_num: int, edge_num: int) -> Graph:
+    nodes = generate_nodes(node_num)
+    edges = [Edge(f'e{i}', tuple(random.sample(nodes, 2))) for i in range(edge_num)]
+    return Graph(nodes, edges)
+
+
+def count_by_scanning(graph_object: Graph, nodes: List[Node]) -> dict:
+    @tracer('node', 'node_degree', 'edge', default_output=False, log_output=False)
+    def main():
+        degree_dict = {}
+        for node in nodes:
+            node_degree = 0
+            for edge in graph_object.edges:
+                if node in edge:
+                    node_degree += 1
+            degree_dict[node] = node_degree
+        return degree_dict
+
+    return main()
+
+
+def count_by_index(graph_object: Graph, nodes: List[Node]) -> dict:
+    @tracer('node', 'node_degree', default_output=False, log_output=False)
+    def main():
+        degree_dict = {}
+        for node in nodes:
+            node_degree = graph_object.degree(node)
+            degree_dict[node] = node_degree
+        return degree_dict
+
+    return main()
+
+
+def main() -> None:
+    graph = generate_random_graph(NODE_NUM, EDGE_NUM)
+    all_nodes = list(graph.V)
+
+    tracer.set_new_recorder(Recorder())
+    start = time.perf_counter()
+    scanned = count_by_scanning(graph, all_nodes[:SCANNED_NODE_NUM])
+    scan_per_node = (time.perf_counter() - start) / SCANNED_NODE_NUM
+
+    tracer.set_new_recorder(Recorder())
+    start = time.perf_counter()
+    indexed = count_by_index(graph, all_nodes)
+    index_total = time.perf_counter() - start
+
+    assert all(indexed[node] == degree for node, degree in scanned.items())
+
+    print(f'{NODE_NUM} nodes, {EDGE_NUM} edges, traced')
+    print_table(('method', 'per node', 'all nodes'), [
+        ('edge scan', format_seconds(scan_per_node), format_seconds(scan_per_node * NODE_NUM) + ' (extrapolated)'),
+        ('Graph.degree', format_seconds(index_total / NODE_NUM), format_seconds(index_total)),
+    ])
+
+
+if __name__ == '__main__':
+    main()
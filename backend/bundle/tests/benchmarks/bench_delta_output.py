@@ -0,0 +1,93 @@
+"""
+delta change list benchmark
+
+Records the kind of functions of `tests/utils_tests/test_recorder.py`, scaled up to long loops,
+and compares the processed change list, which has every variable in each record changing any,
+with the delta change list, which only has the changed ones and a full keyframe every
+`DEFAULT_KEYFRAME_INTERVAL` records. Reports the json size and the best processing time,
+including `json.dumps`, of both.
+
+    python -m bundle.tests.benchmarks.bench_delta_output
+"""
+from __future__ import annotations
+
+import json
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.seeker import tracer
+from bundle.utils.recorder import Recorder, DEFAULT_KEYFRAME_INTERVAL, expand_change_list
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes, \
+    generate_path_edges
+
+REPEAT = 10
+
+
+def make_workloads():
+    nodes = generate_nodes(50)
+    graph = Graph(nodes, generate_path_edges(nodes))
+
+    @tracer('a', 'b', 'c', 'd', record_only=True)
+    def many_variables():
+        a = list(range(20))
+        b = {str(i): i for i in range(20)}
+        c = ''
+        d = 0
+        for i in range(300):
+            d = d + i
+        c = str(d)
+
+    @tracer('a', record_only=True)
+    def self_reference():
+        a = []
+        b = [1, 2, 3, a]
+        a.append(b)
+        for i in range(200):
+            a.append(i)
+
+    @tracer('node', 'degree', 'visited', record_only=True)
+    def graph_loop():
+        visited = []
+        for node in graph.V:
+            degree = graph.degree(node)
+            visited.append(node)
+
+    return {
+        'many variables': many_variables,
+        'self reference': self_reference,
+        'graph loop': graph_loop,
+    }
+
+
+def main() -> None:
+    recorder = Recorder()
+    original_recorder = tracer.get_recorder()
+    tracer.set_new_recorder(recorder)
+    try:
+        rows = []
+        for name, workload in make_workloads().items():
+            recorder.purge()
+            workload()
+
+            def process_full():
+                recorder.purge_processed_changes()
+                return recorder.get_change_list_json()
+
+            def process_delta():
+                return recorder.get_delta_change_list_json(DEFAULT_KEYFRAME_INTERVAL)
+
+            full_json, delta_json = process_full(), process_delta()
+            assert expand_change_list(json.loads(delta_json)) == json.loads(full_json)
+
+            full_time, delta_time = time_it(process_full, repeat=REPEAT), time_it(process_delta, repeat=REPEAT)
+            rows.append((name, len(recorder.get_change_list()),
+                         f'{len(full_json) / 1024:.1f}KiB', f'{len(delta_json) / 1024:.1f}KiB',
+                         format_seconds(full_time), format_seconds(delta_time),
+                         f'{len(full_json) / len(delta_json):.1f}x'))
+    finally:
+        tracer.set_new_recorder(original_recorder)
+
+    print_table(('workload', 'records', 'full size', 'delta size', 'full time', 'delta time', 'size ratio'), rows)
+
+
+if __name__ == '__main__':
+    main()
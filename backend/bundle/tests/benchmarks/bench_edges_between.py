@@ -0,0 +1,62 @@
+"""
+edge lookup by endpoints benchmark
+
+Counts the triangles of a random graph, which asks whether two nodes are linked in its
+inner loop. Without an index the question is answered by scanning the edges.
+
+    python -m bundle.tests.benchmarks.bench_edges_between
+"""
+from __future__ import annotations
+
+import random
+
+from bundle.GraphObjects.Edge import Edge
+from bundle.GraphObjects.Graph import Graph
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes
+
+SIZES = ((100, 400), (1_000, 4_000), (5_000, 20_000))
+
+
+def generate_graph(node_num: int, edge_num: int) -> Graph:
+    nodes = generate_nodes(node_num)
+    edges = [Edge(f'e{i}', tuple(random.sample(nodes, 2))) for i in range(edge_num)]
+    return Graph(nodes, edges)
+
+
+def count_triangles(graph: Graph, linked) -> int:
+    count = 0
+    for edge in graph.E:
+        u, v = edge.node_pair
+        for w in graph.neighbors(u):
+            if w != v and linked(graph, v, w):
+                count += 1
+    return count // 3
+
+
+def linked_by_scan(graph: Graph, u, v) -> bool:
+    return any(u in edge and v in edge for edge in graph.E)
+
+
+def linked_by_index(graph: Graph, u, v) -> bool:
+    return graph.has_edge_between(u, v)
+
+
+def main() -> None:
+    rows = []
+    for node_num, edge_num in SIZES:
+        graph = generate_graph(node_num, edge_num)
+        # warm up the lazily built index
+        graph.has_edge_between(*next(iter(graph.E)).node_pair)
+
+        index_time = time_it(lambda: count_triangles(graph, linked_by_index), repeat=3)
+        if edge_num <= 4_000:
+            assert count_triangles(graph, linked_by_scan) == count_triangles(graph, linked_by_index)
+            scan_time = format_seconds(time_it(lambda: count_triangles(graph, linked_by_scan), repeat=1))
+        else:
+            scan_time = 'skipped'
+        rows.append((node_num, edge_num, scan_time, format_seconds(index_time)))
+    print_table(('nodes', 'edges', 'scan', 'has_edge_between'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+ElementSet lookup benchmark
+
+Lookups by identity and by cy_id should stay flat when the set grows from 100 to 100k elements.
+The linear scan that `ElementSet.__getitem__` used to do is timed on the smaller sizes for reference.
+
+    python -m bundle.tests.benchmarks.bench_element_set
+"""
+from __future__ import annotations
+
+import random
+from typing import Optional
+
+from bundle.GraphObjects.Node import Node, NodeSet
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes
+
+SIZES = (100, 1_000, 10_000, 100_000)
+LINEAR_SCAN_SIZE_LIMIT = 10_000
+LOOKUP_NUM = 1_000
+
+
+def linear_scan(node_set: NodeSet, identity: str) -> Optional[Node]:
+    for element in node_set.elements:
+        if element.identity == identity:
+            return element
+    return None
+
+
+def main() -> None:
+    rows = []
+    for size in SIZES:
+        nodes = generate_nodes(size)
+        node_set = NodeSet(nodes)
+        sample = random.sample(nodes, min(LOOKUP_NUM, size))
+        identities = [node.identity for node in sample]
+        cy_ids = [node.cy_id for node in sample]
+
+        def get_by_identity():
+            for identity in identities:
+                node_set[identity]
+
+        def contains_identity():
+            for identity in identities:
+                identity in node_set
+
+        def get_by_cy_id():
+            for cy_id in cy_ids:
+                node_set.get_by_cy_id(cy_id)
+
+        def scan():
+            for identity in identities:
+                linear_scan(node_set, identity)
+
+        lookup_num = len(identities)
+        rows.append((
+            size,
+            format_seconds(time_it(get_by_identity) / lookup_num),
+            format_seconds(time_it(contains_identity) / lookup_num),
+            format_seconds(time_it(get_by_cy_id) / lookup_num),
+            format_seconds(time_it(scan, repeat=1) / lookup_num) if size <= LINEAR_SCAN_SIZE_LIMIT else '-',
+        ))
+
+    print_table(('elements', 'set[identity]', 'identity in set', 'get_by_cy_id', 'linear scan'), rows)
+
+
+if __name__ == '__main__':
+    main()
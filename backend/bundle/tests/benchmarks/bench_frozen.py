@@ -0,0 +1,71 @@
+"""
+frozen graph benchmark
+
+Compares a breadth first search written against `Graph.neighbors` with `FrozenGraph.bfs_ids`,
+which walks the flat CSR buffers, and the pickled size and pickling time of both graphs.
+The graph is a random undirected graph with an average degree of ten.
+
+    python -m bundle.tests.benchmarks.bench_frozen
+"""
+from __future__ import annotations
+
+import pickle
+import random
+from collections import deque
+
+from bundle.GraphObjects.Edge import Edge
+from bundle.GraphObjects.Graph import Graph
+from bundle.GraphObjects.Node import Node
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes
+
+NODE_NUM = 100_000
+EDGE_NUM = 500_000
+
+
+def generate_random_graph(node_num: int, edge_num: int) -> Graph:
+    nodes = generate_nodes(node_num)
+    edges = [Edge(f'e{i}', tuple(random.sample(nodes, 2))) for i in range(edge_num)]
+    return Graph(nodes, edges)
+
+
+def bfs_on_graph(graph: Graph, source: Node) -> list:
+    visited = {source}
+    order = [source]
+    queue = deque(order)
+    while queue:
+        node = queue.popleft()
+        for neighbor in graph.neighbors(node):
+            if neighbor not in visited:
+                visited.add(neighbor)
+                order.append(neighbor)
+                queue.append(neighbor)
+    return order
+
+
+def main() -> None:
+    graph = generate_random_graph(NODE_NUM, EDGE_NUM)
+    source = next(iter(graph.V))
+
+    freeze_time = time_it(graph.freeze, repeat=3)
+    frozen = graph.freeze()
+    source_id = frozen.node_id(source)
+    assert len(bfs_on_graph(graph, source)) == len(frozen.bfs_ids(source_id))
+
+    graph_pickle = pickle.dumps(graph)
+    frozen_pickle = pickle.dumps(frozen)
+
+    print(f'{NODE_NUM} nodes, {EDGE_NUM} edges, freezing takes {format_seconds(freeze_time)}')
+    print_table(('graph', 'bfs', 'pickled size', 'dumps', 'loads'), [
+        ('Graph', format_seconds(time_it(lambda: bfs_on_graph(graph, source), repeat=3)),
+         f'{len(graph_pickle) / 2 ** 20:.1f}MiB',
+         format_seconds(time_it(lambda: pickle.dumps(graph), repeat=3)),
+         format_seconds(time_it(lambda: pickle.loads(graph_pickle), repeat=3))),
+        ('FrozenGraph', format_seconds(time_it(lambda: frozen.bfs_ids(source_id), repeat=3)),
+         f'{len(frozen_pickle) / 2 ** 20:.1f}MiB',
+         format_seconds(time_it(lambda: pickle.dumps(frozen), repeat=3)),
+         format_seconds(time_it(lambda: pickle.loads(frozen_pickle), repeat=3))),
+    ])
+
+
+if __name__ == '__main__':
+    main()
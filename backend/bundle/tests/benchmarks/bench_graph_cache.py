@@ -0,0 +1,34 @@
+"""
+graph template cache benchmark
+
+Compares parsing a cyjs document on every execution, which the user server used to do,
+with cloning the cached template of the document.
+
+    python -m bundle.tests.benchmarks.bench_graph_cache
+"""
+from __future__ import annotations
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.utils.graph_cache import GraphTemplateCache
+from bundle.tests.benchmarks.bench_parser import generate_cyjs_string
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table
+
+SIZES = ((50, 150), (1_000, 3_000), (10_000, 30_000))
+
+
+def main() -> None:
+    rows = []
+    for node_num, edge_num in SIZES:
+        cyjs_string = generate_cyjs_string(node_num, edge_num)
+        cache = GraphTemplateCache(max_entries=1, max_size=len(cyjs_string))
+        cache.get_template(cyjs_string)
+
+        parse_time = time_it(lambda: Graph.graph_generator(cyjs_string), repeat=5)
+        clone_time = time_it(lambda: cache.get_clone(cyjs_string), repeat=5)
+        rows.append((node_num, edge_num, f'{len(cyjs_string) / 2 ** 20:.2f}MiB',
+                     format_seconds(parse_time), format_seconds(clone_time), f'{parse_time / clone_time:.1f}x'))
+    print_table(('nodes', 'edges', 'json', 'parse', 'cached clone', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+graph json encoding benchmark
+
+Compares `generate_json_object`, which used to dump the graph to a json string and load it
+back, with building the dict directly, and `generate_json` with streaming the json into a file.
+
+    python -m bundle.tests.benchmarks.bench_graph_json
+"""
+from __future__ import annotations
+
+import io
+import json
+import random
+import tracemalloc
+
+from bundle.GraphObjects.Edge import Edge
+from bundle.GraphObjects.Graph import MutableGraph
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes
+
+NODE_NUM = 25_000
+EDGE_NUM = 75_000
+
+
+def generate_graph() -> MutableGraph:
+    nodes = generate_nodes(NODE_NUM)
+    for i, node in enumerate(nodes):
+        node.update_properties({'weight': i, 'label': f'node {i}'})
+    edges = [Edge(f'e{i}', (random.choice(nodes), random.choice(nodes))) for i in range(EDGE_NUM)]
+    return MutableGraph(nodes, edges)
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    graph = generate_graph()
+    assert graph.generate_json_object() == json.loads(graph.generate_json())
+
+    def write_string() -> None:
+        io.StringIO().write(graph.generate_json())
+
+    def write_stream() -> None:
+        graph.dump_json(io.StringIO())
+
+    rows = []
+    for name, func in (('dumps -> loads', lambda: json.loads(graph.generate_json())),
+                       ('direct dict', graph.generate_json_object),
+                       ('generate_json -> file', write_string),
+                       ('dump_json -> file', write_stream)):
+        rows.append((name, format_seconds(time_it(func, repeat=3))))
+    print(f'{NODE_NUM} nodes, {EDGE_NUM} edges')
+    print_table(('operation', 'time'), rows)
+
+    class NullFile:
+        @staticmethod
+        def write(_: str) -> None:
+            pass
+
+    print_table(('writer', 'peak memory'), [
+        ('generate_json', f'{peak_memory(lambda: NullFile.write(graph.generate_json())) / 2 ** 20:.2f}MiB'),
+        ('dump_json', f'{peak_memory(lambda: graph.dump_json(NullFile)) / 2 ** 20:.2f}MiB'),
+    ])
+
+
+if __name__ == '__main__':
+    main()
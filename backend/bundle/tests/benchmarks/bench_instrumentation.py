@@ -0,0 +1,111 @@
+"""
+instrumentation benchmark
+
+Runs the same traced functions compiled as they are, and traced with `sys.settrace`, and
+compiled with `seeker.instrument`, which records the same steps from the rewritten functions.
+Both record only. Reports the best time spent per recorded line.
+
+    python -m bundle.tests.benchmarks.bench_instrumentation
+"""
+from __future__ import annotations
+
+import textwrap
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.seeker import tracer
+from bundle.seeker.instrument import INSTRUMENTATION_AVAILABLE, compile_instrumented, is_instrumented
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes, \
+    generate_path_edges
+
+REPEAT = 50
+
+SOURCE = textwrap.dedent('''\
+    from bundle.seeker import tracer
+
+
+    @tracer('node', 'degree', 'visited', record_only=True)
+    def graph_loop(graph):
+        visited = []
+        for node in graph.V:
+            degree = graph.degree(node)
+            visited.append(node)
+        return visited
+
+
+    @tracer('total', record_only=True)
+    def counting(n):
+        total = 0
+        for i in range(n):
+            square = i * i
+            if square % 2:
+                continue
+            total += square
+        return total
+
+
+    @tracer(only_watch=False, record_only=True)
+    def searching(items, target):
+        low, high = 0, len(items) - 1
+        steps = 0
+        while low <= high:
+            middle = (low + high) // 2
+            steps += 1
+            if items[middle] < target:
+                low = middle + 1
+            elif items[middle] > target:
+                high = middle - 1
+            else:
+                return middle, steps
+        return -1, steps
+    ''')
+
+
+def make_workloads(instrument: bool):
+    namespace = {}
+    code = compile_instrumented(SOURCE, '<bench_instrumentation>') if instrument else \
+        compile(SOURCE, '<bench_instrumentation>', 'exec')
+    exec(code, namespace)
+    assert is_instrumented(namespace['counting'].__code__) == instrument
+
+    nodes = generate_nodes(50)
+    graph = Graph(nodes, generate_path_edges(nodes))
+    items = list(range(0, 300, 3))
+    return {
+        'graph loop (watched variables)': lambda: namespace['graph_loop'](graph),
+        'counting (one watched variable)': lambda: namespace['counting'](100),
+        'binary search (all locals)': lambda: [namespace['searching'](items, target) for target in range(0, 300, 11)],
+    }
+
+
+def main() -> None:
+    if not INSTRUMENTATION_AVAILABLE:
+        print('The instrumentation needs python 3.9+')
+        return
+
+    results = {}
+    for instrument in (False, True):
+        for name, workload in make_workloads(instrument).items():
+            # the tracers keep the recorder they are created with
+            recorder = tracer.get_recorder()
+            recorder.purge()
+            workload()
+            records = len(recorder.get_change_list())
+
+            def run():
+                recorder.purge()
+                workload()
+
+            results[name, instrument] = (time_it(run, repeat=REPEAT), records)
+
+    rows = []
+    for name in make_workloads(False):
+        traced_time, records = results[name, False]
+        instrumented_time, instrumented_records = results[name, True]
+        assert records == instrumented_records
+        rows.append((name, records, format_seconds(traced_time / records),
+                     format_seconds(instrumented_time / records), f'{traced_time / instrumented_time:.2f}x'))
+    print_table(('workload', 'lines', 'settrace per line', 'instrumented per line', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
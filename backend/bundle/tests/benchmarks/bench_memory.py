@@ -0,0 +1,62 @@
+"""
+graph memory benchmark
+
+Reports the bytes held per element by a graph built with `Graph.graph_generator`,
+which is how the user server builds graphs. Half of the elements are nodes and the
+other half are edges linking them into a path. The cyjs input is created before
+the measurement starts, so only the graph objects are counted.
+
+    python -m bundle.tests.benchmarks.bench_memory
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+from typing import Mapping
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.tests.benchmarks.utils import print_table
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def generate_cyjs(element_num: int) -> Mapping:
+    node_num = element_num // 2
+    return {
+        'elements': {
+            'nodes': [{'data': {'id': f'n{i}'}} for i in range(node_num)],
+            'edges': [{'data': {'id': f'e{i}', 'source': f'n{i}', 'target': f'n{i + 1}'}}
+                      for i in range(element_num - node_num)
+                      if i + 1 < node_num],
+        }
+    }
+
+
+def measure(element_num: int) -> tuple:
+    cyjs = generate_cyjs(element_num)
+    actual_element_num = len(cyjs['elements']['nodes']) + len(cyjs['elements']['edges'])
+    gc.collect()
+    tracemalloc.start()
+    graph = Graph.graph_generator(cyjs)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    node = next(iter(graph.V))
+    edge = next(iter(graph.E))
+    return (
+        actual_element_num,
+        f'{size / actual_element_num:.1f}',
+        hasattr(node, '__dict__'),
+        sys.getsizeof(node) + sys.getsizeof(getattr(node, '__dict__', {})),
+        sys.getsizeof(edge) + sys.getsizeof(getattr(edge, '__dict__', {})),
+    )
+
+
+def main() -> None:
+    print_table(('elements', 'bytes per element', '__dict__', 'node shell bytes', 'edge shell bytes'),
+                [measure(size) for size in SIZES])
+
+
+if __name__ == '__main__':
+    main()
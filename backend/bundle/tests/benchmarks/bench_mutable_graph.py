@@ -0,0 +1,86 @@
+"""
+mutable graph benchmark
+
+Builds a random graph with `add_node`/`add_edge` and with `add_nodes_from`/`add_edges_from`,
+then prunes a fifth of its nodes. The old `remove_node` scanned every edge for each node;
+it is emulated here on a few nodes and extrapolated, since a full run takes far too long.
+
+    python -m bundle.tests.benchmarks.bench_mutable_graph
+"""
+from __future__ import annotations
+
+import random
+import time
+
+from bundle.GraphObjects.Graph import MutableGraph
+from bundle.GraphObjects.Node import Node
+from bundle.tests.benchmarks.utils import format_seconds, print_table
+
+NODE_NUM = 50_000
+EDGE_NUM = 200_000
+SCANNED_NODE_NUM = 5
+
+
+def generate_edge_pairs() -> list:
+    return [(f'e{i}', (f'n{random.randrange(NODE_NUM)}', f'n{random.randrange(NODE_NUM)}')) for i in range(EDGE_NUM)]
+
+
+def build_one_by_one(edge_pairs: list) -> MutableGraph:
+    graph = MutableGraph()
+    for i in range(NODE_NUM):
+        graph.add_node(f'n{i}')
+    for identity, node_pair in edge_pairs:
+        graph.add_edge(identity, node_pair)
+    return graph
+
+
+def build_in_batch(edge_pairs: list) -> MutableGraph:
+    graph = MutableGraph()
+    graph.add_nodes_from(f'n{i}' for i in range(NODE_NUM))
+    graph.add_edges_from(edge_pairs)
+    return graph
+
+
+def remove_node_by_scanning(graph: MutableGraph, node: Node) -> None:
+    related_edges = [edge for edge in graph.edges if node in edge]
+    graph.remove_edges_from(related_edges)
+    graph.nodes.remove_node(node)
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    edge_pairs = generate_edge_pairs()
+    pruned = [f'n{i}' for i in random.sample(range(NODE_NUM), NODE_NUM // 5)]
+
+    start = time.perf_counter()
+    graph = build_one_by_one(edge_pairs)
+    one_by_one_time = time.perf_counter() - start
+    start = time.perf_counter()
+    batch_graph = build_in_batch(edge_pairs)
+    batch_time = time.perf_counter() - start
+    assert len(graph.E) == len(batch_graph.E)
+
+    scan_time = sum(timed(remove_node_by_scanning, graph, graph.get_node(node))
+                    for node in pruned[:SCANNED_NODE_NUM]) / SCANNED_NODE_NUM
+    remove_time = sum(timed(graph.remove_node, node, True) for node in pruned[SCANNED_NODE_NUM:])
+    remove_time /= len(pruned) - SCANNED_NODE_NUM
+    batch_remove_time = timed(batch_graph.remove_nodes_from, pruned, True)
+    assert len(graph.E) == len(batch_graph.E)
+
+    print(f'{NODE_NUM} nodes, {EDGE_NUM} edges, removing {len(pruned)} nodes')
+    print_table(('operation', 'time'), [
+        ('build with add_node/add_edge', format_seconds(one_by_one_time)),
+        ('build with add_nodes_from/add_edges_from', format_seconds(batch_time)),
+        ('prune with the old edge scan', format_seconds(scan_time * len(pruned)) + ' (extrapolated)'),
+        ('prune with remove_node', format_seconds(remove_time * len(pruned))),
+        ('prune with remove_nodes_from', format_seconds(batch_remove_time)),
+    ])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+cyjs parsing benchmark
+
+Times `Graph.graph_generator` on a generated multi-megabyte cyjs document given as
+a string, as bytes and as a file, and reports the peak memory traced while parsing.
+The document is created before the measurement starts, so only the parsing is counted.
+
+    python -m bundle.tests.benchmarks.bench_parser
+"""
+from __future__ import annotations
+
+import gc
+import io
+import json
+import random
+import tracemalloc
+from typing import Callable
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table
+
+NODE_NUM = 50_000
+EDGE_NUM = 150_000
+
+
+def generate_cyjs_string(node_num: int, edge_num: int) -> str:
+    return json.dumps({
+        'elements': {
+            'nodes': [{'data': {'id': f'n{i}', 'name': f'n{i}', 'value': f'n{i}',
+                                'displayed': {'degree': 0, 'clustering_coefficient': random.random()}},
+                       'position': {'x': random.random() * 1000, 'y': random.random() * 1000},
+                       'group': 'nodes', 'removed': False, 'selected': False, 'selectable': True,
+                       'locked': False, 'grabbable': True, 'pannable': False, 'classes': ''}
+                      for i in range(node_num)],
+            'edges': [{'data': {'id': f'e{i}', 'name': f'e{i}',
+                                'source': f'n{random.randrange(node_num)}',
+                                'target': f'n{random.randrange(node_num)}',
+                                'displayed': {'weight': random.random()}},
+                       'position': {}, 'group': 'edges', 'removed': False, 'selected': False,
+                       'selectable': True, 'locked': False, 'grabbable': True, 'pannable': True, 'classes': ''}
+                      for i in range(edge_num)],
+        },
+        'style': [{'selector': 'node', 'style': {'label': 'data(id)'}}],
+        'zoom': 1,
+        'pan': {'x': 0, 'y': 0},
+    })
+
+
+def peak_memory(func: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    cyjs_string = generate_cyjs_string(NODE_NUM, EDGE_NUM)
+    cyjs_bytes = cyjs_string.encode()
+    print(f'{NODE_NUM} nodes, {EDGE_NUM} edges, {len(cyjs_bytes) / 2 ** 20:.1f}MiB of json')
+
+    inputs = [
+        ('str', lambda: Graph.graph_generator(cyjs_string)),
+        ('bytes', lambda: Graph.graph_generator(cyjs_bytes)),
+        ('binary file', lambda: Graph.graph_generator(io.BytesIO(cyjs_bytes))),
+        ('json.loads + mapping', lambda: Graph.graph_generator(json.loads(cyjs_string))),
+    ]
+    rows = []
+    for name, func in inputs:
+        try:
+            rows.append((name, format_seconds(time_it(func, repeat=3)), f'{peak_memory(func) / 2 ** 20:.1f}MiB'))
+        except Exception as e:
+            rows.append((name, f'unsupported ({type(e).__name__})', ''))
+    print_table(('input', 'time', 'peak memory'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+pooled change list benchmark
+
+Runs the programs written like the tutorials, the ones of the user server tests and a
+breadth first search, on a generated graph through the user server, and compares the json
+size of their records as they are, as deltas, pooled, and pooled deltas.
+
+    python -m bundle.tests.benchmarks.bench_pooled_output
+"""
+from __future__ import annotations
+
+import json
+import pathlib
+import textwrap
+
+from bundle.GraphObjects.Edge import Edge
+from bundle.GraphObjects.Graph import MutableGraph
+from bundle.server_utils.utils import execute
+from bundle.tests.benchmarks.utils import print_table, generate_nodes
+
+NODE_NUM = 30
+
+CODE_FOLDER = pathlib.Path(__file__).parent.parent / 'user_server_tests' / 'test_files' / 'code'
+
+BFS_CODE = textwrap.dedent('''\
+    from bundle.seeker import tracer
+    from bundle.utils.dummy_graph import graph_object
+
+
+    @tracer('node', 'neighbor', 'visited', 'queue')
+    def main() -> None:
+        start = next(iter(graph_object.V))
+        visited = {start}
+        queue = [start]
+        while queue:
+            node = queue.pop(0)
+            for edge in graph_object.edges:
+                if node in edge:
+                    neighbor = edge.get_final_node() if edge.get_incident_node() == node else edge.get_incident_node()
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        queue.append(neighbor)
+    ''')
+
+
+def make_graph_json() -> dict:
+    nodes = generate_nodes(NODE_NUM)
+    edges = [Edge(f'e{i}', (nodes[i], nodes[(i * 7 + 1) % NODE_NUM])) for i in range(NODE_NUM)]
+    return MutableGraph(nodes, edges).generate_json_object()
+
+
+def main() -> None:
+    graph_json = make_graph_json()
+    programs = {path.name: path.read_text() for path in sorted(CODE_FOLDER.glob('*.py')) if path.name != '__init__.py'}
+    programs['breadth first search'] = BFS_CODE
+
+    rows = []
+    for name, code in programs.items():
+        sizes = []
+        for options in ({}, {'delta': True}, {'pooled': True}, {'delta': True, 'pooled': True}):
+            _, records, _ = execute(code, graph_json, auto_delete_cache=True, **options)
+            sizes.append(len(json.dumps(records)))
+        rows.append((name, *(f'{size / 1024:.1f}KiB' for size in sizes),
+                     f'{sizes[0] / sizes[2]:.1f}x', f'{sizes[0] / sizes[3]:.1f}x'))
+    print(f'{NODE_NUM} nodes, {NODE_NUM} edges')
+    print_table(('program', 'full', 'delta', 'pooled', 'pooled delta', 'pooled ratio', 'pooled delta ratio'), rows)
+
+
+if __name__ == '__main__':
+    main()
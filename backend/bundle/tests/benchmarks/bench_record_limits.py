@@ -0,0 +1,49 @@
+"""
+record limits benchmark
+
+Records a degree dict of a 20k node graph, the way a watched `degree_dict` is recorded at
+every step it changes, with no limits and with the limits below.
+Reports the json size and the best time of one state.
+
+    python -m bundle.tests.benchmarks.bench_record_limits
+"""
+from __future__ import annotations
+
+import json
+
+from bundle.utils.recorder import Recorder
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes
+
+NODE_NUM = 20_000
+REPEAT = 5
+MAX_CONTAINER_LENGTH = 1000
+MAX_CONTAINER_DEPTH = 10
+MAX_REPR_LENGTH = 1000
+
+
+def main() -> None:
+    nodes = generate_nodes(NODE_NUM)
+    values = {
+        'degree dict': {node: i % 7 for i, node in enumerate(nodes)},
+        'node list': nodes,
+        'long string': 'x' * 100_000,
+    }
+
+    rows = []
+    for name, value in values.items():
+        results = []
+        for limits in ((), (MAX_CONTAINER_LENGTH, MAX_CONTAINER_DEPTH, MAX_REPR_LENGTH)):
+            recorder = Recorder(*limits)
+            identifier_string = recorder.register_variable(('main', 'value'))
+            size = len(json.dumps(recorder.process_variable_state(identifier_string, value)))
+            results.append((size, time_it(lambda: recorder.process_variable_state(identifier_string, value),
+                                          repeat=REPEAT)))
+        (full_size, full_time), (limited_size, limited_time) = results
+        rows.append((name, f'{full_size / 1024:.1f}KiB', f'{limited_size / 1024:.1f}KiB',
+                     format_seconds(full_time), format_seconds(limited_time)))
+    print(f'limits: {MAX_CONTAINER_LENGTH} elements, {MAX_CONTAINER_DEPTH} levels, {MAX_REPR_LENGTH} characters')
+    print_table(('value', 'full size', 'limited size', 'full time', 'limited time'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+record-only tracer benchmark
+
+Traces the same functions with the text log sent to a logger, as the server does, with the log
+lines formatted and thrown away, and with `record_only`, which never formats them. Reports the
+best time spent per recorded line.
+
+    python -m bundle.tests.benchmarks.bench_record_only
+"""
+from __future__ import annotations
+
+import io
+import logging
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.seeker import tracer
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes, \
+    generate_path_edges
+
+REPEAT = 50
+
+
+def make_logger() -> logging.Logger:
+    logger = logging.getLogger('bench_record_only')
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    handler = logging.StreamHandler(io.StringIO())
+    # the format of the controller logger
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+    return logger
+
+
+def make_workloads(**tracer_options):
+    nodes = generate_nodes(50)
+    graph = Graph(nodes, generate_path_edges(nodes))
+
+    @tracer('node', 'degree', 'visited', **tracer_options)
+    def graph_loop():
+        visited = []
+        for node in graph.V:
+            degree = graph.degree(node)
+            visited.append(node)
+        return visited
+
+    @tracer(only_watch=False, **tracer_options)
+    def counting(n):
+        total = 0
+        squares = []
+        for i in range(n):
+            total += i
+            squares.append(i * i)
+        return total, squares
+
+    return {
+        'graph loop (watched variables)': graph_loop,
+        'counting (all locals)': lambda: counting(100),
+    }
+
+
+def main() -> None:
+    logger = make_logger()
+    modes = {
+        'logger': {'log_output': True},
+        'discarded log': {'output': lambda _: None},
+        'record only': {'record_only': True},
+    }
+
+    results = {}
+    tracer.set_logger(logger)
+    try:
+        for mode, options in modes.items():
+            for name, workload in make_workloads(**options).items():
+                # the tracers keep the recorder they are created with
+                recorder = tracer.get_recorder()
+                recorder.purge()
+                workload()
+                records = len(recorder.get_change_list())
+
+                def run():
+                    recorder.purge()
+                    workload()
+
+                results[name, mode] = (time_it(run, repeat=REPEAT), records)
+    finally:
+        tracer.set_logger(None)
+
+    rows = []
+    for name in make_workloads():
+        logger_time, records = results[name, 'logger']
+        discarded_time, _ = results[name, 'discarded log']
+        record_only_time, record_only_records = results[name, 'record only']
+        assert records == record_only_records
+        rows.append((name, records, format_seconds(logger_time / records),
+                     format_seconds(discarded_time / records), format_seconds(record_only_time / records),
+                     f'{logger_time / record_only_time:.2f}x'))
+    print_table(('workload', 'lines', 'logger per line', 'discarded per line', 'record only per line',
+                 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+tracer backend benchmark
+
+Runs the seeker samples, and a traced function that calls untraced library code, with the
+`sys.settrace` backend and with the `sys.monitoring` backend, and reports the best time spent per
+recorded line. The backend is picked by `SEEKER_MONITORING_FLAG` when the tracers are created,
+so every backend runs in its own process. The monitoring backend needs python 3.12+, and the
+samples traced with `depth > 1` use `sys.settrace` with both.
+
+    python -m bundle.tests.benchmarks.bench_tracer_backend
+"""
+from __future__ import annotations
+
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+
+from bundle.tests.benchmarks.utils import format_seconds, print_table
+
+REPEAT = 200
+_WORKER_ARGUMENT = '--worker'
+
+
+def run_worker() -> None:
+    from bundle.GraphObjects.Graph import Graph
+    from bundle.seeker import tracer
+    from bundle.tests.benchmarks.utils import generate_nodes, generate_path_edges
+    from bundle.tests.seeker_tests.samples import recorder, indentation, recursion, exception
+
+    nodes = generate_nodes(100)
+    graph = Graph(nodes, generate_path_edges(nodes))
+
+    @tracer('node', 'total')
+    def library_calls():
+        # every traced line runs about a hundred calls of untraced python code
+        total = 0
+        for node in graph.V:
+            total += sum(graph.degree(neighbor) for neighbor in graph.V if neighbor >= node)
+        return total
+
+    workloads = {
+        'recorder samples (depth 1)': lambda: (recorder.simple_loop_trace_non(), recorder.simple_loop_trace_index(),
+                                               recorder.simple_while_loop_trace_index()),
+        'indentation and recursion (depth 2)': lambda: (indentation.main(), recursion.main()),
+        'exception (depth 3)': exception.main,
+        'library calls (depth 1)': library_calls,
+    }
+
+    results = {}
+    for name, workload in workloads.items():
+        best = float('inf')
+        gc.disable()
+        for _ in range(REPEAT):
+            # the tracers keep the recorder they are created with
+            tracer.get_recorder().purge()
+            start = time.perf_counter()
+            workload()
+            best = min(best, time.perf_counter() - start)
+        gc.enable()
+        results[name] = (best, len(tracer.get_recorder_change_list()))
+    print(json.dumps(results))
+
+
+def run_backend(use_monitoring: bool) -> dict:
+    env = {**os.environ, 'SEEKER_MONITORING_FLAG': str(int(use_monitoring)),
+           'SEEKER_DEFAULT_OUTPUT_FLAG': '0', 'SEEKER_LOG_OUTPUT_FLAG': '0'}
+    output = subprocess.run([sys.executable, '-m', __spec__.name, _WORKER_ARGUMENT], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    if not hasattr(sys, 'monitoring'):
+        print(f'sys.monitoring is not available in python {sys.version.split()[0]}, '
+              f'both runs use sys.settrace.')
+
+    # the later processes tend to run faster, so each backend runs first once and the best runs are kept
+    settrace_runs = [run_backend(use_monitoring=False)]
+    monitoring_runs = [run_backend(use_monitoring=True)]
+    monitoring_runs.append(run_backend(use_monitoring=True))
+    settrace_runs.append(run_backend(use_monitoring=False))
+    settrace_results = {name: min(run[name] for run in settrace_runs) for name in settrace_runs[0]}
+    monitoring_results = {name: min(run[name] for run in monitoring_runs) for name in monitoring_runs[0]}
+
+    rows = []
+    for name, (settrace_time, records) in settrace_results.items():
+        monitoring_time, monitoring_records = monitoring_results[name]
+        assert records == monitoring_records
+        rows.append((name, f'{records:.0f}', format_seconds(settrace_time / records),
+                     format_seconds(monitoring_time / records), f'{settrace_time / monitoring_time:.2f}x'))
+    print_table(('workload', 'lines', 'settrace per line', 'monitoring per line', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    if _WORKER_ARGUMENT in sys.argv:
+        run_worker()
+    else:
+        main()
@@ -0,0 +1,53 @@
+"""
+type classification benchmark
+
+Records large nested containers with the type strings looked up per type, and with the
+`isinstance` checks against the abcs of `Recorder._TYPE_MAPPING` done for every value, as
+before the lookup. Reports the best time spent per recorded state.
+
+    python -m bundle.tests.benchmarks.bench_type_search
+"""
+from __future__ import annotations
+
+from collections import Counter, deque
+
+from bundle.GraphObjects.Base import ElementSet
+from bundle.GraphObjects.Node import Node
+from bundle.utils.recorder import Recorder
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes, count_states
+
+REPEAT = 10
+
+
+class UncachedRecorder(Recorder):
+    def _search_type_string(self, variable_state):
+        return self._find_type_string(variable_state)
+
+
+def make_values():
+    nodes = generate_nodes(200)
+    return {
+        'nested lists': [[i, str(i), [i * 0.5, None]] for i in range(500)],
+        'dict of tuples': {str(i): (i, i + 1, (i, 'x')) for i in range(500)},
+        'counters and deques': [Counter(range(i % 10)) for i in range(200)] + [deque(range(20)) for _ in range(50)],
+        'graph objects': [ElementSet(nodes[:20], Node), {node: [node] for node in nodes}],
+    }
+
+
+def main() -> None:
+    rows = []
+    for name, value in make_values().items():
+        times = {}
+        for recorder_cls in (UncachedRecorder, Recorder):
+            recorder = recorder_cls()
+            identifier_string = recorder.register_variable(('main', 'value'))
+            states = count_states(recorder.process_variable_state(identifier_string, value))
+            times[recorder_cls] = time_it(lambda: recorder.process_variable_state(identifier_string, value),
+                                          repeat=REPEAT)
+        rows.append((name, states, format_seconds(times[UncachedRecorder] / states),
+                     format_seconds(times[Recorder] / states), f'{times[UncachedRecorder] / times[Recorder]:.2f}x'))
+    print_table(('value', 'states', 'isinstance per state', 'cached per state', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
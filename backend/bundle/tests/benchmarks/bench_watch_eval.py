@@ -0,0 +1,70 @@
+"""
+watch expression evaluation benchmark
+
+Evaluates the watch expressions of a traced frame at every line. Compares `eval` for each
+expression with the direct lookups of the simple expressions in one pass.
+
+    python -m bundle.tests.benchmarks.bench_watch_eval
+"""
+from __future__ import annotations
+
+import sys
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.seeker.variables import CommonVariable, Exploding
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes, \
+    generate_path_edges
+
+NUMBER = 20_000
+
+
+def eval_each(variables, frame):
+    # what every line did before: `eval` and a fresh read of the frame for each expression,
+    # and exploding variables compiled their explosions again
+    for variable in variables:
+        if isinstance(variable, Exploding):
+            variable._explosions.clear()
+        accessor = variable.accessor
+        variable.accessor = None
+        try:
+            sorted(variable.values(frame))
+        finally:
+            variable.accessor = accessor
+
+
+def evaluate_all(variables, frame):
+    # what `get_local_values` does: one read of the frame for all the expressions
+    frame_globals = frame.f_globals or {}
+    frame_locals = frame.f_locals
+    for variable in variables:
+        sorted(variable.evaluate(frame_globals, frame_locals))
+
+
+def main() -> None:
+    nodes = generate_nodes(10)
+    graph = Graph(nodes, generate_path_edges(nodes))
+    node = nodes[0]
+    edge = next(iter(graph.E))
+    distances = {node: 0}
+    # `a` to `h` are the other locals of a typical tutorial function
+    a, b, c, d, e, f, g, h = range(8)
+
+    workloads = {
+        'names': [CommonVariable(source) for source in ('node', 'edge', 'distances', 'graph')],
+        'attributes and subscripts': [CommonVariable(source) for source in
+                                      ('node.identity', 'edge.u', 'distances[0]', 'graph.V')],
+        'exploding': [Exploding('distances')],
+    }
+
+    frame = sys._getframe()
+    rows = []
+    for name, variables in workloads.items():
+        eval_time = time_it(lambda: eval_each(variables, frame), number=NUMBER)
+        batched_time = time_it(lambda: evaluate_all(variables, frame), number=NUMBER)
+        rows.append((name, len(variables), format_seconds(eval_time), format_seconds(batched_time),
+                     f'{eval_time / batched_time:.2f}x'))
+    print_table(('watches', 'expressions', 'eval per line', 'batched per line', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+write set benchmark
+
+Runs the same functions traced with and without the write sets of their lines, which let
+the tracer keep the values of the variables a line cannot change. Both record only, and
+record the same steps. Reports the best time spent per recorded line.
+
+    python -m bundle.tests.benchmarks.bench_write_set
+"""
+from __future__ import annotations
+
+from bundle.GraphObjects.Graph import Graph
+from bundle.seeker import tracer
+from bundle.tests.benchmarks.utils import time_it, format_seconds, print_table, generate_nodes, \
+    generate_path_edges
+
+REPEAT = 50
+
+
+def make_workloads(use_write_sets: bool):
+    watch_tracer = tracer('total', 'visited', 'steps', record_only=True, use_write_sets=use_write_sets)
+    locals_tracer = tracer(only_watch=False, record_only=True, use_write_sets=use_write_sets)
+
+    @watch_tracer
+    def graph_loop(graph):
+        visited = []
+        for node in graph.V:
+            degree = graph.degree(node)
+            if degree > 1:
+                visited.append(node)
+        return visited
+
+    @watch_tracer
+    def counting(n):
+        total = 0
+        i = 0
+        while i < n:
+            square = i * i
+            if square % 2:
+                i = i + 1
+                continue
+            total = total + square
+            i = i + 1
+        return total
+
+    @locals_tracer
+    def searching(items, target):
+        low, high = 0, len(items) - 1
+        steps = 0
+        while low <= high:
+            middle = (low + high) // 2
+            steps = steps + 1
+            if items[middle] < target:
+                low = middle + 1
+            elif items[middle] > target:
+                high = middle - 1
+            else:
+                return middle, steps
+        return -1, steps
+
+    nodes = generate_nodes(50)
+    graph = Graph(nodes, generate_path_edges(nodes))
+    items = list(range(0, 300, 3))
+    return {
+        'graph loop (watched variables)': lambda: graph_loop(graph),
+        'counting (watched variable)': lambda: counting(100),
+        'binary search (all locals)': lambda: [searching(items, target) for target in range(0, 300, 11)],
+    }
+
+
+def main() -> None:
+    results = {}
+    for use_write_sets in (False, True):
+        for name, workload in make_workloads(use_write_sets).items():
+            # the tracers keep the recorder they are created with
+            recorder = tracer.get_recorder()
+            recorder.purge()
+            workload()
+            records = len(recorder.get_change_list())
+
+            def run():
+                recorder.purge()
+                workload()
+
+            results[name, use_write_sets] = (time_it(run, repeat=REPEAT), records)
+
+    rows = []
+    for name in make_workloads(False):
+        full_time, records = results[name, False]
+        write_set_time, write_set_records = results[name, True]
+        assert records == write_set_records
+        rows.append((name, records, format_seconds(full_time / records),
+                     format_seconds(write_set_time / records), f'{full_time / write_set_time:.2f}x'))
+    print_table(('workload', 'lines', 'full snapshots per line', 'write sets per line', 'speedup'), rows)
+
+
+if __name__ == '__main__':
+    main()
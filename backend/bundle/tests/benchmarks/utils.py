@@ -0,0 +1,88 @@
+"""
+helpers shared by the benchmark scripts
+
+The benchmarks are not collected by pytest. Run them from the `backend` folder, for example::
+
+    python -m bundle.tests.benchmarks.bench_element_set
+"""
+from __future__ import annotations
+
+import gc
+import time
+from typing import Callable, Iterable, List, Mapping, Sequence, Tuple
+
+from bundle.GraphObjects.Edge import Edge
+from bundle.GraphObjects.Node import Node
+
+
+def time_it(func: Callable[[], object], repeat: int = 5, number: int = 1) -> float:
+    """
+    run a function `number` times for `repeat` rounds. The garbage collector is
+    turned off while timing, as `timeit` does
+    @param func:
+    @param repeat:
+    @param number:
+    @return: the best seconds spent per call
+    """
+    best = float('inf')
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            best = min(best, (time.perf_counter() - start) / number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return best
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-6:
+        return f'{seconds * 1e9:.1f}ns'
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.2f}us'
+    if seconds < 1:
+        return f'{seconds * 1e3:.2f}ms'
+    return f'{seconds:.2f}s'
+
+
+def print_table(headers: Sequence[str], rows: Iterable[Sequence]) -> None:
+    rows: List[Tuple[str, ...]] = [tuple(str(cell) for cell in row) for row in rows]
+    widths = [max(len(header), *(len(row[i]) for row in rows)) for i, header in enumerate(headers)]
+    print('  '.join(header.rjust(width) for header, width in zip(headers, widths)))
+    for row in rows:
+        print('  '.join(cell.rjust(width) for cell, width in zip(row, widths)))
+
+
+def generate_nodes(node_num: int) -> List[Node]:
+    return [Node(f'n{i}') for i in range(node_num)]
+
+
+def generate_path_edges(nodes: Sequence[Node]) -> List[Edge]:
+    """
+    generate edges that link the nodes into a path
+    @param nodes:
+    @return:
+    """
+    return [Edge(f'e{i}', (nodes[i], nodes[i + 1])) for i in range(len(nodes) - 1)]
+
+
+def count_states(state: Mapping) -> int:
+    """
+    @param state: a state made by `Recorder.process_variable_state`
+    @return: the number of states in it, including the nested ones
+    """
+    count = 1
+    repr_field = state['repr']
+    if isinstance(repr_field, list):
+        for item in repr_field:
+            if 'key' in item and 'value' in item and 'type' not in item:
+                count += count_states(item['key']) + count_states(item['value'])
+            else:
+                count += count_states(item)
+    if 'properties' in state:
+        count += count_states(state['properties'])
+    return count
@@ -107,3 +107,18 @@ def test_mutable_edge_set_remove_edges(mutable_edge_set: MutableEdgeSet):
 
     assert all(edge not in mutable_edge_set for edge in edge_list)
     assert mutable_edge_set.is_empty()
+
+
+def test_mutable_edge_set_index_maintained(mutable_edge_set: MutableEdgeSet):
+    edge = Edge('e1', (Node('1'), Node('2')))
+    mutable_edge_set.add_edge(edge)
+
+    assert mutable_edge_set['e1'] is edge
+    assert mutable_edge_set.get_by_cy_id(edge.cy_id) is edge
+    assert 'e1' in mutable_edge_set
+
+    mutable_edge_set.remove_edge(edge)
+
+    assert mutable_edge_set['e1'] is None
+    assert mutable_edge_set.get_by_cy_id(edge.cy_id) is None
+    assert 'e1' not in mutable_edge_set
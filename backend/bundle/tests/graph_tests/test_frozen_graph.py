@@ -0,0 +1,97 @@
+import pickle
+
+import pytest
+from bundle.GraphObjects.Graph import Graph
+from bundle.GraphObjects.Node import Node
+from bundle.GraphObjects.Edge import Edge
+from .utils import path_join, TEST_PATH
+
+
+@pytest.fixture()
+def simple_graph():
+    with open(path_join(TEST_PATH, 'test_files', 'graphs', 'simple_graph.cyjs')) as file:
+        return Graph.graph_generator(file.read())
+
+
+def test_freeze_matches_graph(simple_graph: Graph):
+    frozen = simple_graph.freeze()
+
+    assert len(frozen) == len(simple_graph.V)
+    assert len(frozen.edges) == len(simple_graph.E)
+    for node in simple_graph.V:
+        assert node in frozen
+        assert frozen.node_of(frozen.node_id(node)) is node
+        assert frozen.degree(node) == simple_graph.degree(node)
+        assert set(frozen.neighbors(node)) == set(simple_graph.neighbors(node))
+        assert set(frozen.incident_edges(node.identity)) == set(simple_graph.incident_edges(node))
+
+
+def test_frozen_traversal(simple_graph: Graph):
+    frozen = simple_graph.freeze()
+
+    bfs_order = frozen.bfs('n0')
+    dfs_order = frozen.dfs('n0')
+    assert bfs_order[0] == dfs_order[0] == Node('n0')
+    # the simple graph is connected
+    assert set(bfs_order) == set(dfs_order) == set(simple_graph.V)
+    # every node reached by dfs after the source is a neighbor of an earlier one
+    for index, node in enumerate(dfs_order[1:], 1):
+        assert any(node in simple_graph.neighbors(visited) for visited in dfs_order[:index])
+
+
+def test_frozen_directed_successors():
+    n1, n2, n3 = Node('1'), Node('2'), Node('3')
+    graph = Graph((n1, n2, n3), (Edge('12', (n1, n2), directed=True), Edge('23', (n2, n3), directed=True)))
+    frozen = graph.freeze()
+
+    assert frozen.successors(n1) == [n2]
+    assert frozen.successors(n2) == [n3]
+    assert frozen.successors(n3) == []
+    assert frozen.bfs(n3) == [n3]
+    assert set(frozen.neighbors(n2)) == {n1, n3}
+
+
+def test_frozen_immutable_and_picklable(simple_graph: Graph):
+    frozen = simple_graph.freeze()
+
+    with pytest.raises(AttributeError):
+        frozen.nodes = ()
+    with pytest.raises(TypeError):
+        frozen.neighbor_ids(0)[0] = 1
+
+    unpickled = pickle.loads(pickle.dumps(frozen))
+    assert [node.identity for node in unpickled.bfs('n0')] == [node.identity for node in frozen.bfs('n0')]
+    assert unpickled.degree('n1') == frozen.degree('n1')
+    for node, unpickled_node in zip(frozen.nodes, unpickled.nodes):
+        assert node == unpickled_node and node.cy_id == unpickled_node.cy_id and node.name == unpickled_node.name
+    for edge, unpickled_edge in zip(frozen.edges, unpickled.edges):
+        assert edge == unpickled_edge and edge.get_nodes() == unpickled_edge.get_nodes()
+        assert unpickled_edge.get_incident_node() is unpickled.node_of(unpickled.endpoint_ids_of(
+            unpickled.edges.index(unpickled_edge))[0])
+
+
+def test_cloned_frozen_picklable(simple_graph: Graph):
+    for node in simple_graph.V:
+        node['label'] = node.identity
+    edge = next(iter(simple_graph.E))
+    edge['weight'] = 1
+    clone = simple_graph.clone()
+
+    frozen = clone.freeze()
+    unpickled = pickle.loads(pickle.dumps(frozen))
+    for node, unpickled_node in zip(frozen.nodes, unpickled.nodes):
+        assert unpickled_node['label'] == node['label'] == node.identity
+    unpickled_edge = unpickled.edges[frozen.edges.index(edge)]
+    assert unpickled_edge['weight'] == 1
+
+    # the unpickled elements do not share their properties any more
+    unpickled_nodes = unpickled.nodes
+    unpickled_nodes[0]['label'] = 'changed'
+    assert all(node['label'] == node.identity for node in unpickled_nodes[1:])
+    assert all(node['label'] == node.identity for node in clone.V)
+
+
+def test_freeze_missing_node():
+    edge = Edge('12', (Node('1'), Node('2')))
+    with pytest.raises(ValueError):
+        Graph((Node('1'),), (edge,)).freeze()
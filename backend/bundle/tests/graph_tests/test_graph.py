@@ -1,3 +1,11 @@
+import copy
+import io
+import json
+import os
+import pickle
+import subprocess
+import sys
+
 import pytest
 from bundle.GraphObjects.Graph import Graph, MutableGraph, GraphLayout
 from bundle.GraphObjects.Node import Node
@@ -189,5 +197,247 @@ def test_mutable_graph_delete_edge(mutable_graph: MutableGraph):
     assert node2 in mutable_graph
 
 
-def test_mutable_graph_generate_json():
-    pass
+def test_mutable_graph_generate_json(simple_graph_js):
+    simple_graph = Graph.graph_generator(simple_graph_js)
+    mutable_graph = MutableGraph(simple_graph.V, simple_graph.E)
+    mutable_graph.set_layout(GraphLayout.fcose)
+    node = mutable_graph.add_node('extra', styles=[{'selector': 'node', 'style': {'color': 'red'}}])
+    node.update_properties({'pair': (1, 2), 1: 'int key', 'node': Node('n0'), 'nested': {'list': [1.5, None]}})
+    mutable_graph.add_edge(edge=Edge('extra edge', (node, mutable_graph.get_node('n0')), directed=True))
+
+    json_string = mutable_graph.generate_json()
+    json_object = mutable_graph.generate_json_object()
+    assert json_object == json.loads(json_string)
+    assert [entry['data']['name'] for entry in json_object['elements']['nodes']] == \
+           [node.identity for node in mutable_graph.V]
+
+    # the dict shares nothing with the graph
+    extra_entry = next(entry for entry in json_object['elements']['nodes'] if entry['data']['name'] == 'extra')
+    extra_entry['style'][0][0]['style']['color'] = 'blue'
+    json_object['layout']['name'] = 'random'
+    assert node.styles[0]['style']['color'] == 'red'
+    assert mutable_graph.layout == GraphLayout.fcose.value
+
+    for batch_size in (1, 2, 1024):
+        assert ''.join(mutable_graph.iter_json(batch_size)) == json_string
+    file = io.StringIO()
+    mutable_graph.dump_json(file, batch_size=3)
+    assert file.getvalue() == json_string
+
+    assert ''.join(MutableGraph().iter_json()) == MutableGraph().generate_json()
+    assert MutableGraph().generate_json_object() == json.loads(MutableGraph().generate_json())
+
+
+def test_graph_insertion_order(simple_graph_js):
+    graph_json = json.loads(simple_graph_js)
+    simple_graph = Graph.graph_generator(simple_graph_js)
+    assert [node.cy_id for node in simple_graph.V] == [entry['data']['id'] for entry in graph_json['elements']['nodes']]
+    assert [edge.identity for edge in simple_graph.E] == [entry['data']['id'] for entry in graph_json['elements']['edges']]
+
+    # the order does not depend on the string hash seed of the process
+    script = ('import sys; from bundle.GraphObjects.Graph import Graph, MutableGraph; '
+              'graph = Graph.graph_generator(sys.stdin.read()); '
+              'print(MutableGraph(graph.V, graph.E).generate_json())')
+    outputs = {subprocess.run([sys.executable, '-c', script], input=simple_graph_js, capture_output=True, text=True,
+                              check=True, cwd=path_join(TEST_PATH, '..', '..', '..'),
+                              env={**os.environ, 'PYTHONHASHSEED': seed}).stdout
+               for seed in ('1', '2')}
+    assert len(outputs) == 1
+
+
+def test_graph_adjacency(simple_graph_js):
+    simple_graph = Graph.graph_generator(simple_graph_js)
+
+    n1 = simple_graph.get_node('n1')
+    assert simple_graph.degree(n1) == 3
+    assert simple_graph.degree('n1') == 3
+    assert {node.identity for node in simple_graph.neighbors(n1)} == {'n0', 'n2', 'n3'}
+    assert {edge.identity for edge in simple_graph.incident_edges('n1')} == {0, 1, 2}
+
+    for node in simple_graph.V:
+        assert simple_graph.degree(node) == sum(1 for edge in simple_graph.E if node in edge)
+
+    assert simple_graph.degree('not exist') == 0
+    assert simple_graph.neighbors('not exist') == []
+
+
+def test_graph_directed_adjacency():
+    n1, n2, n3 = Node('1'), Node('2'), Node('3')
+    e12 = Edge('12', (n1, n2), directed=True)
+    e31 = Edge('31', (n3, n1), directed=True)
+    e23 = Edge('23', (n2, n3))
+    loop = Edge('11', (n1, n1))
+    graph = Graph((n1, n2, n3), (e12, e31, e23, loop))
+
+    assert graph.out_edges(n1) == [e12]
+    assert graph.in_edges(n1) == [e31]
+    assert graph.in_edges(n2) == [e12]
+    assert graph.out_edges(n2) == []
+    assert set(graph.neighbors(n1)) == {n1, n2, n3}
+    assert graph.degree(n1) == 3
+
+
+def test_graph_edges_between():
+    n1, n2, n3 = Node('1'), Node('2'), Node('3')
+    e12 = Edge('12', (n1, n2), directed=True)
+    e12_parallel = Edge('12 parallel', (n1, n2))
+    e21 = Edge('21', (n2, n1))
+    e23 = Edge('23', (n2, n3), directed=True)
+    loop = Edge('11', (n1, n1))
+    graph = Graph((n1, n2, n3), (e12, e12_parallel, e21, e23, loop))
+
+    assert graph.get_edges_between(n1, n2) == [e12, e12_parallel, e21]
+    assert graph.get_edges_between('2', '1') == [e12_parallel, e21]
+    assert graph.get_edges_between(n2, n3) == [e23]
+    assert graph.get_edges_between(n3, n2) == []
+    assert graph.get_edges_between(n1, n1) == [loop]
+    assert graph.get_edges_between(n1, n3) == []
+    assert graph.get_edges_between('1', 'not exist') == []
+
+    assert graph.has_edge_between(n2, n3)
+    assert not graph.has_edge_between('3', '2')
+    assert graph.has_edge_between('1', '1')
+    assert not graph.has_edge_between('not exist', 'not exist')
+
+    e23.reverse_direction()
+    assert graph.get_edges_between(n3, n2) == [e23]
+    assert not graph.has_edge_between(n2, n3)
+
+
+def test_mutable_graph_adjacency_maintained(mutable_graph: MutableGraph):
+    n1 = mutable_graph.add_node('n1')
+    n2 = mutable_graph.add_node('n2')
+    n3 = mutable_graph.add_node('n3')
+    e12 = mutable_graph.add_edge('12', (n1, n2))
+    e13 = mutable_graph.add_edge('13', ('n1', 'n3'))
+
+    assert mutable_graph.degree(n1) == 2
+    assert mutable_graph.neighbors(n1) == [n2, n3]
+    assert mutable_graph.incident_edges(n3) == [e13]
+    assert mutable_graph.get_edges_between(n3, n1) == [e13]
+
+    mutable_graph.remove_edge('12')
+    assert mutable_graph.incident_edges(n1) == [e13]
+    assert mutable_graph.degree(n2) == 0
+    assert not mutable_graph.has_edge_between(n1, n2)
+
+    mutable_graph.add_edge(edge=e12)
+    assert mutable_graph.get_edges_between(n2, n1) == [e12]
+    mutable_graph.remove_edge(e12)
+    assert mutable_graph.degree(n1) == 1
+
+    mutable_graph.remove_node(n1, with_edge=True)
+    assert mutable_graph.degree(n1) == 0
+    assert mutable_graph.degree(n3) == 0
+    assert not mutable_graph.has_edge_between(n1, n3)
+
+
+def test_graph_clone(simple_graph_js):
+    simple_graph = Graph.graph_generator(simple_graph_js)
+    node = simple_graph.nodes['n1']
+    node.properties['color'] = 'red'
+    node['values'] = [1, 2]
+
+    clone = simple_graph.clone()
+    assert type(clone) is Graph
+    assert clone.layout == simple_graph.layout
+    assert {(n.identity, n.cy_id) for n in clone.V} == {(n.identity, n.cy_id) for n in simple_graph.V}
+    assert {(e.identity, e.cy_id) for e in clone.E} == {(e.identity, e.cy_id) for e in simple_graph.E}
+    assert all(n is not simple_graph.nodes[n.identity] for n in clone.V)
+    assert all(clone.nodes[e.get_incident_node().identity] is e.get_incident_node() for e in clone.E)
+    assert clone.degree('n1') == simple_graph.degree('n1')
+
+    cloned_node = clone.nodes['n1']
+    assert cloned_node['color'] == 'red'
+    cloned_node.properties['color'] = 'blue'
+    cloned_node['values'].append(3)
+    clone.nodes['n2']['visited'] = True
+    assert node['color'] == 'red' and node['values'] == [1, 2]
+    assert 'visited' not in simple_graph.nodes['n2']
+
+    # changing the original after cloning does not change the clone either
+    node['color'] = 'green'
+    assert cloned_node['color'] == 'blue'
+    assert simple_graph.clone().nodes['n1']['color'] == 'green'
+
+
+def test_cloned_graph_copy_and_pickle(simple_graph_js):
+    simple_graph = Graph.graph_generator(simple_graph_js)
+    simple_graph.nodes['n1']['color'] = 'red'
+    clone = simple_graph.clone()
+
+    for graph in (simple_graph, clone):
+        node = graph.nodes['n1']
+        node_copy = copy.deepcopy(node)
+        assert node_copy['color'] == 'red'
+        node_copy['color'] = 'blue'
+        assert node['color'] == 'red'
+
+        graph_copy = pickle.loads(pickle.dumps(graph))
+        assert graph_copy.nodes['n1']['color'] == 'red'
+        graph_copy.nodes['n1']['color'] = 'blue'
+        assert node['color'] == 'red'
+
+        frozen_copy = pickle.loads(pickle.dumps(graph.freeze()))
+        assert frozen_copy.nodes[frozen_copy.node_id('n1')]['color'] == 'red'
+
+    # the shared properties are still copied before they are written
+    clone.nodes['n1']['color'] = 'green'
+    assert simple_graph.nodes['n1']['color'] == 'red'
+
+
+def test_mutable_graph_clone(mutable_graph: MutableGraph):
+    clone = mutable_graph.clone()
+    assert type(clone) is MutableGraph
+
+    clone.add_node('new')
+    assert 'new' in clone.nodes
+    assert 'new' not in mutable_graph.nodes
+
+
+def test_mutable_graph_bulk_add(mutable_graph: MutableGraph):
+    n0 = Node('n0')
+    nodes = mutable_graph.add_nodes_from([n0, 'n1', 'n2', 'n3'])
+    assert nodes[0] is n0 and [node.identity for node in nodes] == ['n0', 'n1', 'n2', 'n3']
+    assert len(mutable_graph.V) == 4
+
+    e01 = Edge('01', (n0, nodes[1]))
+    edges = mutable_graph.add_edges_from([e01, ('12', ('n1', 'n2')), ('23', (nodes[2], nodes[3])), e01])
+    assert [edge.identity for edge in edges] == ['01', '12', '23', '01']
+    assert len(mutable_graph.E) == 3
+    assert set(mutable_graph.neighbors('n2')) == {nodes[1], nodes[3]}
+
+    # a bad batch adds nothing
+    with pytest.raises(ValueError):
+        mutable_graph.add_edges_from([('30', ('n3', 'n0')), Edge('4x', (n0, Node('x')))])
+    with pytest.raises(TypeError):
+        mutable_graph.add_nodes_from(['n4', 5])
+    assert not mutable_graph.has_edge('30')
+    assert not mutable_graph.has_node('n4')
+
+
+def test_mutable_graph_bulk_remove(mutable_graph: MutableGraph):
+    nodes = mutable_graph.add_nodes_from(str(i) for i in range(6))
+    mutable_graph.add_edges_from((f'{i}{i + 1}', (str(i), str(i + 1))) for i in range(5))
+
+    assert not mutable_graph.remove_nodes_from(['0', '5'])
+    assert len(mutable_graph.V) == 6 and len(mutable_graph.E) == 5
+    with pytest.raises(KeyError):
+        mutable_graph.remove_nodes_from(['0', 'x'], with_edge=True)
+    assert len(mutable_graph.V) == 6
+
+    # a node listed twice is only removed once, and nothing is removed when a node is missing
+    with pytest.raises(KeyError):
+        mutable_graph.remove_nodes_from(['0', '0', 'x'], with_edge=True)
+    assert len(mutable_graph.V) == 6 and len(mutable_graph.E) == 5
+    assert mutable_graph.remove_nodes_from([nodes[0], '0', '5'], with_edge=True)
+    assert {edge.identity for edge in mutable_graph.E} == {'12', '23', '34'}
+    assert mutable_graph.degree('1') == 1 and mutable_graph.degree('4') == 1
+
+    with pytest.raises(KeyError):
+        mutable_graph.remove_edges_from(['12', '01'])
+    assert mutable_graph.has_edge('12')
+    assert mutable_graph.remove_edges_from(['12', Edge('34', (nodes[3], nodes[4]))])
+    assert {edge.identity for edge in mutable_graph.E} == {'23'}
+    assert mutable_graph.neighbors('1') == [] and mutable_graph.degree('4') == 0
+    assert mutable_graph.remove_nodes_from(['1', '4'])
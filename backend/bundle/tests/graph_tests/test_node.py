@@ -130,3 +130,68 @@ def test_mutable_node_set_remove_nodes(mutable_node_set):
 
     assert all(node not in mutable_node_set for node in node_list)
     assert mutable_node_set.is_empty()
+
+
+def test_node_set_index_lookup(multiple_nodes):
+    node_set, id_node_mapping = NodeSet.generate_node_set(multiple_nodes)
+
+    for cy_id, node in id_node_mapping.items():
+        assert node_set[node.identity] is node
+        assert node_set.get_by_cy_id(cy_id) is node
+        assert node.identity in node_set
+
+    assert node_set['not exist'] is None
+    assert node_set.get_by_cy_id('not exist') is None
+    assert 'not exist' not in node_set
+
+
+def test_mutable_node_set_index_maintained(mutable_node_set: MutableNodeSet):
+    node1 = Node('1')
+    mutable_node_set.add_node(node1)
+    # an equal node does not replace the stored one
+    mutable_node_set.add_node(Node('1'))
+
+    assert mutable_node_set['1'] is node1
+    assert mutable_node_set.get_by_cy_id(node1.cy_id) is node1
+
+    # removing by an equal instance clears the indexes of the stored one
+    mutable_node_set.remove_node(Node('1'))
+
+    assert mutable_node_set['1'] is None
+    assert mutable_node_set.get_by_cy_id(node1.cy_id) is None
+    assert '1' not in mutable_node_set
+
+
+def test_node_set_insertion_order(mutable_node_set: MutableNodeSet):
+    node_list = [Node(f'{i}') for i in reversed(range(10))]
+    mutable_node_set.add_node(*node_list)
+    assert list(mutable_node_set) == node_list
+
+    mutable_node_set.remove_node(node_list[3])
+    mutable_node_set.add_node(node_list[3], Node('0'))
+    assert list(mutable_node_set) == node_list[:3] + node_list[4:] + node_list[3:4]
+    assert str(mutable_node_set) == '{%s}' % ', '.join(map(repr, mutable_node_set))
+    assert mutable_node_set.elements == set(node_list)
+
+
+def test_node_lazy_containers():
+    node = Node('1')
+
+    assert not hasattr(node, '__dict__')
+    assert node._properties is None and node._styles is None and node._classes is None
+    # reading does not create the containers
+    assert 'degree' not in node
+    assert len(node) == 0
+    assert node.get_properties() == {}
+    assert node.get_styles() == () and node.get_classes() == ()
+    assert node._properties is None
+
+    node['degree'] = 1
+    assert node.properties == {'degree': 1}
+    assert node['degree'] == 1
+    node.styles.append({'selector': 'node', 'style': {}})
+    assert node.get_styles() == [{'selector': 'node', 'style': {}}]
+
+    assert node.name == 'v1'
+    node.name = 'renamed'
+    assert node.name == 'renamed'
@@ -0,0 +1,97 @@
+import io
+import json
+
+import pytest
+from bundle.GraphObjects.Errors import GraphJsonFormatError, GraphJsonPositionError
+from bundle.GraphObjects.Graph import Graph, GraphLayout
+from bundle.GraphObjects.Node import Node
+from bundle.GraphObjects.stream_parser import parse_cyjs
+from .utils import path_join, TEST_PATH, gen_edge
+
+
+@pytest.fixture()
+def simple_graph_js():
+    with open(path_join(TEST_PATH, 'test_files', 'graphs', 'simple_graph.cyjs')) as file:
+        return file.read()
+
+
+def graph_summary(graph: Graph) -> tuple:
+    return ({(node.identity, node.cy_id, tuple(node.get_properties().items())) for node in graph.V},
+            {(edge.identity, edge.cy_id, edge.get_incident_node().identity, edge.get_final_node().identity)
+             for edge in graph.E})
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_stream_sources_match_mapping(simple_graph_js, chunk_size):
+    expected = graph_summary(Graph.graph_generator(json.loads(simple_graph_js)))
+    sources = [simple_graph_js, simple_graph_js.encode(), io.StringIO(simple_graph_js),
+               io.BytesIO(simple_graph_js.encode())]
+
+    for source in sources:
+        node_set, edge_set, _ = parse_cyjs(source, chunk_size=chunk_size)
+        assert graph_summary(Graph(node_set, edge_set)) == expected
+
+
+def test_stream_multi_byte_characters_and_layout():
+    graph_json = json.dumps({
+        'layout': {'name': 'dagre'},
+        'elements': {
+            'edges': [{'data': {'id': 'e1', 'source': 'né', 'target': 'n中'}}],
+            'nodes': [{'data': {'id': 'né', 'displayed': {'v': 1.5}}}, {'data': {'id': 'n中'}}],
+        },
+        'zoom': 1
+    }, ensure_ascii=False)
+
+    for chunk_size in (1, 2, 3):
+        node_set, edge_set, layout = parse_cyjs(io.BytesIO(graph_json.encode()), chunk_size=chunk_size)
+        assert layout == {'name': 'dagre'}
+        assert node_set['né'].properties == {'v': 1.5}
+        assert gen_edge('e1', 'né', 'n中') in edge_set
+
+    graph = Graph.graph_generator(graph_json)
+    assert graph.layout == GraphLayout.dagre.value
+
+
+def test_stream_names():
+    graph_json = json.dumps({'elements': {
+        'nodes': [{'data': {'id': 'n1', 'name': 'a'}}, {'data': {'id': 'n2', 'name': 'b'}}],
+        'edges': [{'data': {'id': 'e1', 'source': 'n1', 'target': 'n2'}}]
+    }})
+    node_set, edge_set, _ = parse_cyjs(graph_json)
+    assert Node('a') in node_set and Node('b') in node_set
+    assert node_set.get_by_cy_id('n1') == Node('a')
+    assert gen_edge('e1', 'a', 'b') in edge_set
+
+    # names are only used when every entry has one
+    graph_json = json.dumps({'elements': {
+        'nodes': [{'data': {'id': 'n1', 'name': 'a'}}, {'data': {'id': 'n2'}}],
+    }})
+    node_set, _, _ = parse_cyjs(graph_json)
+    assert Node('n1') in node_set and Node('n2') in node_set
+
+
+@pytest.mark.parametrize('graph_json, path, offset', [
+    ('{"elements": {"nodes": [{"data": {"id": "n1"}}, {"data": {"name": "n2"}}]}}', 'elements.nodes[1]', 48),
+    ('{"elements": {"nodes": [{"data": {"id": "n1"}}], "edges": [{"data": {"id": "e1"}}]}}',
+     'elements.edges[0]', 59),
+    ('{"elements": {"nodes": [{"data": {"id": "n1"}}], '
+     '"edges": [{"data": {"id": "e1", "source": "n1", "target": "n2"}}]}}', 'elements.edges[0]', 59),
+    ('{"elements": {"nodes": [{"data": {"id": "n1"}} {"data": {"id": "n2"}}]}}', 'elements.nodes', 47),
+    ('{"elements": {"nodes": [{"data": {"id": "n1"}}, {"data": {"id": }}]}}', 'elements.nodes[1]', 64),
+    ('{"elements": {"nodes": []}} []', '$', 28),
+    # the fields of `elements` are not repeated
+    ('{"elements": {"nodes": [], "edges": [], "nodes": []}}', 'elements.nodes', 49),
+    ('{"elements": {"edges": [], "edges": []}}', 'elements.edges', 36),
+])
+def test_stream_error_position(graph_json, path, offset):
+    for source in (graph_json, io.BytesIO(graph_json.encode())):
+        with pytest.raises(GraphJsonPositionError) as error:
+            parse_cyjs(source, chunk_size=5)
+        assert error.value.path == path
+        assert error.value.offset == offset
+
+
+@pytest.mark.parametrize('graph_json', ['', '[]', '{"layout": "fcose"}', '{"elements": []}', b'\xff'])
+def test_stream_malformed(graph_json):
+    with pytest.raises(GraphJsonFormatError):
+        Graph.graph_generator(graph_json)
@@ -0,0 +1,285 @@
+from bundle import seeker
+
+
+class Context:
+    def __init__(self, swallow=False):
+        self.swallow = swallow
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return self.swallow
+
+
+class Countdown:
+    def __init__(self, n):
+        self.n = n
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.n <= 0:
+            raise StopIteration
+        self.n -= 1
+        return self.n
+
+
+def helper(x):
+    if x:
+        raise KeyError(x)
+    return x
+
+
+@seeker.tracer(only_watch=False)
+def factorial(x):
+    """
+    the docstring has no line event
+    """
+    if x <= 1:
+        return 1
+    return x * factorial(x - 1)
+
+
+@seeker.tracer(only_watch=False)
+def loops(n):
+    total = 0
+    for i in range(n):
+        if i == 1:
+            continue
+        if i == 5:
+            break
+        total += i
+    else:
+        total = -total
+    while total > 0:
+        total -= 3
+    for j in Countdown(2):
+        total += j
+    for j in (k for k in range(2)):
+        total += j
+    pairs = {}
+    for key, value in zip('ab', range(2)): pairs[key] = value
+    return total, pairs
+
+
+@seeker.tracer(only_watch=False)
+def exceptions(x):
+    caught = None
+    try:
+        helper(x)
+    except KeyError as e:
+        caught = e.args
+    except ValueError:
+        caught = 'value'
+    else:
+        caught = 'nothing'
+    try:
+        try:
+            1 / x
+        finally:
+            x = x + 1
+    except ZeroDivisionError:
+        pass
+    try:
+        try:
+            helper(x)
+        except KeyError:
+            x = -x
+            raise
+    except:
+        x = str(x)
+    return caught, x
+
+
+@seeker.tracer(only_watch=False)
+def with_statement(swallow):
+    value = 0
+    with Context(swallow) as context:
+        value = 1
+        if context.swallow:
+            raise IndexError(value)
+    with Context():
+        return value + 1
+
+
+@seeker.tracer(only_watch=False)
+def closures(items):
+    global counter
+    offset = 1
+
+    def shift(item):
+        return item + offset
+
+    items.append(len(items)); counter = shift(items[-1])
+    items[0] = shift(items[0])
+    return sorted(map(shift, items), key=lambda item: -item)
+
+
+@seeker.tracer('total', 'items')
+def watched(items):
+    total = 0
+    alias = items
+    for item in list(items):
+        total += item
+        alias.append(item)
+        scratch = item * 2
+        if len(items) > 10:
+            break
+    return total
+
+
+@seeker.tracer(only_watch=False)
+def stopped(items):
+    for item in items:
+        if item < 0:
+            raise ValueError(item)
+    return len(items)
+
+
+@seeker.tracer(only_watch=False)
+def generator(n):
+    for i in range(n):
+        yield i
+
+
+@seeker.tracer(only_watch=False)
+def multi_line(n):
+    values = [
+        n,
+        n + 1,
+    ]
+    return values
+
+
+@seeker.tracer(only_watch=False)
+def placeholders(n):
+    """
+    python 3.9 compiles `pass`, the constant statements and the tests of `while True` to nothing
+    """
+    'no line event before python 3.10'
+    pass
+    for i in range(n):
+        pass
+    while True:
+        n -= 1
+        if n < 0:
+            break
+    try:
+        pass
+    except ValueError:
+        ...
+    with Context():
+        pass
+    if n:
+        pass
+    else:
+        n = 1
+    pass
+
+
+@seeker.tracer(only_watch=False)
+def empty_else(n):
+    if n:
+        n += 1
+    else:
+        pass
+    return n
+
+
+@seeker.tracer(only_watch=False)
+def continued(n):
+    total = 0
+    for i in range(n):
+        if i % 2:
+            total += i
+        elif i > 2:
+            break
+        else:
+            continue
+        try:
+            total += 1
+        except ValueError:
+            continue
+    return total
+
+
+@seeker.tracer(only_watch=False)
+def cleanup(n):
+    try:
+        raise ValueError(n)
+    finally:
+        try:
+            n = {}[n]
+        except KeyError:
+            n += 1
+        if n > 1:
+            n -= 1
+
+
+@seeker.tracer(only_watch=False)
+def finished(n):
+    try:
+        return n + 1
+    finally:
+        n = 0
+
+
+@seeker.tracer(only_watch=False)
+def unwound(n):
+    with Context():
+        n = {}[n]
+        n += 1
+
+
+@seeker.tracer(only_watch=False)
+def renamed(n):
+    try:
+        n = {}[n]
+    except KeyError as e:
+        n = {}[n]
+        n += 1
+
+
+@seeker.tracer('total')
+def rebound(n):
+    total = 0
+
+    def add(value):
+        nonlocal total
+        total += value
+
+    for i in range(n):
+        add(i)
+        square = i * i
+    return total
+
+
+counter = 0
+
+
+def main():
+    results = [factorial(3), loops(3), loops(8), exceptions(0), exceptions(1),
+               with_statement(True), closures([1, 2]), watched([1, 2]), list(generator(2)), multi_line(1),
+               placeholders(2), empty_else(0), empty_else(1), continued(5), finished(1),
+               rebound(3)]
+    try:
+        with_statement(False)
+    except IndexError:
+        results.append('raised')
+    try:
+        stopped([1, -1])
+    except ValueError:
+        results.append('raised')
+    for n in range(2):
+        try:
+            cleanup(n)
+        except ValueError:
+            results.append('raised')
+    for function in (unwound, renamed):
+        try:
+            function(0)
+        except KeyError:
+            results.append('raised')
+    return results
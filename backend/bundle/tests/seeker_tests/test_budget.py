@@ -0,0 +1,107 @@
+import pytest
+
+from bundle import seeker
+from bundle.seeker.budget import ExecutionBudget, ExecutionBudgetExceeded
+from bundle.seeker.monitoring import MONITORING_AVAILABLE
+from bundle.seeker.sight import thread_global
+from bundle.utils.recorder import Recorder
+
+backends = pytest.mark.parametrize('use_monitoring', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not MONITORING_AVAILABLE, reason='sys.monitoring needs python 3.12+')),
+])
+
+
+@pytest.fixture
+def recorder():
+    original_recorder = seeker.tracer.get_recorder()
+    recorder = Recorder()
+    seeker.tracer.set_new_recorder(recorder)
+    yield recorder
+    seeker.tracer.set_new_recorder(original_recorder)
+    seeker.tracer.set_budget(None)
+
+
+def make_endless_loop(use_monitoring: bool):
+    @seeker.tracer('count', default_output=False, log_output=False, use_monitoring=use_monitoring)
+    def add(count):
+        return count + 1
+
+    @seeker.tracer('count', default_output=False, log_output=False, use_monitoring=use_monitoring)
+    def endless_loop():
+        count = 0
+        while True:
+            try:
+                count = add(count)
+            except Exception:
+                pass
+
+    return endless_loop
+
+
+@backends
+def test_step_budget(recorder, use_monitoring):
+    budget = ExecutionBudget(max_steps=100)
+    seeker.tracer.set_budget(budget)
+    budget.start()
+    depth = getattr(thread_global, 'depth', -1)
+
+    with pytest.raises(ExecutionBudgetExceeded) as exc_info:
+        make_endless_loop(use_monitoring)()
+    # the indentation of the log goes back
+    assert thread_global.depth == depth
+
+    changes = recorder.get_change_list()
+    assert len(changes) == 101
+    assert 'truncated' not in changes[-2]
+    assert changes[-1]['truncated'] == exc_info.value.reason == budget.exceeded_reason
+    assert changes[-1]['variables'] is None
+    assert recorder.get_processed_change_list()[-1]['truncated'] == budget.exceeded_reason
+
+    # the budget stays exceeded until it starts again
+    with pytest.raises(ExecutionBudgetExceeded):
+        make_endless_loop(use_monitoring)()
+    assert len(recorder.get_change_list()) == 101
+
+
+@backends
+def test_time_budget(recorder, use_monitoring):
+    budget = ExecutionBudget(max_seconds=0.05)
+    seeker.tracer.set_budget(budget)
+    budget.start()
+
+    with pytest.raises(ExecutionBudgetExceeded):
+        make_endless_loop(use_monitoring)()
+    assert 'after 0.05s' in recorder.get_change_list()[-1]['truncated']
+
+
+def test_recorded_bytes_budget(recorder):
+    budget = ExecutionBudget(max_recorded_bytes=10_000)
+    seeker.tracer.set_budget(budget)
+
+    @seeker.tracer('values', default_output=False, log_output=False)
+    def grow():
+        values = []
+        while True:
+            values.append(len(values))
+
+    with pytest.raises(ExecutionBudgetExceeded):
+        grow()
+    assert 10_000 <= recorder.get_estimated_size() < 20_000
+    assert 'truncated' in recorder.get_change_list()[-1]
+
+
+def test_no_budget(recorder):
+    budget = ExecutionBudget()
+    seeker.tracer.set_budget(budget)
+
+    @seeker.tracer('total', default_output=False, log_output=False)
+    def count():
+        total = 0
+        for i in range(1000):
+            total += i
+        return total
+
+    assert count() == sum(range(1000))
+    assert not any('truncated' in change for change in recorder.get_change_list())
+    assert budget.exceeded_reason is None
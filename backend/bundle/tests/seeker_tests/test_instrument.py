@@ -0,0 +1,132 @@
+import ast
+import re
+import sys
+import textwrap
+from typing import Sequence
+
+import pytest
+
+from bundle import seeker
+from bundle.seeker.instrument import INSTRUMENTATION_AVAILABLE, compile_instrumented, instrument_source, \
+    is_instrumented, load_instrumented_module
+from bundle.tests.seeker_tests.samples import exception, indentation, instrumented, recursion
+from bundle.tests.seeker_tests.samples import recorder as recorder_sample
+from bundle.utils.recorder import Recorder
+
+pytestmark = pytest.mark.skipif(not INSTRUMENTATION_AVAILABLE, reason='the instrumentation needs python 3.9+')
+
+_ADDRESS = re.compile(r' at 0x[0-9a-f]+')
+_RUN_SPECIFIC_FIELDS = re.compile(r'"(color|python_id)": [^,}]+')
+
+_SAMPLE_FILE = instrumented.__file__
+with open(_SAMPLE_FILE) as _sample:
+    _SAMPLE_SOURCE = _sample.read()
+
+
+def run(file_name: str, entries: Sequence[str], instrument: bool):
+    with open(file_name) as source_file:
+        source = source_file.read()
+    original_recorder = seeker.tracer.get_recorder()
+    recorder = Recorder()
+    seeker.tracer.set_new_recorder(recorder)
+    try:
+        if instrument:
+            code = compile_instrumented(source, file_name)
+        else:
+            code = compile(source, file_name, 'exec')
+        namespace = {'__name__': 'instrumented_sample'}
+        exec(code, namespace)
+        result = [namespace[entry]() for entry in entries]
+    finally:
+        seeker.tracer.set_new_recorder(original_recorder)
+    change_list_json = _RUN_SPECIFIC_FIELDS.sub('', _ADDRESS.sub('', recorder.get_change_list_json()))
+    return result, change_list_json, namespace
+
+
+@pytest.mark.parametrize('sample, entries', [
+    pytest.param(instrumented, ['main']),
+    pytest.param(recorder_sample, ['simple_loop_trace_non', 'simple_loop_trace_index',
+                                   'simple_while_loop_trace_index']),
+    pytest.param(exception, ['main']),
+    pytest.param(indentation, ['main']),
+    pytest.param(recursion, ['main']),
+])
+def test_instrumented_records_match_settrace(sample, entries):
+    traced_result, traced_change_list, _ = run(sample.__file__, entries, instrument=False)
+    instrumented_result, instrumented_change_list, _ = run(sample.__file__, entries, instrument=True)
+
+    assert instrumented_result == traced_result
+    assert instrumented_change_list == traced_change_list
+
+
+def test_fallback(tmp_path, monkeypatch):
+    _, _, namespace = run(_SAMPLE_FILE, [], instrument=True)
+    for name in ('factorial', 'loops', 'exceptions', 'with_statement', 'closures', 'watched', 'stopped',
+                 'placeholders', 'cleanup', 'unwound', 'renamed', 'rebound'):
+        assert is_instrumented(namespace[name].__code__), name
+    # the functions that cannot be instrumented are traced with `sys.settrace`
+    assert not is_instrumented(namespace['generator'].__code__)
+    assert not is_instrumented(namespace['multi_line'].__code__)
+    # python 3.9 gives the `pass` ending the `else` block the line of what comes after the `if` statement
+    assert is_instrumented(namespace['empty_else'].__code__) == (sys.version_info >= (3, 10))
+    # and sends the jump to the `continue` starting the `else` block straight to the loop
+    assert is_instrumented(namespace['continued'].__code__) == (sys.version_info >= (3, 10))
+    # and gives the `return` leaving a `try` statement its line again after the `finally` block
+    assert is_instrumented(namespace['finished'].__code__) == (sys.version_info >= (3, 10))
+
+    # so are the ones traced deeper than themselves
+    _, _, namespace = run(recursion.__file__, [], instrument=True)
+    assert not is_instrumented(namespace['factorial'].__code__)
+
+    # nothing is left of a function given up on after its nested statements are rewritten
+    (tmp_path / 'partly_supported.py').write_text(textwrap.dedent('''\
+        from bundle.seeker import tracer
+
+        @tracer('a')
+        def f(x):
+            if x:
+                a = 1
+            b, c = (
+                1, 2)
+            return a
+        '''))
+    monkeypatch.syspath_prepend(str(tmp_path))
+    original_recorder = seeker.tracer.get_recorder()
+    seeker.tracer.set_new_recorder(Recorder())
+    try:
+        module = load_instrumented_module('partly_supported')
+        assert not is_instrumented(module.f.__code__)
+        assert module.f(1) == 1
+    finally:
+        seeker.tracer.set_new_recorder(original_recorder)
+        sys.modules.pop('partly_supported', None)
+
+
+def test_watched_names():
+    tree = instrument_source(_SAMPLE_SOURCE, _SAMPLE_FILE)
+    watched = next(node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name == 'watched')
+    changing = {
+        node.args[0].value: node.args[1].value
+        for node in ast.walk(watched)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == 'line'
+        and node.args[1].value
+    }
+    # `alias = items` cannot change `total` or `items`, but `scratch = item * 2` can run `__mul__`,
+    # which can only change the objects they are bound to
+    names = ('items', 'total')
+    assert changing == {122: True, 124: names, 125: True, 126: names, 127: names, 128: names}
+
+
+def test_load_instrumented_module():
+    module_name = 'bundle.tests.seeker_tests.samples.instrumented'
+    original_module = sys.modules.pop(module_name)
+    try:
+        module = load_instrumented_module(module_name)
+        assert sys.modules[module_name] is module
+        assert is_instrumented(module.factorial.__code__)
+        assert module.factorial.__code__.co_filename == _SAMPLE_FILE
+    finally:
+        sys.modules[module_name] = original_module
+
+    with pytest.raises(ImportError):
+        load_instrumented_module('bundle.tests.seeker_tests.samples.not_a_module')
@@ -0,0 +1,64 @@
+import textwrap
+
+from bundle.seeker.line_table import LineTable, find_definition_line, get_line_table
+
+SOURCE = textwrap.dedent('''\
+    def decorator(function):
+        return function
+
+
+    @decorator
+    @decorator
+    def f(x):
+        y = x + 1
+        return y
+
+
+    def g():
+        yield 1
+''')
+
+
+def compile_source(source: str = SOURCE):
+    namespace = {}
+    exec(compile(source, 'line_table_sample.py', 'exec'), namespace)
+    return namespace
+
+
+def test_find_definition_line():
+    lines = SOURCE.splitlines()
+    assert find_definition_line(lines, 5) == (7, 'def f(x):')
+    assert find_definition_line(lines, 8) == (8, '    y = x + 1')
+    # the source ends before the definition
+    assert find_definition_line(['@decorator'], 1) == (1, '@decorator')
+
+
+def test_line_table():
+    lines = SOURCE.splitlines()
+    code = compile_source()['f'].__code__
+    line_table = LineTable(code, 'line_table_sample.py', lines)
+    assert line_table.source_path == 'line_table_sample.py'
+    assert line_table.get_call_line(code.co_firstlineno) == (7, 'def f(x):')
+    assert line_table.get_line(8) == '    y = x + 1'
+    assert line_table.get_line(9) == '    return y'
+    # lines out of the code are read from the source
+    assert line_table.get_line(1) == 'def decorator(function):'
+
+    generator_code = compile_source()['g'].__code__
+    line_table = LineTable(generator_code, 'line_table_sample.py', lines)
+    # a resumed generator gets a call event at its yield
+    assert line_table.get_call_line(13) == (13, '    yield 1')
+
+
+def test_shared_line_tables():
+    lines = SOURCE.splitlines()
+    code = compile_source()['f'].__code__
+    same_code = compile_source()['f'].__code__
+    assert code is not same_code
+
+    line_table = get_line_table(code, 'line_table_sample.py', lines)
+    assert get_line_table(same_code, 'line_table_sample.py', lines) is line_table
+    # a table is not shared with other source
+    new_lines = list(lines)
+    assert get_line_table(same_code, 'line_table_sample.py', new_lines) is not line_table
+    assert get_line_table(same_code, 'other_sample.py', new_lines) is not line_table
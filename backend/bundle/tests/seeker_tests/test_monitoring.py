@@ -0,0 +1,153 @@
+import io
+import re
+import sys
+
+import pytest
+
+from bundle import seeker
+from bundle.seeker.monitoring import MONITORING_AVAILABLE, get_dispatcher
+from bundle.utils.recorder import Recorder
+
+pytestmark = pytest.mark.skipif(not MONITORING_AVAILABLE, reason='sys.monitoring needs python 3.12+')
+
+_ADDRESS = re.compile(r' at 0x[0-9a-f]+')
+_RUN_SPECIFIC_FIELDS = re.compile(r'"(color|python_id)": [^,}]+')
+
+
+class Context:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return True
+
+
+def make_functions(use_monitoring: bool, output: io.StringIO):
+    tracer = seeker.tracer(only_watch=False, output=output, use_monitoring=use_monitoring)
+
+    @tracer
+    def factorial(x):
+        if x <= 1:
+            return 1
+        return x * factorial(x - 1)
+
+    @tracer
+    def loops(n):
+        total = 0
+        for i in range(n):
+            total += i
+        while total > 0: total -= 1
+        squares = [i * i for i in range(n)]
+        return squares
+
+    def helper(x):
+        if x:
+            raise KeyError(x)
+        return x
+
+    @tracer
+    def exceptions(x):
+        try:
+            helper(x)
+        except KeyError:
+            caught = True
+        try:
+            1 / 0
+        finally:
+            caught = False
+        return caught
+
+    @tracer
+    def generator(n):
+        for i in range(n):
+            received = yield i
+            if received:
+                yield received
+
+    @tracer
+    def with_statement():
+        with Context():
+            value = 1
+            raise IndexError(value)
+        return None
+
+    @seeker.tracer(only_watch=False, output=output, use_monitoring=use_monitoring)
+    def nested(x):
+        y = factorial(x)
+        return [y] * 2
+
+    def main():
+        results = [factorial(3), loops(4), nested(2), with_statement()]
+        try:
+            exceptions(1)
+        except ZeroDivisionError:
+            results.append('raised')
+        gen = generator(3)
+        results.append(next(gen))
+        results.append(gen.send('a'))
+        results.append(list(gen))
+        gen = generator(2)
+        next(gen)
+        try:
+            gen.throw(ValueError('thrown'))
+        except ValueError:
+            results.append('thrown')
+
+        def block(z):
+            a = z + 1
+            with tracer:
+                b = a * 2
+                c = [b] * 2
+            return c
+        results.append(block(1))
+        return results
+
+    return main
+
+
+def run(use_monitoring: bool):
+    recorder = Recorder()
+    seeker.tracer.set_new_recorder(recorder)
+    output = io.StringIO()
+    result = make_functions(use_monitoring, output)()
+    lines = [line for line in output.getvalue().splitlines() if 'Elapsed time' not in line]
+    # the closures are different objects in each run, and the colors out of the palette are random
+    change_list_json = _RUN_SPECIFIC_FIELDS.sub('', _ADDRESS.sub('', recorder.get_change_list_json()))
+    return result, _ADDRESS.sub('', '\n'.join(lines)), change_list_json
+
+
+def test_monitoring_matches_settrace():
+    original_recorder = seeker.tracer.get_recorder()
+    try:
+        settrace_result = run(use_monitoring=False)
+        monitoring_result = run(use_monitoring=True)
+    finally:
+        seeker.tracer.set_new_recorder(original_recorder)
+
+    assert monitoring_result[0] == settrace_result[0]
+    assert monitoring_result[1] == settrace_result[1]
+    assert monitoring_result[2] == settrace_result[2]
+
+
+def test_monitoring_does_not_touch_settrace():
+    original_trace = sys.gettrace()
+    traces = []
+
+    @seeker.tracer(default_output=False, log_output=False, use_monitoring=True)
+    def f():
+        traces.append(sys.gettrace())
+        return 1
+
+    assert f() == 1
+    assert traces == [original_trace]
+    assert sys.gettrace() is original_trace
+    # everything is turned off after the last traced call returns
+    dispatcher = get_dispatcher()
+    assert not dispatcher._code_counts and not dispatcher._frame_traces
+    assert sys.monitoring.get_events(dispatcher._tool_id) == 0
+
+
+def test_monitoring_needs_depth_one():
+    assert not seeker.tracer(depth=2, use_monitoring=True).use_monitoring
+    assert seeker.tracer(use_monitoring=True).use_monitoring
+    assert not seeker.tracer(use_monitoring=False).use_monitoring
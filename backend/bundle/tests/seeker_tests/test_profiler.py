@@ -0,0 +1,61 @@
+import time
+
+import pytest
+
+from bundle import seeker
+from bundle.seeker.monitoring import MONITORING_AVAILABLE
+from bundle.seeker.profiler import LineProfiler
+
+backends = pytest.mark.parametrize('use_monitoring', [
+    False,
+    pytest.param(True, marks=pytest.mark.skipif(not MONITORING_AVAILABLE, reason='sys.monitoring needs python 3.12+')),
+])
+
+
+@pytest.fixture
+def profiler():
+    profiler = LineProfiler()
+    seeker.tracer.set_profiler(profiler)
+    yield profiler
+    seeker.tracer.set_profiler(None)
+
+
+@backends
+def test_line_profile(profiler, use_monitoring):
+    @seeker.tracer(default_output=False, log_output=False, use_monitoring=use_monitoring)
+    def sleep():
+        time.sleep(0.02)
+
+    @seeker.tracer(default_output=False, log_output=False, use_monitoring=use_monitoring)
+    def main():
+        total = 0
+        for i in range(3):
+            total += i
+        sleep()
+        return total
+
+    assert main() == 3
+
+    stats = {
+        entry['functionName']: {line['lineNumber']: (line['hits'], line['selfTime']) for line in entry['lines']}
+        for entry in profiler.get_profile()
+    }
+    main_stats = stats['main']
+    first_line_no = min(main_stats)
+    assert [main_stats[line_no][0] for line_no in sorted(main_stats)] == [1, 4, 3, 1, 1]
+
+    # the time of the called traced function is its own
+    assert list(stats['sleep'].values())[0][1] >= 20_000_000
+    assert main_stats[first_line_no + 3][1] < 20_000_000
+
+
+def test_profile_filter(profiler):
+    @seeker.tracer(default_output=False, log_output=False)
+    def f():
+        return 1
+
+    f()
+    assert len(profiler.get_profile()) == 1
+    assert profiler.get_profile(lambda file_name: False) == []
+    profiler.clear()
+    assert profiler.get_profile() == []
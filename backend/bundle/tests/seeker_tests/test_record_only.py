@@ -0,0 +1,103 @@
+import io
+import re
+
+from bundle import seeker
+from bundle.utils.recorder import Recorder
+
+_ADDRESS = re.compile(r' at 0x[0-9a-f]+')
+_RUN_SPECIFIC_FIELDS = re.compile(r'"(color|python_id)": [^,}]+')
+
+
+def make_functions(record_only: bool, output: io.StringIO):
+    tracer = seeker.tracer(only_watch=False, output=output, record_only=record_only)
+
+    def decorator(function):
+        return function
+
+    @tracer
+    @decorator
+    def factorial(x):
+        if x <= 1:
+            return 1
+        return x * factorial(x - 1)
+
+    @tracer
+    def loops(n):
+        total = 0
+        for i in range(n):
+            total += i
+        squares = [i * i for i in range(n)]
+        return squares
+
+    @tracer
+    def exceptions(x):
+        try:
+            raise KeyError(x)
+        except KeyError:
+            caught = True
+        try:
+            1 / 0
+        finally:
+            caught = False
+        return caught
+
+    @seeker.tracer(only_watch=False, output=output, record_only=record_only, depth=2)
+    def nested(x):
+        y = factorial(x) + sum(loops(x))
+        return [y] * 2
+
+    def main():
+        results = [factorial(3), loops(4), nested(2)]
+        try:
+            exceptions(1)
+        except ZeroDivisionError:
+            results.append('raised')
+
+        def block(z):
+            a = z + 1
+            with tracer:
+                b = a * 2
+                c = [b] * 2
+            return c
+        results.append(block(1))
+        return results
+
+    return main
+
+
+def run(record_only: bool):
+    recorder = Recorder()
+    seeker.tracer.set_new_recorder(recorder)
+    output = io.StringIO()
+    result = make_functions(record_only, output)()
+    change_list_json = _RUN_SPECIFIC_FIELDS.sub('', _ADDRESS.sub('', recorder.get_change_list_json()))
+    return result, output.getvalue(), change_list_json
+
+
+def test_record_only_matches_log():
+    original_recorder = seeker.tracer.get_recorder()
+    try:
+        log_result, log_output, log_change_list = run(record_only=False)
+        record_only_result, record_only_output, record_only_change_list = run(record_only=True)
+    finally:
+        seeker.tracer.set_new_recorder(original_recorder)
+
+    assert log_output
+    assert record_only_output == ''
+    assert record_only_result == log_result
+    assert record_only_change_list == log_change_list
+
+
+def test_record_only_never_writes():
+    written = []
+    tracer = seeker.tracer(output=written.append, record_only=True)
+    assert tracer._log_path is False
+
+    @tracer
+    def f(x):
+        y = x + 1
+        return y
+
+    assert f(1) == 2
+    assert written == []
+    assert not tracer.start_times and not tracer.frame_to_local_reprs
@@ -0,0 +1,72 @@
+import textwrap
+from importlib import import_module
+import sys
+
+from bundle.seeker.sight import get_path_and_source_from_frame, source_and_path_cache, Tracer
+from bundle.seeker.source_cache import SourceCache, get_content_digest
+from bundle.tests.seeker_tests import mini_toolbox
+
+
+def test_source_cache():
+    cache = SourceCache(max_entries=2)
+    first_source = ['a = 1']
+    assert cache.get(('a', 'a.py')) is None
+    assert cache.put(('a', 'a.py'), get_content_digest('a = 1'), first_source) is first_source
+    assert cache.get(('a', 'a.py')) is first_source
+
+    # the same content in another file shares the source
+    assert cache.get_by_content(('b', 'b.py'), get_content_digest('a = 1')) is first_source
+    assert cache.put(('c', 'c.py'), get_content_digest('a = 1'), ['a = 1']) is first_source
+    assert len(cache) == 1
+
+    cache.put(('d', 'd.py'), get_content_digest('d = 1'), ['d = 1'])
+    cache.put(('e', 'e.py'), get_content_digest('e = 1'), ['e = 1'])
+    # the least recently used source is evicted with its files
+    assert len(cache) == 2
+    assert cache.get(('a', 'a.py')) is None
+    assert cache.get(('b', 'b.py')) is None
+
+    assert cache.invalidate('e.py') == 1
+    assert cache.get(('e', 'e.py')) is None
+    assert cache.get_stats() == {
+        'hits': 1, 'contentHits': 1, 'misses': 4, 'evictions': 1, 'invalidations': 1,
+        'entries': 2, 'files': 1, 'maxEntries': 2,
+    }
+
+
+def test_rewritten_source():
+    with mini_toolbox.create_temp_folder(prefix='seeker') as folder, \
+            mini_toolbox.TempSysPathAdder(str(folder)):
+        module_name = 'source_cache_sample'
+        python_file_path = folder / f'{module_name}.py'
+
+        def get_source(text: str):
+            python_file_path.write_text(textwrap.dedent(text))
+            module = import_module(module_name)
+            try:
+                return get_path_and_source_from_frame(module.get_frame())
+            finally:
+                del sys.modules[module_name]
+
+        file_name, source = get_source('''\
+            import sys
+            def get_frame():
+                return sys._getframe()
+        ''')
+        assert file_name == str(python_file_path)
+        assert source[2] == '    return sys._getframe()'
+
+        new_text = '''\
+            import sys
+            def get_frame():
+                frame = sys._getframe()
+                return frame
+        '''
+        # the cached source is stale until the file is invalidated
+        assert get_source(new_text)[1] is source
+        Tracer.invalidate_source(python_file_path)
+        _, new_source = get_source(new_text)
+        assert new_source[3] == '    return frame'
+
+        source_and_path_cache.invalidate(python_file_path)
+        assert get_source(new_text)[1] is new_source
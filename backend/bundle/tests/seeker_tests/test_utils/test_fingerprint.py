@@ -0,0 +1,81 @@
+from bundle.GraphObjects.Edge import Edge
+from bundle.GraphObjects.Graph import MutableGraph
+from bundle.GraphObjects.Node import Node
+from bundle.seeker.utils import get_fingerprint, matches_fingerprint
+
+
+class Plain:
+    pass
+
+
+class CustomRepr:
+    def __init__(self):
+        self.value = 1
+
+    def __repr__(self):
+        return f'CustomRepr({self.value})'
+
+
+def test_fingerprint_builtin_containers():
+    inner = [1, 2]
+    items = {'a': inner, 'b': (3, 'c'), 'd': {4, 5}}
+    fingerprint = get_fingerprint(items)
+    assert matches_fingerprint(fingerprint, items)
+
+    inner[0] = 10
+    assert not matches_fingerprint(fingerprint, items)
+    inner[0] = 1
+    assert matches_fingerprint(fingerprint, items)
+
+    items['d'].add(6)
+    assert not matches_fingerprint(fingerprint, items)
+    fingerprint = get_fingerprint(items)
+    items['e'] = None
+    assert not matches_fingerprint(fingerprint, items)
+
+    # an equal but different object has to be checked with its repr
+    assert not matches_fingerprint(get_fingerprint([1, 2]), [1, 2])
+
+
+def test_fingerprint_recursive_container():
+    items = [1]
+    items.append(items)
+    fingerprint = get_fingerprint(items)
+    assert matches_fingerprint(fingerprint, items)
+    items.append(2)
+    assert not matches_fingerprint(fingerprint, items)
+
+
+def test_fingerprint_objects():
+    plain = Plain()
+    assert matches_fingerprint(get_fingerprint(plain), plain)
+    items = [plain]
+    assert matches_fingerprint(get_fingerprint(items), items)
+
+    # the repr of other objects cannot be followed
+    assert get_fingerprint(CustomRepr()) is None
+    assert get_fingerprint([1, CustomRepr()]) is None
+    assert not matches_fingerprint(None, 1)
+
+    # nor when a custom repr is used
+    assert get_fingerprint(1, custom_repr=((int, str),)) is None
+    assert get_fingerprint(1, custom_repr=((str, repr),)) is not None
+
+
+def test_fingerprint_graph_objects():
+    u, v, w = Node('u'), Node('v'), Node('w')
+    edge = Edge('e', (u, v), directed=True)
+    graph = MutableGraph([u, v], [edge])
+    watched = [graph, graph.V, edge]
+    fingerprint = get_fingerprint(watched)
+    assert matches_fingerprint(fingerprint, watched)
+
+    u.properties['weight'] = 1
+    assert matches_fingerprint(fingerprint, watched)
+
+    edge.reverse_direction()
+    assert not matches_fingerprint(fingerprint, watched)
+    fingerprint = get_fingerprint(watched)
+
+    graph.add_node(w)
+    assert not matches_fingerprint(fingerprint, watched)
@@ -0,0 +1,70 @@
+import sys
+
+import pytest
+
+from bundle.seeker import Attrs, Exploding, Indices, Keys
+from bundle.seeker.variables import CommonVariable, compile_accessor
+
+GLOBAL_VALUE = {'weight': 3}
+
+
+class Holder:
+    def __init__(self):
+        self.items = [{'name': 'a'}, {'name': 'b'}]
+        self.__hidden = 1
+
+    @property
+    def broken(self):
+        raise RuntimeError('broken')
+
+
+@pytest.mark.parametrize('source, accessor', [
+    ('node', ('node', ())),
+    (' node ', ('node', ())),
+    ('holder.items', ('holder', ((True, 'items'),))),
+    ("holder.items[-1]['name']", ('holder', ((True, 'items'), (False, -1), (False, 'name')))),
+    ('x + 1', None),
+    ('f()', None),
+    ('items[0:1]', None),
+    ('items[i]', None),
+    ('items[0.5]', None),
+    ('items[1, 2]', None),
+    ('(', None),
+])
+def test_compile_accessor(source, accessor):
+    assert compile_accessor(source) == accessor
+
+
+def test_accessor_matches_eval():
+    holder = Holder()
+    node = 'node'
+    sources = ['node', 'holder', 'holder.items', 'holder.items[1]', "holder.items[-2]['name']",
+               'holder.missing', 'holder.broken', 'holder.items[5]', "holder.items[0]['missing']",
+               'missing', 'GLOBAL_VALUE', "GLOBAL_VALUE['weight']", 'len', 'holder._Holder__hidden',
+               'holder.items[0:1]', 'node.upper()']
+    variables = [CommonVariable(source) for source in sources]
+    assert all(variable.accessor is not None for variable in variables[:-2])
+
+    frame = sys._getframe()
+    for variable in variables:
+        try:
+            expected = [(variable.source, eval(variable.source, frame.f_globals, frame.f_locals))]
+        except Exception:
+            expected = []
+        assert list(variable.values(frame)) == expected
+
+
+def test_exploding_variables():
+    holder = Holder()
+    frame = sys._getframe()
+
+    exploding = Exploding('holder.items')
+    assert exploding.values(frame) == Indices('holder.items').values(frame)
+    assert Exploding('holder.items[0]').values(frame) == Keys('holder.items[0]').values(frame)
+    assert exploding.values(frame) == Indices('holder.items').values(frame)
+
+    holder_values = Exploding('holder').values(frame)
+    assert holder_values == Attrs('holder').values(frame)
+    assert ('holder.items', holder.items) in holder_values
+    assert Indices('holder.items')[1:].values(frame) == [('holder.items', holder.items),
+                                                          ('holder.items[1]', holder.items[1])]
@@ -0,0 +1,233 @@
+import ast
+import io
+import re
+import sys
+import textwrap
+
+from bundle import seeker
+from bundle.seeker.variables import CommonVariable
+from bundle.seeker.write_set import WriteSets, get_test_write_set, get_write_set
+from bundle.utils.recorder import Recorder
+
+_ADDRESS = re.compile(r' at 0x[0-9a-f]+')
+_RUN_SPECIFIC_FIELDS = re.compile(r'"(color|python_id)": [^,}]+')
+_ELAPSED_TIME = re.compile(r'Elapsed time: .*')
+
+
+def test_write_sets():
+    function = ast.parse(textwrap.dedent('''\
+        def f(items, n):
+            total = 0
+            for item in items:
+                if item:
+                    continue
+                total = total + item
+            try:
+                n, total = total, n
+            except ArithmeticError as e:
+                pass
+            while True:
+                n -= 1
+            items[0] = total
+            print(total)
+            def g(x):
+                return x + total
+            text = (
+                str(total)
+            )
+            return total
+        ''')).body[0]
+    write_sets = WriteSets(function)
+    assert [write_sets.get(line_no) for line_no in range(2, 21)] == [
+        {'total'},
+        None,
+        None,
+        set(),
+        None,
+        set(),
+        {'n', 'total'},
+        {'e'},
+        {'e'},
+        set(),
+        None,
+        None,
+        None,
+        {'g'},
+        None,
+        None,
+        None,
+        None,
+        set(),
+    ]
+    # the function itself, its nested functions and the lines out of it can change anything
+    assert write_sets.get(1) is None
+    assert write_sets.get(21) is None
+
+
+def test_with_block_write_sets():
+    function = ast.parse(textwrap.dedent('''\
+        def f(exits):
+            with Exiting(exits):
+                inside = 1
+            after = 2
+        ''')).body[0]
+    write_sets = WriteSets(function)
+    assert write_sets.get(2) is None
+    # before python 3.10, `__exit__` runs between the last line of the block and the next line,
+    # without a `line` event of the `with` line
+    assert write_sets.get(3) == ({'inside'} if sys.version_info >= (3, 10) else None)
+    assert write_sets.get(4) == {'after'}
+
+
+def test_write_set_of_nodes():
+    def write_set(source):
+        return get_write_set(*ast.parse(source).body)
+
+    assert write_set('a, b = b, a') == {'a', 'b'}
+    assert write_set('del a') == {'a'}
+    assert write_set('x = (a := b)') == {'x', 'a'}
+    assert write_set('x = lambda: y.append(1)') == {'x'}
+    assert write_set('x = [a, (b, 1)], {"c": None}') == {'x'}
+    assert write_set('def g(x=y): return x') == {'g'}
+    assert write_set('a.b = 1') is None
+    assert write_set('a[0] += 1') is None
+    assert write_set('import os') is None
+    assert write_set('class A: pass') is None
+    assert write_set('def g(x: f()): pass') is None
+
+    # operators, comparisons, attribute and item reads, iteration, hashing and formatting can all
+    # run the dunder methods or properties of the objects of the program
+    for source in ('a = -b', 'a = b + c', 'a = b < c', 'a = b and c', 'a = b if c else d', 'a = b.c', 'a = b[0]',
+                   'a = [c for c in b]', 'a, b = c', 'a, (b, c) = d, (e, f)', 'a = [*b]', 'a = {b}', 'a = {b: 1}',
+                   'a = {**b}', 'a = f"{b}"', 'assert a', 'raise a'):
+        assert write_set(source) is None, source
+
+    assert get_test_write_set(ast.parse('True', mode='eval').body) == set()
+    assert get_test_write_set(ast.parse('a', mode='eval').body) is None
+
+
+class Tracking:
+    """
+    adds the name of every operator, property and iteration used on it to a list
+    """
+
+    def __init__(self, uses: list):
+        self.uses = uses
+
+    def __lt__(self, other):
+        self.uses.append('<')
+        return True
+
+    def __add__(self, other):
+        self.uses.append('+')
+        return self
+
+    def __bool__(self):
+        self.uses.append('bool')
+        return True
+
+    def __iter__(self):
+        self.uses.append('iter')
+        return iter(())
+
+    @property
+    def last(self):
+        self.uses.append('last')
+        return self.uses[-2]
+
+
+def test_variable_names():
+    assert CommonVariable('a.b[c]').names >= {'a', 'c'}
+    assert 'd' in CommonVariable('[x for x in a if x > d]').names
+
+
+class Exiting:
+    """
+    adds `'exit'` to a list when its `with` block is left
+    """
+
+    def __init__(self, exits: list):
+        self.exits = exits
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.exits.append('exit')
+
+
+def make_functions(use_write_sets: bool, output: io.StringIO):
+    tracer = seeker.tracer(only_watch=False, output=output, use_write_sets=use_write_sets)
+    watch_tracer = seeker.tracer('total', 'items[0]', 'e', output=output, use_write_sets=use_write_sets)
+
+    @tracer
+    def loops(n):
+        total = 0
+        squares = []
+        for i in range(n):
+            if i % 2:
+                continue
+            total = total + i
+            squares += [i * i]
+        alias = squares
+        alias[0] = -1
+        while total > 0:
+            total -= 4
+        uses = []
+        tracking = Tracking(uses)
+        if tracking < 1:
+            tracking = tracking + 1
+        last = tracking.last
+        empty = [use for use in tracking]
+        if tracking:
+            pass
+        return squares
+
+    @watch_tracer
+    def watched(items):
+        total = 0
+        alias = items
+        for item in list(items):
+            total = total + item
+            if total > 3:
+                alias[0] = total
+            try:
+                1 / (item - 2)
+            except ZeroDivisionError as e:
+                message = str(e)
+        return total
+
+    @seeker.tracer('exits', output=output, use_write_sets=use_write_sets)
+    def exiting():
+        exits = []
+        with Exiting(exits):
+            inside = 1
+        after = 2
+        return exits
+
+    def main():
+        return [loops(6), watched([1, 2, 3]), exiting()]
+
+    return main
+
+
+def run(use_write_sets: bool):
+    original_recorder = seeker.tracer.get_recorder()
+    recorder = Recorder()
+    seeker.tracer.set_new_recorder(recorder)
+    output = io.StringIO()
+    try:
+        result = make_functions(use_write_sets, output)()
+    finally:
+        seeker.tracer.set_new_recorder(original_recorder)
+    change_list_json = _RUN_SPECIFIC_FIELDS.sub('', _ADDRESS.sub('', recorder.get_change_list_json()))
+    return result, _ADDRESS.sub('', _ELAPSED_TIME.sub('', output.getvalue())), change_list_json
+
+
+def test_write_sets_match_full_snapshots():
+    full_result, full_output, full_change_list = run(use_write_sets=False)
+    result, output, change_list = run(use_write_sets=True)
+
+    assert result == full_result
+    assert output == full_output
+    assert change_list == full_change_list
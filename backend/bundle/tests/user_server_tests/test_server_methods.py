@@ -1,6 +1,7 @@
 from __future__ import annotations
 import json
 import os
+import re
 import textwrap
 import pathlib
 from typing import Union, Mapping
@@ -9,9 +10,11 @@ from itertools import product
 import pytest
 
 from bundle.server_utils.utils import create_error_response, create_data_response, execute
+from bundle.server_utils import main_functions
 from bundle.server_utils.main_functions import application_helper
 from bundle.tests.user_server_tests.server_utils import Env, FileLikeObj, generate_wsgi_input
 from bundle.server_utils.params import TIMEOUT_SECONDS, VERSION
+from bundle.utils.recorder import expand_change_list, unpool_change_list, POOLED_FORMAT_VERSION
 
 
 class AnyResp:
@@ -75,6 +78,110 @@ def test_execution(code_file_name: str, graph_json_file_name: Union[str, Mapping
     print(result)
 
 
+def test_execution_budget(monkeypatch):
+    monkeypatch.setattr('bundle.server_utils.utils.EXECUTION_MAX_STEPS', 200)
+    code_text = textwrap.dedent('''\
+        from bundle.seeker import tracer
+        from bundle.utils.dummy_graph import graph_object
+
+
+        @tracer('count')
+        def main() -> None:
+            count = 0
+            while True:
+                try:
+                    count += len(graph_object.V)
+                except Exception:
+                    pass
+        ''')
+    _, result, _ = execute(code_text, mock_graph_json())
+    # the init record, the steps and the truncation record
+    assert len(result) == 202
+    assert result[-1]['truncated'] == 'The execution is stopped after 200 steps.'
+    assert all('truncated' not in record for record in result[:-1])
+
+
+def test_execution_profile():
+    code_text = textwrap.dedent('''\
+        from bundle.seeker import tracer
+        from bundle.utils.dummy_graph import graph_object
+
+
+        def count(n):
+            return n + 1
+
+
+        @tracer('total')
+        def main() -> None:
+            total = 0
+            for node in graph_object.V:
+                total = count(total)
+        ''')
+    _, _, profile = execute(code_text, mock_graph_json(), profile=True)
+    # only the traced function is profiled
+    assert len(profile) == 1
+    assert profile[0]['functionName'] == 'main'
+    assert profile[0]['fileName'].endswith('entry.py')
+    assert [(line['lineNumber'], line['hits']) for line in profile[0]['lines']] == [(11, 1), (12, 3), (13, 2)]
+    assert all(line['selfTime'] >= 0 for line in profile[0]['lines'])
+
+    assert execute(code_text, mock_graph_json())[2] is None
+
+
+_RUN_SPECIFIC_FIELDS = re.compile(r'"(color|python_id)": [^,}]+')
+
+
+@pytest.mark.parametrize('code_file_name', ['count_degree.py', 'print_edge.py', 'print_node.py'])
+def test_execution_instrument(code_file_name: str):
+    code_text = get_code_text(code_file_name)
+    graph_json = get_graph_json('double_node_one_edge.json')
+    _, traced_result, _ = execute(code_text, graph_json)
+    _, instrumented_result, _ = execute(code_text, graph_json, instrument=True)
+    assert _RUN_SPECIFIC_FIELDS.sub('', json.dumps(instrumented_result)) == \
+        _RUN_SPECIFIC_FIELDS.sub('', json.dumps(traced_result))
+
+
+@pytest.mark.parametrize('code_file_name', ['count_degree.py', 'print_edge.py', 'print_node.py'])
+def test_execution_delta(code_file_name: str):
+    code_text = get_code_text(code_file_name)
+    graph_json = get_graph_json('double_node_one_edge.json')
+    _, full_result, _ = execute(code_text, graph_json)
+    _, delta_result, _ = execute(code_text, graph_json, delta=True)
+    assert _RUN_SPECIFIC_FIELDS.sub('', json.dumps(expand_change_list(delta_result))) == \
+        _RUN_SPECIFIC_FIELDS.sub('', json.dumps(full_result))
+
+
+@pytest.mark.parametrize('code_file_name', ['count_degree.py', 'print_edge.py', 'print_node.py'])
+def test_execution_pooled(code_file_name: str):
+    code_text = get_code_text(code_file_name)
+    graph_json = get_graph_json('double_node_one_edge.json')
+    _, full_result, _ = execute(code_text, graph_json)
+    _, pooled_result, _ = execute(code_text, graph_json, pooled=True)
+    _, pooled_delta_result, _ = execute(code_text, graph_json, delta=True, pooled=True)
+    assert pooled_result['version'] == POOLED_FORMAT_VERSION
+    assert _RUN_SPECIFIC_FIELDS.sub('', json.dumps(unpool_change_list(pooled_result))) == \
+        _RUN_SPECIFIC_FIELDS.sub('', json.dumps(full_result))
+    assert _RUN_SPECIFIC_FIELDS.sub('', json.dumps(expand_change_list(unpool_change_list(pooled_delta_result)))) == \
+        _RUN_SPECIFIC_FIELDS.sub('', json.dumps(full_result))
+
+
+def test_execution_limits(monkeypatch):
+    monkeypatch.setattr('bundle.server_utils.utils.EXECUTION_MAX_CONTAINER_LENGTH', 1)
+    monkeypatch.setattr('bundle.server_utils.utils.EXECUTION_MAX_REPR_LENGTH', 4)
+    code_text = get_code_text('count_degree.py')
+    graph_json = get_graph_json('double_node_one_edge.json')
+    _, result, _ = execute(code_text, graph_json)
+
+    degree_dict_states = [state for change in result if change['variables']
+                          for name, state in change['variables'].items() if name.endswith('degree_dict')]
+    assert degree_dict_states[-1]['type'] == 'Mapping'
+    assert len(degree_dict_states[-1]['repr']) == 1 and degree_dict_states[-1]['elided'] == 1
+    node_states = [state for change in result if change['variables']
+                   for name, state in change['variables'].items() if name.endswith('@node')]
+    assert all(len(state['repr']) <= 4 for state in node_states if state['type'] == 'Node')
+    assert any('elided' in state for state in node_states)
+
+
 def mock_graph_json() -> dict:
     return {'elements': {'nodes': [{'data': {'id': 'v2', 'displayed': {}}, 'style': [{}]},
                                    {'data': {'id': 'v1', 'displayed': {}}, 'style': [{}]}],
@@ -142,6 +249,15 @@ def mock_normal_code() -> str:
             'version': VERSION
         }))}).content,
                  create_error_response('No Graph Intel Embedded In The Request.')),  # no graph
+    pytest.param(Env(REQUEST_METHOD='POST', PATH_INFO='/run', CONTENT_LENGTH='1').add_content(
+        {'wsgi.input': FileLikeObj(json.dumps({
+            'code': mock_normal_code(),
+            'graph': mock_graph_json(),
+            'version': VERSION,
+            'recordFormatVersion': POOLED_FORMAT_VERSION + 1
+        }))}).content,
+                 create_error_response(f'The record format version {POOLED_FORMAT_VERSION + 1} is not supported. '
+                                       f'The supported version is {POOLED_FORMAT_VERSION}.')),  # wrong record format
     pytest.param(Env(REQUEST_METHOD='POST', PATH_INFO='/run', CONTENT_LENGTH='1').add_content({
         'wsgi.input': generate_wsgi_input(code=mock_normal_code(), graph=mock_graph_json())
     }).content, AnyResp),  # normal request
@@ -160,6 +276,46 @@ def test_application_helper(env, response):
     mock_response = application_helper(env)
     assert response == mock_response
 
+
+def test_application_helper_delta(monkeypatch):
+    requested_deltas = []
+    monkeypatch.setattr(main_functions, 'time_out_execute',
+                        lambda code, graph_json, delta, pooled: requested_deltas.append(delta))
+
+    for extra_fields in ({}, {'delta': True}, {'delta': False}):
+        application_helper(Env(REQUEST_METHOD='POST', PATH_INFO='/run', CONTENT_LENGTH='1').add_content({
+            'wsgi.input': FileLikeObj(json.dumps({'code': mock_normal_code(), 'graph': mock_graph_json(),
+                                                  'version': VERSION, **extra_fields}))
+        }).content)
+    # the clients that do not ask for the delta records get the full ones
+    assert requested_deltas == [False, True, False]
+
+
+def test_graph_cache_page():
+    def get_stats() -> Mapping:
+        return application_helper(Env(REQUEST_METHOD='GET', PATH_INFO='/cache').content)['data']
+
+    graph_json = mock_graph_json()
+    graph_json['elements']['nodes'].append({'data': {'id': 'graph_cache_page'}})
+    stats = get_stats()
+
+    for _ in range(2):
+        application_helper(Env(REQUEST_METHOD='POST', PATH_INFO='/run', CONTENT_LENGTH='1').add_content({
+            'wsgi.input': generate_wsgi_input(code=mock_normal_code(), graph=graph_json)
+        }).content)
+
+    new_stats = get_stats()
+    assert new_stats['misses'] == stats['misses'] + 1
+    assert new_stats['hits'] == stats['hits'] + 1
+
+    # the graphs are parsed by the worker, and the ones it cannot parse are not cached
+    stats = get_stats()
+    response = application_helper(Env(REQUEST_METHOD='POST', PATH_INFO='/run', CONTENT_LENGTH='1').add_content({
+        'wsgi.input': generate_wsgi_input(code=mock_normal_code(), graph={'elements': []})
+    }).content)
+    assert response['errors'][0]['message'].startswith('Server Exception: Cannot import graph objects.')
+    assert get_stats()['entries'] == stats['entries']
+
 # @pytest.fixture
 # def local_server():
 #     with Pool(1) as pool:
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+from bundle.GraphObjects.Errors import GraphJsonFormatError
+from bundle.utils.graph_cache import GraphTemplateCache
+
+
+def make_graph_json(node_num: int) -> str:
+    return json.dumps({'elements': {
+        'nodes': [{'data': {'id': f'n{i}', 'displayed': {'degree': 0}}} for i in range(node_num)],
+        'edges': [{'data': {'id': f'e{i}', 'source': f'n{i}', 'target': f'n{i + 1}'}} for i in range(node_num - 1)],
+    }})
+
+
+def test_graph_cache_hit_and_miss():
+    cache = GraphTemplateCache(max_entries=4, max_size=1 << 20)
+    graph_json = make_graph_json(3)
+
+    first = cache.get_template(graph_json)
+    assert cache.get_template(graph_json) is first
+    # the same content as bytes has the same key
+    assert cache.get_template(graph_json.encode()) is first
+    assert cache.get_template(json.loads(graph_json)) is not first
+    assert cache.get_stats()['hits'] == 2
+    assert cache.get_stats()['misses'] == 2
+    assert graph_json in cache and len(cache) == 2
+
+
+def test_graph_cache_lookup_and_add():
+    cache = GraphTemplateCache(max_entries=4, max_size=1 << 20)
+    graph_json = make_graph_json(3)
+
+    # looking up does not parse
+    assert cache.lookup(graph_json) is None and len(cache) == 0
+    template = GraphTemplateCache(max_entries=4, max_size=1 << 20).get_template(graph_json)
+    cache.add(graph_json, template)
+    assert cache.lookup(graph_json) is template
+    assert cache.get_template(graph_json) is template
+    assert cache.get_stats()['hits'] == 2
+    assert cache.get_stats()['misses'] == 1
+
+
+def test_graph_cache_clone_does_not_leak():
+    cache = GraphTemplateCache(max_entries=4, max_size=1 << 20)
+    graph_json = make_graph_json(3)
+
+    graph = cache.get_clone(graph_json)
+    graph.nodes['n0']['degree'] = 10
+    graph.nodes['n1'].properties.clear()
+
+    template = cache.get_template(graph_json)
+    assert template.nodes['n0']['degree'] == 0
+    assert template.nodes['n1']['degree'] == 0
+    assert cache.get_clone(graph_json).nodes['n0']['degree'] == 0
+
+
+def test_graph_cache_eviction():
+    graph_jsons = [make_graph_json(i) for i in range(1, 5)]
+
+    cache = GraphTemplateCache(max_entries=2, max_size=1 << 20)
+    for graph_json in graph_jsons[:3]:
+        cache.get_template(graph_json)
+    assert graph_jsons[0] not in cache
+    assert cache.get_stats()['evictions'] == 1
+
+    # the least recently used one is evicted
+    cache.get_template(graph_jsons[1])
+    cache.get_template(graph_jsons[3])
+    assert graph_jsons[1] in cache and graph_jsons[2] not in cache
+
+    cache = GraphTemplateCache(max_entries=10, max_size=len(graph_jsons[1]) + len(graph_jsons[2]))
+    for graph_json in graph_jsons[1:3]:
+        cache.get_template(graph_json)
+    assert len(cache) == 2
+    cache.get_template(graph_jsons[3])
+    assert len(cache) == 1 and graph_jsons[3] in cache
+    assert cache.get_stats()['size'] == len(graph_jsons[3])
+
+    # a graph larger than the cache is not kept
+    cache = GraphTemplateCache(max_entries=10, max_size=10)
+    cache.get_template(graph_jsons[0])
+    assert len(cache) == 0
+
+
+def test_graph_cache_error_not_cached():
+    cache = GraphTemplateCache(max_entries=4, max_size=1 << 20)
+    with pytest.raises(GraphJsonFormatError):
+        cache.get_template('{"elements": []}')
+    assert len(cache) == 0
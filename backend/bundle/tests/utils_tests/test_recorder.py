@@ -11,7 +11,9 @@ import pytest
 from bundle.seeker import tracer
 from bundle.GraphObjects.Edge import Edge
 from bundle.GraphObjects.Node import Node
-from bundle.utils.recorder import Recorder, identifier_to_string, IDENTIFIER_SEPARATOR
+from bundle.GraphObjects.Base import ElementSet
+from bundle.utils.recorder import Recorder, identifier_to_string, IDENTIFIER_SEPARATOR, DEFAULT_KEYFRAME_INTERVAL, \
+    expand_change_list, unpool_change_list, POOLED_FORMAT_VERSION
 from .recorder_test_util import RecorderResultParser
 
 
@@ -106,6 +108,105 @@ def test_process_variable_state(empty_recorder):
         assert state_info_mapping[empty_recorder._TYPE_HEADER] == empty_recorder._TYPE_MAPPING[test_mapping[i + 1]]
 
 
+def test_search_type_string_cache(empty_recorder):
+    class A:
+        pass
+
+    class B(list):
+        pass
+
+    values = [True, 1, 1.2, 'abc', b'abc', Node('id'), [1], B([2]), (3,), deque([4]), {5}, frozenset({6}),
+              Counter([7]), {8: 9}, {8: 9}.values(), range(10), None, A(), ElementSet([Node('id')], Node)]
+    # classified twice, from the cache the second time
+    for _ in range(2):
+        for value in values:
+            assert empty_recorder._search_type_string(value) == empty_recorder._find_type_string(value)
+    assert empty_recorder._search_type_string(Counter()) == 'Counter'
+    assert empty_recorder._search_type_string('') == 'String'
+    assert empty_recorder._search_type_string(B()) == 'List'
+    assert empty_recorder._search_type_string(ElementSet([], Node)) == \
+        empty_recorder._TYPE_MAPPING[ElementSet]
+    assert A in empty_recorder._type_string_cache
+
+    # a type registered to an abc is classified again
+    assert empty_recorder._search_type_string(A()) == 'Object'
+    Set.register(A)
+    assert empty_recorder._search_type_string(A()) == 'Set'
+
+
+def test_reference_states(empty_recorder):
+    shared = [1]
+    node = Node('id')
+    node.properties['nodes'] = [node]
+    a = [shared, shared, {'a': shared}]
+    a.append(a)
+    a.append(node)
+
+    memory_trace = {id(shared)}
+    state = empty_recorder.process_variable_state(empty_recorder._INNER_IDENTIFIER_STRING, a, memory_trace)
+    assert memory_trace == {id(shared)}
+    # the objects in the trace and the ones containing themselves are references,
+    # but not the ones shared by other objects
+    assert [element['type'] for element in state['repr']] == ['reference', 'reference', 'Mapping', 'reference',
+                                                               'Node']
+    assert state['repr'][2]['repr'][0]['value']['type'] == 'reference'
+
+    state = empty_recorder.process_variable_state(empty_recorder._INNER_IDENTIFIER_STRING, a)
+    assert [element['type'] for element in state['repr']] == ['List', 'List', 'Mapping', 'reference', 'Node']
+    assert state['repr'][2]['repr'][0]['value']['type'] == 'List'
+    node_properties = state['repr'][4]['properties']['repr']
+    assert node_properties[0]['value']['repr'][0]['type'] == 'reference'
+
+
+def test_graph_object_properties_not_copied(empty_recorder):
+    template = Node('template')
+    template['label'] = 'a'
+    clone = Node('clone')
+    clone._clone_properties_from(template)
+    plain = Node('plain')
+
+    for node in (clone, plain):
+        state = empty_recorder.process_variable_state(empty_recorder._INNER_IDENTIFIER_STRING, node)
+        assert state['type'] == 'Node'
+    # recording neither makes the property dict of the plain node nor copies the shared one of the clone
+    assert plain._properties is None
+    assert clone._properties is template._properties and clone._properties_shared
+
+
+def test_limits(empty_recorder):
+    identifier_string = empty_recorder.register_variable(('namespace', 'var'))
+    value = [list(range(5)), {str(i): [i] for i in range(5)}, 'a' * 10, Node('id')]
+
+    state = empty_recorder.process_variable_state(identifier_string, value)
+    assert all('elided' not in element for element in state['repr'])
+    assert empty_recorder.get_limits() == (None, None, None)
+
+    empty_recorder.set_limits(max_container_length=3, max_repr_length=4)
+    state = empty_recorder.process_variable_state(identifier_string, value)
+    assert state['elided'] == 1
+    numbers, mapping, string = state['repr']
+    assert [element['repr'] for element in numbers['repr']] == ['0', '1', '2'] and numbers['elided'] == 2
+    assert [pair['key']['repr'] for pair in mapping['repr']] == ["'0'", "'1'", "'2'"] and mapping['elided'] == 2
+    assert string['repr'] == "'aaa" and string['elided'] == 8
+
+    empty_recorder.set_limits(max_container_depth=1)
+    state = empty_recorder.process_variable_state(identifier_string, value)
+    numbers, mapping, string, node = state['repr']
+    assert numbers['repr'] == [] and numbers['elided'] == 5
+    assert mapping['repr'] == [] and mapping['elided'] == 5
+    assert string['repr'] == "'" + 'a' * 10 + "'"
+    # the properties of a graph object are nested in it
+    assert node['properties']['repr'] == [] and 'elided' not in node['properties']
+
+    empty_recorder.set_limits(max_container_depth=2)
+    state = empty_recorder.process_variable_state(identifier_string, value)
+    assert [element['repr'] for element in state['repr'][1]['repr'][0]['value']['repr']] == []
+    assert state['repr'][1]['repr'][0]['value']['elided'] == 1
+
+    empty_recorder.set_limits()
+    assert empty_recorder.get_limits() == (None, None, None)
+
+
 def test_generating_changes(empty_recorder):
     first_line_no = 1
     empty_recorder.add_record(first_line_no)
@@ -917,3 +1018,69 @@ def test_call_traced_func_direct_return(set_new_recorder):
 
     assert RecorderResultParser(result) == RecorderResultParser(tracer.get_recorder().get_processed_change_list())
     pprint(tracer.get_recorder().get_processed_change_list())
+
+
+def test_delta_change_list(set_new_recorder):
+    @tracer('a', 'b', 'i')
+    def main():
+        a = []
+        b = 0
+        for i in range(10):
+            a.append(i)
+            b += i
+        return a
+
+    main()
+
+    recorder = tracer.get_recorder()
+    processed_change_list = recorder.get_processed_change_list()
+    for keyframe_interval in (1, 4, DEFAULT_KEYFRAME_INTERVAL):
+        delta_change_list = recorder.get_delta_change_list(keyframe_interval)
+        assert len(delta_change_list) == len(processed_change_list)
+        assert delta_change_list[0]['keyframe']
+        assert expand_change_list(delta_change_list) == processed_change_list
+        assert expand_change_list(json.loads(recorder.get_delta_change_list_json(keyframe_interval))) == \
+            json.loads(recorder.get_change_list_json())
+
+        keyframe_indices = [index for index, change in enumerate(delta_change_list) if change.get('keyframe', False)]
+        for index, next_index in zip(keyframe_indices, keyframe_indices[1:]):
+            assert next_index - index >= keyframe_interval
+            # a client can start at a keyframe
+            assert delta_change_list[index]['variables'] == processed_change_list[index]['variables']
+
+    # only the changed variables are in the records between the keyframes
+    delta_change_list = recorder.get_delta_change_list(DEFAULT_KEYFRAME_INTERVAL)
+    assert all(change['variables'] is None or len(change['variables']) < 3 for change in delta_change_list[1:])
+    assert len(recorder.get_delta_change_list_json()) < len(recorder.get_change_list_json())
+
+
+def test_pooled_change_list(set_new_recorder):
+    @tracer('a', 'b', 'c')
+    def main():
+        a = Node('1')
+        b = [a, a, {'a': a}]
+        for i in range(5):
+            c = i % 2
+            b.append(c)
+        return b
+
+    main()
+
+    recorder = tracer.get_recorder()
+    pooled_change_list = recorder.get_pooled_change_list()
+    assert pooled_change_list['version'] == POOLED_FORMAT_VERSION
+    values = pooled_change_list['values']
+    assert len({json.dumps(value, sort_keys=True) for value in values}) == len(values)
+    # `a` has one state as itself and one, of another color, in `b`, in all the records
+    assert sum(1 for value in values if value['type'] == 'Node') == 2
+    assert unpool_change_list(pooled_change_list) == recorder.get_processed_change_list()
+    assert unpool_change_list(json.loads(recorder.get_pooled_change_list_json())) == \
+        json.loads(recorder.get_change_list_json())
+    assert len(recorder.get_pooled_change_list_json()) < len(recorder.get_change_list_json())
+
+    pooled_delta_change_list = recorder.get_pooled_change_list(delta=True, keyframe_interval=2)
+    assert expand_change_list(unpool_change_list(pooled_delta_change_list)) == \
+        recorder.get_processed_change_list()
+
+    with pytest.raises(ValueError):
+        unpool_change_list({**pooled_change_list, 'version': POOLED_FORMAT_VERSION + 1})
@@ -0,0 +1,151 @@
+"""
+parsed graph template cache
+"""
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from hashlib import md5
+from typing import Mapping, Optional, Tuple, Union, Dict
+
+from ..GraphObjects.Graph import Graph
+from ..GraphObjects.stream_parser import CyjsSource
+
+
+class GraphTemplateCache:
+    """
+    Least recently used cache of parsed graphs, keyed by the md5 of their cyjs.
+
+    The cached graphs are templates, which should not be handed to user code.
+    `get_clone` gives a copy-on-write clone of the template instead, so that the
+    changes made by one execution do not leak into the next one. The cache is
+    bounded by the number of graphs and by the total size of their cyjs.
+    """
+    def __init__(self, max_entries: int, max_size: int):
+        """
+        @param max_entries: the maximum number of cached graphs
+        @param max_size: the maximum total size of the cached cyjs, in characters for strings
+                         and in bytes for bytes
+        """
+        self.max_entries = max_entries
+        self.max_size = max_size
+
+        self._templates: OrderedDict[str, Tuple[Graph, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_key(graph_json: Union[CyjsSource, Mapping]) -> Optional[Tuple[str, int]]:
+        """
+        hash the content of the cyjs
+        @param graph_json:
+        @return: the key and the size of the cyjs, or None if it cannot be cached (a file)
+        """
+        if isinstance(graph_json, Mapping):
+            graph_json = json.dumps(graph_json, sort_keys=True, separators=(',', ':'))
+
+        if isinstance(graph_json, str):
+            return md5(graph_json.encode()).hexdigest(), len(graph_json)
+        if isinstance(graph_json, (bytes, bytearray)):
+            return md5(graph_json).hexdigest(), len(graph_json)
+        return None
+
+    def _lookup(self, key_and_size: Optional[Tuple[str, int]]) -> Optional[Graph]:
+        with self._lock:
+            entry = self._templates.get(key_and_size[0]) if key_and_size is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._templates.move_to_end(key_and_size[0])
+            self.hits += 1
+            return entry[0]
+
+    def lookup(self, graph_json: Union[CyjsSource, Mapping]) -> Optional[Graph]:
+        """
+        get the cached graph of the cyjs without parsing it, which counts as a hit or a miss
+        @param graph_json:
+        @return: the template, or None if it is not cached
+        """
+        return self._lookup(self.get_key(graph_json))
+
+    def add(self, graph_json: Union[CyjsSource, Mapping], template: Graph) -> None:
+        """
+        cache a graph parsed somewhere else, like in a worker process
+        @param graph_json:
+        @param template: the graph parsed from the cyjs, which must not be changed afterwards
+        """
+        key_and_size = self.get_key(graph_json)
+        if key_and_size is not None:
+            self._store(*key_and_size, template)
+
+    def get_template(self, graph_json: Union[CyjsSource, Mapping]) -> Graph:
+        """
+        get the cached graph of the cyjs, which is parsed and cached if it is not there yet.
+        The template must not be changed, use `get_clone` to get a graph for executions.
+        @param graph_json:
+        @return: the template
+        @raise GraphJsonFormatError: if the graph cannot be parsed
+        """
+        key_and_size = self.get_key(graph_json)
+        template = self._lookup(key_and_size)
+        if template is not None:
+            return template
+
+        template = Graph.graph_generator(graph_json)
+        if key_and_size is not None:
+            self._store(*key_and_size, template)
+        return template
+
+    def get_clone(self, graph_json: Union[CyjsSource, Mapping]) -> Graph:
+        """
+        @param graph_json:
+        @return: a copy-on-write clone of the cached graph of the cyjs
+        @raise GraphJsonFormatError: if the graph cannot be parsed
+        """
+        return self.get_template(graph_json).clone()
+
+    def _store(self, key: str, size: int, template: Graph) -> None:
+        if size > self.max_size or self.max_entries <= 0:
+            return
+
+        with self._lock:
+            if key in self._templates:
+                return
+            self._templates[key] = (template, size)
+            self._size += size
+            while len(self._templates) > self.max_entries or self._size > self.max_size:
+                _, (_, evicted_size) = self._templates.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._templates.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def __contains__(self, graph_json: Union[CyjsSource, Mapping]) -> bool:
+        key_and_size = self.get_key(graph_json)
+        return key_and_size is not None and key_and_size[0] in self._templates
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        @return: the hit, miss and eviction counts and the current usage
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._templates),
+                'size': self._size,
+                'maxEntries': self.max_entries,
+                'maxSize': self.max_size,
+            }
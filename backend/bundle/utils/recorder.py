@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 import json
+from abc import get_cache_token
 from collections.abc import Mapping, Set
 from collections import Counter
-from copy import deepcopy, copy
+from itertools import islice
 from numbers import Number
 from random import randint
 from typing import Any, List, MutableMapping, Sequence, Tuple, Deque, Union, Dict, Optional
@@ -15,6 +16,12 @@ from ..GraphObjects.Node import Node
 
 IDENTIFIER_SEPARATOR = u'\u200b@'
 
+# a delta change list has a full record at least this often, from which a client can start
+DEFAULT_KEYFRAME_INTERVAL = 64
+
+# the version of the pooled change list, which changes with its format
+POOLED_FORMAT_VERSION = 1
+
 
 def identifier_to_string(identifier: Sequence[str]) -> str:
     return IDENTIFIER_SEPARATOR.join(identifier)
@@ -60,6 +67,46 @@ class Recorder:
             },
             ...
         ]
+
+    When the execution is stopped early, the last record has no changes, and the reason
+    is in its `truncated` field.
+
+    With limits (see `set_limits`), the containers longer than the length limit only have
+    their first elements, the ones nested deeper than the depth limit have none, and the reprs
+    longer than the repr limit are cut. How many elements or characters are left out is in
+    the `elided` field of their states.
+
+    The processed change list has every variable in each record that changes any. The
+    delta change list only has the changed ones, except in the records with a true
+    `keyframe` field, which have them all. `expand_change_list` turns it back into the
+    processed one.
+
+    Either list can be pooled, which puts every distinct state once in a table and the
+    indices of the states in the records::
+
+        {
+            'version': POOLED_FORMAT_VERSION,
+            'values': [
+                {
+                    'type': 'some_type',
+                    'color': 'some_color_hex',
+                    'repr': 'some_repr' or [index, ...] or [{'key': index, 'value': index}, ...],
+                    'properties': index,
+                    ...
+                },
+                ...
+            ],
+            'records': [
+                {
+                    'line': line,
+                    'variables': {'identity': index, ...},
+                    'accesses': [index, ...],
+                },
+                ...
+            ]
+        }
+
+    The nested states are pooled too. `unpool_change_list` turns it back into the list.
     """
     _COLOR_PALETTE = ["#828282", "#B15928",  # reserved for inner variables and global access
                       "#A6CEE3", "#1F78B4", "#B2DF8A",
@@ -134,14 +181,56 @@ class Recorder:
     _PAIR_KEY_HEADER = 'key'
     _PAIR_VALUE_HEADER = 'value'
 
+    _TRUNCATED_HEADER = 'truncated'
+    _KEYFRAME_HEADER = 'keyframe'
+    _ELIDED_HEADER = 'elided'
+
+    _POOL_VERSION_HEADER = 'version'
+    _POOL_VALUES_HEADER = 'values'
+    _POOL_RECORDS_HEADER = 'records'
+
     _BAD_REPR_STRING = 'BAD REPR FUNCTION'
 
-    def __init__(self):
+    # the rough json sizes of a record and of a variable state without its repr
+    _RECORD_SIZE_ESTIMATE = 48
+    _STATE_SIZE_ESTIMATE = 64
+
+    def __init__(self, max_container_length: Optional[int] = None, max_container_depth: Optional[int] = None,
+                 max_repr_length: Optional[int] = None):
+        """
+        @param max_container_length: see `set_limits`
+        @param max_container_depth: see `set_limits`
+        @param max_repr_length: see `set_limits`
+        """
         self._changes: List[MutableMapping] = []
         self._processed_changes: Optional[List[MutableMapping]] = None
+        self._estimated_size = 0
         self._color_mapping: MutableMapping = {
             **self._DEFAULT_COLOR_MAPPING
         }
+        # the type strings of the types seen so far, which are dropped when an abc registers a new type
+        self._type_string_cache: Dict[type, str] = {}
+        self._type_string_cache_token = get_cache_token()
+        self.set_limits(max_container_length, max_container_depth, max_repr_length)
+
+    def set_limits(self, max_container_length: Optional[int] = None, max_container_depth: Optional[int] = None,
+                   max_repr_length: Optional[int] = None) -> None:
+        """
+        set the limits of the states recorded from now on. None or 0 means no limit
+        @param max_container_length: the most elements recorded of a container
+        @param max_container_depth: the most levels of nested states whose elements are recorded,
+            the first of which is the variable itself
+        @param max_repr_length: the most characters recorded of a repr
+        """
+        self._max_container_length = max_container_length or None
+        self._max_container_depth = max_container_depth or None
+        self._max_repr_length = max_repr_length or None
+
+    def get_limits(self) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        """
+        @return: the max container length, the max container depth and the max repr length
+        """
+        return self._max_container_length, self._max_container_depth, self._max_repr_length
 
     def assign_color(self, identifier_string: str) -> None:
         if identifier_string not in self._color_mapping:
@@ -178,6 +267,23 @@ class Recorder:
         @param line_no: the line number
         """
         self._changes.append({self._LINE_HEADER: line_no, self._VARIABLE_HEADER: None, self._ACCESS_HEADER: None})
+        self._estimated_size += self._RECORD_SIZE_ESTIMATE
+
+    def add_truncation_record(self, reason: str) -> None:
+        """
+        add the record that marks the end of an execution that is stopped early
+        @param reason: why the execution is stopped
+        """
+        line_no = self.get_last_record_line_number() if self._changes else -1
+        self._changes.append({self._LINE_HEADER: line_no, self._VARIABLE_HEADER: None, self._ACCESS_HEADER: None,
+                              self._TRUNCATED_HEADER: reason})
+        self._estimated_size += self._RECORD_SIZE_ESTIMATE + len(reason)
+
+    def get_estimated_size(self) -> int:
+        """
+        @return: the rough size of the json of the records, not counting the unchanged variables
+        """
+        return self._estimated_size
 
     def get_last_record(self) -> MutableMapping:
         """
@@ -243,34 +349,37 @@ class Recorder:
     def _generate_singular_repr(self, variable_state: Any) -> str:
         return self._generate_repr(variable_state)
 
-    def _generate_linear_container_repr(self, variable_state: Sequence, memory_trace: Set) -> List:
+    def _generate_linear_container_repr(self, variable_state: Sequence, memory_trace: Set,
+                                        max_length: Optional[int] = None) -> List:
         temp = []
-        for element in variable_state:
+        for element in islice(variable_state, max_length):
             temp.append(
                 self.process_variable_state(
                     self._INNER_IDENTIFIER_STRING,
                     element,
-                    copy(memory_trace)
+                    memory_trace
                 )
             )
         return temp
 
     def _generate_pair_container_repr(self,
                                       variable_state: Mapping,
-                                      memory_trace: Set) -> List[Dict[str, MutableMapping]]:
+                                      memory_trace: Set,
+                                      max_length: Optional[int] = None) -> List[Dict[str, MutableMapping]]:
         temp = []
-        for key, value in variable_state.items():
+        for key, value in islice(variable_state.items(), max_length):
             temp.append({
                 self._PAIR_KEY_HEADER: self.process_variable_state(
-                    self._INNER_IDENTIFIER_STRING, key, copy(memory_trace)
+                    self._INNER_IDENTIFIER_STRING, key, memory_trace
                 ),
                 self._PAIR_VALUE_HEADER: self.process_variable_state(
-                    self._INNER_IDENTIFIER_STRING, value, copy(memory_trace)
+                    self._INNER_IDENTIFIER_STRING, value, memory_trace
                 )
             })
         return temp
 
-    def custom_repr(self, variable_state: Any, variable_type: str, memory_trace: Set) -> Any:
+    def custom_repr(self, variable_state: Any, variable_type: str, memory_trace: Set,
+                    max_length: Optional[int] = None) -> Any:
         if variable_type == self._REFERENCE_TYPE_STRING:
             var_real_type = self._search_type_string(variable_state)
             repr_result = self._generate_repr(variable_state) \
@@ -280,29 +389,73 @@ class Recorder:
         elif variable_type in self._SINGULAR_TYPES or variable_type == self._OBJECT_TYPE_STRING:
             repr_result = self._generate_singular_repr(variable_state)
         elif variable_type in self._LINEAR_CONTAINER_TYPES:
-            repr_result = self._generate_linear_container_repr(variable_state, memory_trace)
+            repr_result = self._generate_linear_container_repr(variable_state, memory_trace, max_length)
         elif variable_type in self._PAIR_CONTAINER_TYPES:
-            repr_result = self._generate_pair_container_repr(variable_state, memory_trace)
+            repr_result = self._generate_pair_container_repr(variable_state, memory_trace, max_length)
         else:
             # the wild card
             repr_result = self._generate_repr(variable_state)
         return repr_result
 
-    def _search_type_string(self, variable_state: Any) -> str:
+    def _get_max_container_length(self, variable_type: str, depth: int) -> Optional[int]:
+        """
+        @param variable_type:
+        @param depth: the number of states containing the state
+        @return: the most elements recorded of the state, or None if it is not a container or has no limit
+        """
+        if variable_type not in self._LINEAR_CONTAINER_TYPES and variable_type not in self._PAIR_CONTAINER_TYPES:
+            return None
+        if self._max_container_depth is not None and depth >= self._max_container_depth:
+            return 0
+        return self._max_container_length
+
+    @staticmethod
+    def _get_container_length(variable_state: Any) -> int:
+        try:
+            return len(variable_state)
+        except TypeError:
+            return sum(1 for _ in variable_state)
+
+    def _find_type_string(self, variable_state: Any) -> str:
         for type_candidate, type_string in self._TYPE_MAPPING.items():
             if isinstance(variable_state, type_candidate):
                 return type_string
 
+    def _search_type_string(self, variable_state: Any) -> str:
+        variable_type = type(variable_state)
+        if variable_state.__class__ is not variable_type:
+            # `isinstance` also looks at the `__class__` of the proxies
+            return self._find_type_string(variable_state)
+
+        cache_token = get_cache_token()
+        if cache_token != self._type_string_cache_token:
+            self._type_string_cache.clear()
+            self._type_string_cache_token = cache_token
+
+        type_string = self._type_string_cache.get(variable_type, None)
+        if type_string is None:
+            type_string = self._type_string_cache[variable_type] = self._find_type_string(variable_state)
+        return type_string
+
     def process_variable_state(self,
                                identifier_string: str,
                                variable_state: Any,
                                memory_trace: Set = None) -> MutableMapping:
-        # TODO this is problematic
+        """
+        @param identifier_string:
+        @param variable_state:
+        @param memory_trace: the ids of the states containing this one, which are shared by the nested
+            states and left as they are given when the state is processed
+        @return: the state mapping, which is a reference if the state contains itself
+        """
         if memory_trace is None:
             memory_trace = set()
         var_id = id(variable_state)
+        # the states containing this one
+        depth = len(memory_trace)
 
-        if var_id in memory_trace:
+        is_reference = var_id in memory_trace
+        if is_reference:
             # leave a note on the object and then trace back
             variable_type: str = self._REFERENCE_TYPE_STRING
         else:
@@ -315,22 +468,39 @@ class Recorder:
             self._COLOR_HEADER: self._color_mapping[identifier_string]
         }
 
-        state_mapping[self._REPR_HEADER] = self.custom_repr(
+        max_length = self._get_max_container_length(variable_type, depth)
+        repr_result = self.custom_repr(
             variable_state,
             state_mapping[self._TYPE_HEADER],
-            memory_trace
+            memory_trace,
+            max_length
         )
+        elided = 0
+        if max_length is not None:
+            elided = self._get_container_length(variable_state) - len(repr_result)
+        elif self._max_repr_length is not None and isinstance(repr_result, str) and \
+                len(repr_result) > self._max_repr_length:
+            elided = len(repr_result) - self._max_repr_length
+            repr_result = repr_result[:self._max_repr_length]
+        state_mapping[self._REPR_HEADER] = repr_result
+        if elided > 0:
+            state_mapping[self._ELIDED_HEADER] = elided
+        # the nested states of containers are counted when they are made
+        self._estimated_size += self._STATE_SIZE_ESTIMATE + (len(repr_result) if isinstance(repr_result, str) else 0)
 
         if state_mapping[self._TYPE_HEADER] in self._GRAPH_OBJECT_TYPES:
             variable_state: Union[Node, Edge]
             state_mapping[self._PROPERTY_HEADER] = self.process_variable_state(
                 self._INNER_IDENTIFIER_STRING,
-                variable_state.properties,
+                variable_state.get_properties(),
                 memory_trace,
             )
 
             state_mapping[self._ID_HEADER] = variable_state.cy_id
 
+        if not is_reference:
+            memory_trace.discard(var_id)
+
         return state_mapping
 
     def add_vc_to_last_record(self, variable_identifier_string: str, variable_state: Any) -> None:
@@ -397,14 +567,10 @@ class Recorder:
                     **change
                 }
 
-                if variables_field is None:
-                    temp_object[self._VARIABLE_HEADER] = None
-                else:
-                    current_current_variables = deepcopy(previous_variables)
-                    for changed_var_key, changed_var_value in variables_field.items():
-                        current_current_variables[changed_var_key] = changed_var_value
-                    temp_object[self._VARIABLE_HEADER] = current_current_variables
-                    previous_variables = current_current_variables
+                if variables_field is not None:
+                    # the states are not changed once they are made, so the records share them
+                    previous_variables = temp_object[self._VARIABLE_HEADER] = {**previous_variables,
+                                                                               **variables_field}
 
                 temp_container.append(temp_object)
 
@@ -412,6 +578,33 @@ class Recorder:
 
         return self._processed_changes
 
+    def _delta_change_list(self, keyframe_interval: int) -> List[MutableMapping]:
+        init_object = self._init_result_object
+        init_object[self._KEYFRAME_HEADER] = True
+
+        temp_container = [init_object]
+
+        current_variables = {**init_object[self._VARIABLE_HEADER]}
+        last_keyframe_index = 0
+
+        for index, change in enumerate(self._changes, start=1):
+            variables_field = change[self._VARIABLE_HEADER]
+
+            temp_object = {
+                **change
+            }
+
+            if variables_field is not None:
+                current_variables.update(variables_field)
+                if index - last_keyframe_index >= keyframe_interval:
+                    temp_object[self._VARIABLE_HEADER] = {**current_variables}
+                    temp_object[self._KEYFRAME_HEADER] = True
+                    last_keyframe_index = index
+
+            temp_container.append(temp_object)
+
+        return temp_container
+
     def get_change_list(self) -> List[MutableMapping]:
         return self._changes
 
@@ -421,8 +614,34 @@ class Recorder:
     def get_change_list_json(self) -> str:
         return json.dumps(self.get_processed_change_list())
 
+    def get_delta_change_list(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> List[MutableMapping]:
+        """
+        @param keyframe_interval: the most records after a keyframe before the next record
+            changing any variable becomes one
+        @return: the records with only the changed variables, except the keyframes
+        """
+        return self._delta_change_list(keyframe_interval)
+
+    def get_delta_change_list_json(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> str:
+        return json.dumps(self.get_delta_change_list(keyframe_interval))
+
+    def get_pooled_change_list(self, delta: bool = False,
+                               keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> MutableMapping:
+        """
+        @param delta: whether the delta change list is pooled instead of the processed one
+        @param keyframe_interval: see `get_delta_change_list`
+        @return: the pooled change list (see `pool_change_list`)
+        """
+        return pool_change_list(self.get_delta_change_list(keyframe_interval) if delta
+                                else self.get_processed_change_list())
+
+    def get_pooled_change_list_json(self, delta: bool = False,
+                                    keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL) -> str:
+        return json.dumps(self.get_pooled_change_list(delta, keyframe_interval))
+
     def purge_changes(self) -> None:
         self._changes: List[dict] = []
+        self._estimated_size = 0
         self._color_mapping: MutableMapping = {
             **self._DEFAULT_COLOR_MAPPING
         }
@@ -434,3 +653,149 @@ class Recorder:
         """Empty previous recorded items"""
         self.purge_processed_changes()
         self.purge_changes()
+
+
+def expand_change_list(delta_change_list: Sequence[Mapping]) -> List[MutableMapping]:
+    """
+    turn a delta change list (see `Recorder.get_delta_change_list`) into the processed one
+    @param delta_change_list:
+    @return: the records with every variable in the ones changing any, without the keyframe fields
+    """
+    expanded_change_list = []
+    previous_variables = {}
+
+    for change in delta_change_list:
+        temp_object = {
+            **change
+        }
+        is_keyframe = temp_object.pop(Recorder._KEYFRAME_HEADER, False)
+        variables_field = change[Recorder._VARIABLE_HEADER]
+
+        if variables_field is not None:
+            previous_variables = temp_object[Recorder._VARIABLE_HEADER] = \
+                {**variables_field} if is_keyframe else {**previous_variables, **variables_field}
+
+        expanded_change_list.append(temp_object)
+
+    return expanded_change_list
+
+
+def pool_change_list(change_list: Sequence[Mapping]) -> MutableMapping:
+    """
+    put every distinct state of a processed or delta change list once in a table, and their
+    indices in the records and in the states containing them
+    @param change_list:
+    @return: the pooled change list, in the `POOLED_FORMAT_VERSION` format
+    """
+    values: List[MutableMapping] = []
+    indices_by_content: Dict[str, int] = {}
+    # the records share their unchanged states
+    indices_by_id: Dict[int, int] = {}
+
+    def intern(state: Mapping) -> int:
+        index = indices_by_id.get(id(state), None)
+        if index is not None:
+            return index
+
+        pooled_state = {
+            **state
+        }
+        repr_field = state[Recorder._REPR_HEADER]
+        if isinstance(repr_field, list):
+            if state[Recorder._TYPE_HEADER] in Recorder._PAIR_CONTAINER_TYPES:
+                pooled_state[Recorder._REPR_HEADER] = [{
+                    Recorder._PAIR_KEY_HEADER: intern(pair[Recorder._PAIR_KEY_HEADER]),
+                    Recorder._PAIR_VALUE_HEADER: intern(pair[Recorder._PAIR_VALUE_HEADER])
+                } for pair in repr_field]
+            else:
+                pooled_state[Recorder._REPR_HEADER] = [intern(element) for element in repr_field]
+        if Recorder._PROPERTY_HEADER in state:
+            pooled_state[Recorder._PROPERTY_HEADER] = intern(state[Recorder._PROPERTY_HEADER])
+
+        content = json.dumps(pooled_state, sort_keys=True)
+        index = indices_by_content.get(content, None)
+        if index is None:
+            index = indices_by_content[content] = len(values)
+            values.append(pooled_state)
+        indices_by_id[id(state)] = index
+        return index
+
+    records = []
+    for change in change_list:
+        temp_object = {
+            **change
+        }
+
+        variables_field = change[Recorder._VARIABLE_HEADER]
+        if variables_field is not None:
+            temp_object[Recorder._VARIABLE_HEADER] = {key: intern(state) for key, state in variables_field.items()}
+
+        accesses_field = change[Recorder._ACCESS_HEADER]
+        if accesses_field is not None:
+            temp_object[Recorder._ACCESS_HEADER] = [intern(state) for state in accesses_field]
+
+        records.append(temp_object)
+
+    return {
+        Recorder._POOL_VERSION_HEADER: POOLED_FORMAT_VERSION,
+        Recorder._POOL_VALUES_HEADER: values,
+        Recorder._POOL_RECORDS_HEADER: records,
+    }
+
+
+def unpool_change_list(pooled_change_list: Mapping) -> List[MutableMapping]:
+    """
+    turn a pooled change list (see `pool_change_list`) back into the change list
+    @param pooled_change_list:
+    @return: the processed or delta change list that is pooled
+    @raise ValueError: if the pooled change list is in another version of the format
+    """
+    version = pooled_change_list.get(Recorder._POOL_VERSION_HEADER, None)
+    if version != POOLED_FORMAT_VERSION:
+        raise ValueError(f'The pooled change list version {version} is not supported. '
+                         f'The supported version is {POOLED_FORMAT_VERSION}.')
+
+    values = pooled_change_list[Recorder._POOL_VALUES_HEADER]
+    states: List[Optional[MutableMapping]] = [None] * len(values)
+
+    def resolve(index: int) -> MutableMapping:
+        state = states[index]
+        if state is not None:
+            return state
+
+        pooled_state = values[index]
+        state = {
+            **pooled_state
+        }
+        repr_field = pooled_state[Recorder._REPR_HEADER]
+        if isinstance(repr_field, list):
+            if pooled_state[Recorder._TYPE_HEADER] in Recorder._PAIR_CONTAINER_TYPES:
+                state[Recorder._REPR_HEADER] = [{
+                    Recorder._PAIR_KEY_HEADER: resolve(pair[Recorder._PAIR_KEY_HEADER]),
+                    Recorder._PAIR_VALUE_HEADER: resolve(pair[Recorder._PAIR_VALUE_HEADER])
+                } for pair in repr_field]
+            else:
+                state[Recorder._REPR_HEADER] = [resolve(element) for element in repr_field]
+        if Recorder._PROPERTY_HEADER in pooled_state:
+            state[Recorder._PROPERTY_HEADER] = resolve(pooled_state[Recorder._PROPERTY_HEADER])
+
+        states[index] = state
+        return state
+
+    change_list = []
+    for record in pooled_change_list[Recorder._POOL_RECORDS_HEADER]:
+        temp_object = {
+            **record
+        }
+
+        variables_field = record[Recorder._VARIABLE_HEADER]
+        if variables_field is not None:
+            temp_object[Recorder._VARIABLE_HEADER] = {key: resolve(index) for key, index in variables_field.items()}
+
+        accesses_field = record[Recorder._ACCESS_HEADER]
+        if accesses_field is not None:
+            temp_object[Recorder._ACCESS_HEADER] = [resolve(index) for index in accesses_field]
+
+        change_list.append(temp_object)
+
+    return change_list